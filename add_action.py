@@ -1,16 +1,29 @@
 import os
 import json
 import re
+import hashlib
+import tempfile
+import stat
 import argparse
 import ollama
 from jinja2 import Environment, FileSystemLoader
+from llm_cache import cached_completion, run_concurrent
 
 # --- 配置路径 ---
+LLM_MODEL = 'llama3'
 CONFIG_PATH = './configs/generated_counter_config.json'
 PARAM_TEMPLATE_DIR = './templates'
 COUNTER_TEMPLATE_DIR = './templates'
 OUTPUT_DIR_HUMAN = './counters/human'  # 用于MediaPipe计数器
 
+def _read_umask():
+    # 只能通过设置来读取umask；umask是进程级的，只在导入时（其他线程开始写文件之前）读取一次
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+NEW_FILE_MODE = 0o666 & ~_read_umask()  # 新生成文件的权限，与open(path, 'w')相同
+
 # --- 第一部分：参数生成（来自param_generator/generate_params.py）---
 
 def load_prompt_template():
@@ -62,23 +75,35 @@ def normalize_llm_response(llm_config):
     
     return normalized
 
+def parse_llm_config(content):
+    """解析并标准化LLM的JSON响应，响应无效时抛出ValueError。"""
+    raw_config = json.loads(content)
+    if not isinstance(raw_config, dict) or not raw_config:
+        raise ValueError("LLM响应不是非空的JSON对象")
+    return normalize_llm_response(raw_config)
+
 def generate_config_from_llm(action_name: str, template):
     """通过调用Ollama LLM生成单个计数器配置。"""
     if not template:
         return None
     prompt = template.render(exercise_name=action_name)
     print(f"\n--- 为以下项目生成配置: {action_name} ---")
-    try:
+
+    def call_llm():
         response = ollama.chat(
-            model='llama3',
+            model=LLM_MODEL,
             messages=[{'role': 'user', 'content': prompt}],
             format='json' # 直接请求JSON输出
         )
-        content = response['message']['content']
+        return response['message']['content']
+
+    try:
+        # 相同的提示/模型/选项直接使用磁盘缓存（只缓存能被解析的响应）
+        content = cached_completion(prompt, LLM_MODEL, call_llm, options={'format': 'json'},
+                                    validate=parse_llm_config)
         print(f"LLM响应: {content}")
-        raw_config = json.loads(content)
-        # 标准化响应
-        normalized_config = normalize_llm_response(raw_config)
+        # 解析并标准化响应
+        normalized_config = parse_llm_config(content)
         print(f"标准化配置: {normalized_config}")
         return normalized_config
     except Exception as e:
@@ -125,46 +150,86 @@ def camel_to_snake(name):
     s1 = re.sub(r"(.)([A-Z][a-z]+)", r"\1_\2", name)
     return re.sub(r"([a-z0-9])([A-Z])", r"\1_\2", s1).lower()
 
+def content_hash(content):
+    """返回文本内容的SHA-256哈希。"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def file_content_hash(path):
+    """返回磁盘上文件内容的SHA-256哈希，文件不存在时返回None。"""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+def _file_mode(path):
+    """目标文件的权限：已存在时保持原有权限，新文件与open()一样按umask（mkstemp创建的临时文件为0600）。"""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return NEW_FILE_MODE
+
+def atomic_write(path, content):
+    """原子地写入文件：先写入同目录下的临时文件，再替换目标文件。"""
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_', suffix='.py')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.chmod(tmp_path, _file_mode(path))
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
 def generate_all_counters():
-    """读取整个配置文件并生成所有计数器模块。"""
+    """
+    读取整个配置文件并增量生成计数器模块。
+    
+    仅当渲染结果的哈希与磁盘上的文件不同时才（原子地）写入文件，
+    未变化的文件保持原样，其mtime和__pycache__不受影响。
+    
+    Returns:
+        set: 内容发生变化（新建或更新）的计数器类名集合；失败时返回None
+    """
     print("\n--- 生成计数器代码 ---")
     try:
         if not os.path.exists(CONFIG_PATH):
             print(f"错误: 配置文件 {CONFIG_PATH} 不存在。")
-            return False
+            return None
             
         with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
             configs = json.load(f)
             
         if not configs:
             print("警告: 配置文件为空。")
-            return True
+            return set()
             
         print(f"找到 {len(configs)} 个计数器配置")
         
     except (FileNotFoundError, json.JSONDecodeError) as e:
         print(f"错误: 无法读取或解析 {CONFIG_PATH}: {e}")
-        return False
+        return None
 
     try:
         env = Environment(loader=FileSystemLoader(COUNTER_TEMPLATE_DIR), trim_blocks=True, lstrip_blocks=True)
         template = env.get_template('counter_template.py.j2')
     except Exception as e:
         print(f"加载模板时出错: {e}")
-        return False
+        return None
 
     # 确保输出目录存在
     os.makedirs(OUTPUT_DIR_HUMAN, exist_ok=True)
 
     success_count = 0
+    changed = set()
     for i, cfg in enumerate(configs):
         try:
             class_name = cfg.get('name')
             if not class_name:
                 print(f"警告: 配置 {i} 没有名称，跳过")
                 continue
-                
-            print(f"生成 {class_name}...")
             
             params = {
                 'class_name': class_name,
@@ -183,25 +248,33 @@ def generate_all_counters():
             code = template.render(**params)
             # generated_counter_config.json中的所有配置都是人体/MediaPipe计数器
             output_path = os.path.join(OUTPUT_DIR_HUMAN, f"{camel_to_snake(class_name)}.py")
+            success_count += 1
+            
+            if file_content_hash(output_path) == content_hash(code):
+                continue
             
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(code)
-                
+            atomic_write(output_path, code)
+            changed.add(class_name)
             print(f"✓ 生成 {output_path}")
-            success_count += 1
             
         except Exception as e:
             print(f"✗ 生成 {cfg.get('name', 'unknown')} 时出错: {e}")
             continue
 
-    print(f"\n生成完成: {success_count}/{len(configs)} 个计数器成功生成")
-    return success_count > 0
+    print(f"\n生成完成: {success_count}/{len(configs)} 个计数器有效，{len(changed)} 个文件已更新")
+    if success_count == 0:
+        return None
+    return changed
 
 # --- 主执行 ---
 
 def main():
     parser = argparse.ArgumentParser(description="自动添加新动作计数器的工具。")
     parser.add_argument('actions', nargs='+', help='要生成配置的动作名称列表（例如"bicep curls", "jumping jacks"）。')
+    parser.add_argument('--skip-codegen', action='store_true',
+                        help='仅更新配置文件，不生成.py文件（计数器由配置驱动的ConfigCounter直接提供）。')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='并发LLM请求的最大数量（默认取LLM_MAX_WORKERS环境变量或4）。')
     args = parser.parse_args()
 
     # 步骤1：从LLM生成参数
@@ -209,17 +282,19 @@ def main():
     if not prompt_template:
         return
     
-    new_configs = []
-    for action in args.actions:
-        config = generate_config_from_llm(action, prompt_template)
-        if config:
-            new_configs.append(config)
+    # 并发地为所有动作生成配置（结果顺序与输入一致）
+    configs = run_concurrent(lambda action: generate_config_from_llm(action, prompt_template),
+                             args.actions, max_workers=args.workers)
+    new_configs = [config for config in configs if config]
     
     # 步骤2：更新主JSON配置文件
     update_config_file(new_configs)
     
     # 步骤3：从更新的配置重新生成所有计数器代码
-    generate_all_counters()
+    if args.skip_codegen:
+        print("\n跳过代码生成：新计数器将直接从配置文件解释运行。")
+    else:
+        generate_all_counters()
 
     print("\n过程完成。新计数器已准备好使用。")
 
@@ -1,7 +1,6 @@
 from flask import Flask, render_template, request, jsonify, redirect, url_for
 import json
 import os
-import time
 from add_action import generate_config_from_llm, load_prompt_template, generate_all_counters, normalize_llm_response
 from counters import list_counters, reload_counters
 from unified_main import categorize_counters  # Import the categorization function
@@ -12,8 +11,8 @@ app = Flask(__name__)
 ADMIN_PASSWORD = "dev123"  # Change this!
 
 def list_counters_by_category():
-    """Returns counters organized by category for admin panel."""
-    from counters import list_counters, get_counter
+    """Returns counters organized by category for admin panel (from the manifest, no imports)."""
+    from counters import list_counters, get_counter_metadata
     
     categorized = {
         'Human': [],
@@ -23,40 +22,24 @@ def list_counters_by_category():
     
     all_counters = list_counters()
     for counter_name in all_counters:
-        try:
-            CounterClass = get_counter(counter_name)
-            if CounterClass:
-                temp_counter = CounterClass()
-                
-                # Determine counter type
-                counter_type = 'mediapipe'  # default
-                if hasattr(temp_counter, 'detection_type'):
-                    counter_type = temp_counter.detection_type
-                elif hasattr(temp_counter, 'object_class') and hasattr(temp_counter, 'tracker'):
-                    counter_type = 'yolo'
-                
-                counter_info = {
-                    'name': counter_name,
-                    'type': counter_type,
-                    'object_class': getattr(temp_counter, 'object_class', 'human'),
-                    'logic_type': getattr(temp_counter, 'logic_type', 'exercise'),
-                    'confidence_threshold': getattr(temp_counter, 'confidence_threshold', 0.5),
-                    'threshold': getattr(temp_counter, 'threshold', 40),
-                    'stable_frames': getattr(temp_counter, 'stable_frames', 5),
-                    'description': getattr(temp_counter, 'description', ''),
-                    'has_center_line': hasattr(temp_counter, 'adjust_center_line') or hasattr(temp_counter, 'start_position') or hasattr(temp_counter, 'center_reference')
-                }
-                
-                if counter_type == 'yolo':
-                    if counter_info['object_class'] in ['cat', 'dog', 'bird', 'horse', 'sheep', 'cow', 'elephant', 'bear', 'zebra', 'giraffe']:
-                        categorized['Animal'].append(counter_info)
-                    else:
-                        categorized['Object'].append(counter_info)
-                else:
-                    categorized['Human'].append(counter_info)
-        except Exception:
-            # Silently skip problematic counters
-            pass
+        entry = get_counter_metadata(counter_name)
+        if not entry:
+            continue
+        
+        metadata = entry['metadata']
+        counter_info = {
+            'name': counter_name,
+            'type': metadata.get('detection_type', 'mediapipe'),
+            'object_class': metadata.get('object_class', 'human'),
+            'logic_type': metadata.get('logic_type', 'exercise'),
+            'confidence_threshold': metadata.get('confidence_threshold', 0.5),
+            'threshold': metadata.get('threshold', 40),
+            'stable_frames': metadata.get('stable_frames', 5),
+            'description': metadata.get('description', ''),
+            'has_center_line': metadata.get('has_center_line', False)
+        }
+        
+        categorized.setdefault(entry['category'], []).append(counter_info)
     
     return categorized
 
@@ -139,10 +122,9 @@ def generate_human_counter():
         with open(config_path, 'w') as f:
             json.dump(existing_configs, f, indent=2)
         
-        # Regenerate all counter code
-        success = generate_all_counters()
-        if success:
-            time.sleep(0.5)
+        # Regenerate counter code (only changed files are rewritten)
+        changed = generate_all_counters()
+        if changed is not None:
             reload_counters()
             return jsonify({
                 'success': True, 
@@ -333,11 +315,9 @@ def generate_counter():
         
         # Regenerate all counter code
         try:
-            success = generate_all_counters()
-            if success:
-                print("Counter code generated successfully")  # Debug log
-                # Small delay to ensure file operations complete
-                time.sleep(0.5)
+            changed = generate_all_counters()
+            if changed is not None:
+                print(f"Counter code generated successfully, changed: {sorted(changed)}")  # Debug log
                 # Reload counters to make them available immediately
                 reload_counters()
                 print("Counters reloaded successfully")
@@ -392,73 +372,30 @@ def delete_counter():
         print(f"Removed {counter_name} from config, {len(configs)} remaining")
         
         # Step 2: Find and delete the counter file
-        from counters import get_counter
-        counter_class = get_counter(counter_name)
+        from counters import get_counter_metadata
+        entry = get_counter_metadata(counter_name)
+        
+        # Use the same naming convention as the generator
+        def camel_to_snake(name):
+            import re
+            s1 = re.sub(r"(.)([A-Z][a-z]+)", r"\1_\2", name)
+            return re.sub(r"([a-z0-9])([A-Z])", r"\1_\2", s1).lower()
+        
+        counter_filename = camel_to_snake(counter_name) + '.py'
         subdir = 'human'  # Default fallback
         
-        if counter_class:
-            try:
-                # Determine the counter type and directory
-                temp_counter = counter_class()
-                counter_type = 'mediapipe'  # default
-                if hasattr(temp_counter, 'detection_type'):
-                    counter_type = temp_counter.detection_type
-                elif hasattr(temp_counter, 'object_class') and hasattr(temp_counter, 'tracker'):
-                    counter_type = 'yolo'
-                
-                # Determine subdirectory based on counter type
-                if counter_type == 'yolo':
-                    if hasattr(temp_counter, 'object_class'):
-                        obj_class = temp_counter.object_class
-                        if obj_class in ['cat', 'dog', 'bird', 'horse', 'sheep', 'cow', 'elephant', 'bear', 'zebra', 'giraffe']:
-                            subdir = 'animal'
-                        else:
-                            subdir = 'object'
-                    else:
-                        subdir = 'object'
-                else:
-                    subdir = 'human'
-            except Exception as e:
-                print(f"Error determining counter type: {e}")
-                subdir = 'human'  # Fallback
+        if entry and entry.get('path'):
+            # The manifest knows where the counter lives
+            subdir = os.path.basename(os.path.dirname(entry['path']))
+            counter_filename = os.path.basename(entry['path'])
         else:
-            # Counter not in memory, check all possible locations
-            subdirs_to_check = ['human', 'animal', 'object']
-            subdir = 'human'  # Default
-            
-            # Use the same naming convention as the generator
-            def camel_to_snake(name):
-                import re
-                s1 = re.sub(r"(.)([A-Z][a-z]+)", r"\1_\2", name)
-                return re.sub(r"([a-z0-9])([A-Z])", r"\1_\2", s1).lower()
-            
-            counter_filename = camel_to_snake(counter_name) + '.py'
-            
-            # Check which subdirectory has the file
-            for check_subdir in subdirs_to_check:
+            # Counter not in manifest, check all possible locations
+            for check_subdir in ['human', 'animal', 'object']:
                 check_file = f"./counters/{check_subdir}/{counter_filename}"
                 if os.path.exists(check_file):
                     subdir = check_subdir
                     break
         
-        # Create the filename (if not already created above)
-        if 'counter_filename' not in locals():
-            # Use the same naming convention as the generator
-            def camel_to_snake(name):
-                import re
-                s1 = re.sub(r"(.)([A-Z][a-z]+)", r"\1_\2", name)
-                return re.sub(r"([a-z0-9])([A-Z])", r"\1_\2", s1).lower()
-            
-            counter_filename = camel_to_snake(counter_name) + '.py'
-        else:
-            # Convert using same logic for consistency  
-            def camel_to_snake(name):
-                import re
-                s1 = re.sub(r"(.)([A-Z][a-z]+)", r"\1_\2", name)
-                return re.sub(r"([a-z0-9])([A-Z])", r"\1_\2", s1).lower()
-            
-            counter_filename = camel_to_snake(counter_name) + '.py'
-        
         counter_file = f"./counters/{subdir}/{counter_filename}"
         
         print(f"Attempting to delete file: {counter_file}")  # Debug log
@@ -488,9 +425,9 @@ def delete_counter():
             timer.start()
             
             try:
-                success = generate_all_counters()
+                changed = generate_all_counters()
                 timer.cancel()  # Cancel the timeout
-                if success:
+                if changed is not None:
                     regeneration_success = True
                     print("Counter code regenerated after deletion")
                 else:
@@ -597,14 +534,15 @@ def force_delete_counter():
 def regenerate_all():
     """Regenerate all counter code"""
     try:
-        success = generate_all_counters()
-        if success:
+        changed = generate_all_counters()
+        if changed is not None:
             # Reload counters to make them available immediately
             reload_counters()
-            print("All counters regenerated and reloaded successfully")
+            print(f"All counters regenerated and reloaded successfully, changed: {sorted(changed)}")
             return jsonify({
                 'success': True, 
-                'message': 'All counters regenerated successfully'
+                'message': f'All counters regenerated successfully ({len(changed)} changed)',
+                'changed': sorted(changed)
             })
         else:
             return jsonify({
@@ -0,0 +1,304 @@
+"""
+计数器update()热路径的微基准测试。
+向计数器注册表中的每个类输入合成（或录制的）关键点流，
+向YOLO计数器输入合成检测流（检测器被替换为回放，不需要模型权重），
+测量update()的吞吐量、每次调用的临时内存分配、保留的内存块，
+以及状态转换时print()调用的开销，并按计数器类输出表格。
+
+可在CI中运行：--baseline 与之前保存的结果比较，超过容差时以非零状态退出。
+
+用法:
+    python benchmark_counters.py
+    python benchmark_counters.py --counter SquatCounter --counter DogCounter --frames 20000
+    python benchmark_counters.py --landmarks recorded_landmarks.npy --detections recorded_boxes.npy
+    python benchmark_counters.py --output counters.json --baseline previous.json --tolerance 0.25
+"""
+
+import argparse
+import builtins
+import contextlib
+import gc
+import json
+import math
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from counters import get_counter, get_counter_metadata, list_counters
+from inference_backends import NUM_LANDMARKS, PoseLandmarks, load_landmarks
+
+FRAME_SHAPE = (720, 1280, 3)
+REST_FRAMES = 40     # 开头的静止帧数（覆盖计数器校准窗口）
+PERIOD_FRAMES = 60   # 每次动作的帧数
+
+class ReplayDetector:
+    """替换YOLOTracker.detect_objects：按顺序回放预先生成的检测结果。"""
+
+    def __init__(self, detections):
+        self.detections = detections
+        self.index = 0
+
+    def __call__(self, frame):
+        detections = self.detections[self.index % len(self.detections)]
+        self.index += 1
+        return detections
+
+def _phase(frames):
+    """每帧的动作进度（0→1→0），开头REST_FRAMES帧静止。"""
+    t = np.maximum(np.arange(frames) - REST_FRAMES, 0)
+    return 0.5 - 0.5 * np.cos(2 * np.pi * t / PERIOD_FRAMES)
+
+def synthetic_landmarks(frames, direction='down-first', amplitude=0.25, seed=0):
+    """
+    生成(frames, 33, 4)的关键点数组：所有关键点沿方向同步运动并带有少量抖动。
+    """
+    rng = np.random.default_rng(seed)
+    base = np.empty((NUM_LANDMARKS, 4))
+    base[:, 0] = np.linspace(0.35, 0.65, NUM_LANDMARKS)
+    base[:, 1] = np.linspace(0.2, 0.6, NUM_LANDMARKS)
+    base[:, 2] = 0.0
+    base[:, 3] = 0.99
+
+    sign = -1.0 if direction == 'up-first' else 1.0
+    data = np.repeat(base[None], frames, axis=0)
+    data[:, :, 1] += sign * amplitude * _phase(frames)[:, None]
+    data[:, :, :3] += rng.normal(0.0, 0.002, (frames, NUM_LANDMARKS, 3))
+    return data
+
+def synthetic_detections(frames, object_class, amplitude=200.0, size=80.0, seed=0):
+    """生成检测流：边界框中心上下运动，约5%的帧没有检测。"""
+    rng = np.random.default_rng(seed)
+    center_y = 500.0 - amplitude * _phase(frames) + rng.normal(0.0, 1.5, frames)
+    missing = rng.random(frames) < 0.05
+    missing[:REST_FRAMES] = False
+    stream = []
+    for y, miss in zip(center_y.tolist(), missing.tolist()):
+        if miss:
+            stream.append([])
+            continue
+        bbox = (600.0, y - size / 2, 600.0 + size, y + size / 2)
+        stream.append([{
+            'bbox': bbox,
+            'confidence': 0.9,
+            'class': object_class,
+            'center': (600.0 + size / 2, y),
+        }])
+    return stream
+
+def load_detections(path, object_class):
+    """读取录制的边界框（.npy形状(N, 4)，NaN行表示没有检测；或.json列表，null表示没有检测）。"""
+    if path.endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            boxes = json.load(f)
+    else:
+        boxes = [None if np.isnan(row).any() else row for row in np.load(path).tolist()]
+    stream = []
+    for box in boxes:
+        if box is None:
+            stream.append([])
+            continue
+        x1, y1, x2, y2 = box
+        stream.append([{'bbox': (x1, y1, x2, y2), 'confidence': 0.9, 'class': object_class,
+                        'center': ((x1 + x2) / 2, (y1 + y2) / 2)}])
+    return stream
+
+class _PrintCounter:
+    """替换builtins.print：只计数，不格式化输出。"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+
+@contextlib.contextmanager
+def silenced_print():
+    counter = _PrintCounter()
+    original = builtins.print
+    builtins.print = counter
+    try:
+        yield counter
+    finally:
+        builtins.print = original
+
+class CounterCase:
+    """一个计数器类的基准测试输入：如何创建实例、输入流以及如何调用update()。"""
+
+    def __init__(self, name, args):
+        self.name = name
+        self.counter_class = get_counter(name)
+        if self.counter_class is None:
+            raise ValueError(f"计数器 {name} 未找到")
+        metadata = (get_counter_metadata(name) or {}).get('metadata', {})
+        self.is_yolo = metadata.get('detection_type') == 'yolo'
+
+        with silenced_print():
+            probe = self.counter_class()
+        if self.is_yolo:
+            object_class = getattr(probe, 'object_class', 'object')
+            if args.detections:
+                self.stream = load_detections(args.detections, object_class)[:args.frames]
+            else:
+                self.stream = synthetic_detections(args.frames, object_class)
+            self.frame = np.zeros(FRAME_SHAPE, dtype=np.uint8)
+        else:
+            if args.landmarks:
+                data = load_landmarks(args.landmarks)[:args.frames]
+            else:
+                threshold = float(getattr(probe, 'threshold', 0.1) or 0.1)
+                amplitude = max(0.05, min(0.3, 2.5 * threshold))
+                data = synthetic_landmarks(args.frames, getattr(probe, 'direction', 'down-first'), amplitude)
+            self.stream = [PoseLandmarks(frame) for frame in data]
+
+    def make_counter(self):
+        with silenced_print():
+            counter = self.counter_class()
+            if self.is_yolo:
+                counter.tracker.detect_objects = ReplayDetector(self.stream)
+        return counter
+
+    def run(self, counter, items):
+        """对items逐个调用update()，返回耗时（秒）。"""
+        update = counter.update
+        if self.is_yolo:
+            frame = self.frame
+            start = time.perf_counter()
+            for _ in items:
+                update(frame)
+        else:
+            start = time.perf_counter()
+            for landmarks in items:
+                update(landmarks)
+        return time.perf_counter() - start
+
+def measure(case, repeat, alloc_samples):
+    """测量一个计数器类，返回结果字典。"""
+    stream = case.stream
+    calls = len(stream)
+
+    # 带print：输出写入os.devnull，包含格式化和写入的开销
+    with_print = math.inf
+    for _ in range(repeat):
+        counter = case.make_counter()
+        with open(os.devnull, 'w') as sink, contextlib.redirect_stdout(sink):
+            with_print = min(with_print, case.run(counter, stream))
+
+    # 不带print：print被替换为计数函数（参数仍会被求值）
+    silent = math.inf
+    prints = 0
+    for _ in range(repeat):
+        counter = case.make_counter()
+        gc.collect()
+        blocks_before = sys.getallocatedblocks()
+        with silenced_print() as print_counter:
+            silent = min(silent, case.run(counter, stream))
+        retained_blocks = sys.getallocatedblocks() - blocks_before
+        prints = print_counter.calls
+    final_count = counter.count
+
+    # 每次调用的临时内存分配（tracemalloc峰值 - 调用前的当前值）
+    samples = stream[:alloc_samples]
+    counter = case.make_counter()
+    transient = []
+    with silenced_print():
+        tracemalloc.start()
+        try:
+            update = counter.update
+            for item in samples:
+                arg = case.frame if case.is_yolo else item
+                tracemalloc.reset_peak()
+                current, _ = tracemalloc.get_traced_memory()
+                update(arg)
+                transient.append(tracemalloc.get_traced_memory()[1] - current)
+        finally:
+            tracemalloc.stop()
+
+    us_print = with_print / calls * 1e6
+    us_silent = silent / calls * 1e6
+    return {
+        'counter': case.name,
+        'kind': 'yolo' if case.is_yolo else 'pose',
+        'calls': calls,
+        'count': final_count,
+        'calls_per_second': round(calls / silent, 1),
+        'us_per_call': round(us_silent, 3),
+        'us_per_call_with_print': round(us_print, 3),
+        'print_share': round(max(0.0, (us_print - us_silent) / us_print), 4) if us_print else 0.0,
+        'prints_per_1k_calls': round(prints / calls * 1000, 2),
+        'transient_bytes_per_call': round(float(np.mean(transient)), 1) if transient else None,
+        'transient_bytes_p99': int(np.percentile(transient, 99)) if transient else None,
+        'retained_blocks_per_1k_calls': round(retained_blocks / calls * 1000, 2),
+    }
+
+def print_table(results):
+    header = (f"{'计数器':<26}{'调用/秒':>12}{'µs/次':>9}{'含print':>9}{'print占比':>10}"
+              f"{'print/千次':>11}{'临时B/次':>10}{'保留块/千次':>12}{'计数':>6}")
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        if 'error' in r:
+            print(f"{r['counter']:<26}❌ {r['error']}")
+            continue
+        print(f"{r['counter']:<26}{r['calls_per_second']:>12,.0f}{r['us_per_call']:>9.2f}"
+              f"{r['us_per_call_with_print']:>9.2f}{r['print_share']:>10.1%}"
+              f"{r['prints_per_1k_calls']:>11.1f}{r['transient_bytes_per_call']:>10.0f}"
+              f"{r['retained_blocks_per_1k_calls']:>12.1f}{r['count']:>6}")
+
+def compare_with_baseline(results, baseline_path, tolerance):
+    """与基线结果比较每次调用的耗时，返回回归列表。"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {r['counter']: r for r in json.load(f).get('results', []) if 'error' not in r}
+
+    regressions = []
+    for result in results:
+        previous = baseline.get(result['counter'])
+        if 'error' in result or not previous:
+            continue
+        limit = previous['us_per_call'] * (1.0 + tolerance)
+        if result['us_per_call'] > limit:
+            regressions.append((result['counter'], previous['us_per_call'], result['us_per_call']))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="计数器update()热路径微基准测试")
+    parser.add_argument('--counter', action='append', help="要测试的计数器（可多次指定，默认全部）")
+    parser.add_argument('--frames', type=int, default=5000, help="每个计数器输入的帧数")
+    parser.add_argument('--repeat', type=int, default=3, help="重复次数（取最快的一次）")
+    parser.add_argument('--alloc-samples', type=int, default=1000, help="测量内存分配的调用次数")
+    parser.add_argument('--landmarks', help="录制的关键点.npy文件（N, 33, 3/4）")
+    parser.add_argument('--detections', help="录制的边界框.npy/.json文件")
+    parser.add_argument('--output', help="结果JSON路径")
+    parser.add_argument('--baseline', help="用于回归检查的基线结果JSON")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="允许的相对变慢比例")
+    args = parser.parse_args()
+
+    results = []
+    for name in args.counter or list_counters():
+        try:
+            case = CounterCase(name, args)
+            results.append(measure(case, args.repeat, args.alloc_samples))
+        except Exception as e:
+            results.append({'counter': name, 'error': f"{type(e).__name__}: {e}"})
+
+    print_table(results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'frames': args.frames, 'repeat': args.repeat, 'python': sys.version.split()[0],
+                       'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 结果已保存: {args.output}")
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ 发现 {len(regressions)} 个性能回归（容差 {args.tolerance:.0%}）:")
+            for name, before, after in regressions:
+                print(f"   {name}: {before:.2f} → {after:.2f} µs/次")
+            sys.exit(1)
+        print(f"\n✅ 没有超过 {args.tolerance:.0%} 的性能回归")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""
+端到端流水线基准测试。
+在本地生成合成测试视频（弹跳的球、做深蹲的火柴人），或使用给定的视频片段，
+用与web_app.process_video_stream相同的FramePipeline（不做帧率节流）逐帧处理，
+报告FPS、各阶段延迟分位数、峰值内存（RSS）和计数准确率，并将结果写入JSON，
+便于在版本之间跟踪性能回归。
+
+用法:
+    python benchmark_pipeline.py                                 # 合成视频 + 默认计数器
+    python benchmark_pipeline.py --reps 20 --width 1920 --height 1080
+    python benchmark_pipeline.py --video clip.mp4 --counter SquatCounter --expected 12
+    python benchmark_pipeline.py --output results/pipeline.json --smoothing one_euro
+    python benchmark_pipeline.py --no-buffer-pool                # 对比：每帧分配新数组
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from counters import get_counter
+from frame_clock import create_frame_clock
+from inference_backends import configure_backends, get_pose_backend
+from metrics import SessionMetrics
+from buffer_pool import FrameBufferPool
+from pipeline import FramePipeline
+from smoothing import SMOOTHING_METHODS, LandmarkSmoother, create_filter
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REST_SECONDS = 2.0   # 视频开头的静止时间，供计数器校准
+REP_SECONDS = 2.0    # 每次动作的时长
+
+# 合成视频 -> 默认的(计数器, 模式)
+DEFAULT_RUNS = {
+    'stick_figure': [('SquatCounter', 'single'), ('SquatCounter', 'multi_person')],
+    'ball': [('SportsBallCounter', 'single')],
+}
+
+def peak_rss_mb():
+    """进程的峰值常驻内存（MB），平台不支持时返回None。"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux以KB为单位，macOS以字节为单位
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def _rep_phase(t):
+    """动作进度：静止阶段为0，之后每REP_SECONDS完成一次0→1→0的运动。"""
+    if t < REST_SECONDS:
+        return 0.0
+    return 0.5 - 0.5 * math.cos(2 * math.pi * (t - REST_SECONDS) / REP_SECONDS)
+
+def _write_video(path, frames, fps, size, draw):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    if not writer.isOpened():
+        raise RuntimeError(f"无法创建视频文件: {path}")
+    try:
+        for index in range(frames):
+            writer.write(draw(index / fps))
+    finally:
+        writer.release()
+
+def render_ball_video(path, reps=10, fps=30, size=(1280, 720)):
+    """
+    生成弹跳的球：在地面静止REST_SECONDS秒，然后弹起reps次。
+
+    Returns:
+        dict: 视频元数据（含expected_reps）
+    """
+    width, height = size
+    ground = int(height * 0.8)
+    radius = max(12, height // 18)
+    bounce = int(height * 0.45)
+    frames = int((REST_SECONDS + reps * REP_SECONDS + 1.0) * fps)
+    background = np.full((height, width, 3), (60, 140, 60), dtype=np.uint8)
+    cv2.rectangle(background, (0, ground + radius), (width, height), (40, 90, 40), -1)
+
+    def draw(t):
+        frame = background.copy()
+        y = ground
+        if REST_SECONDS <= t < REST_SECONDS + reps * REP_SECONDS:
+            y = int(ground - bounce * abs(math.sin(math.pi * (t - REST_SECONDS) / REP_SECONDS)))
+        x = width // 2
+        cv2.circle(frame, (x, y), radius, (0, 140, 255), -1)
+        cv2.circle(frame, (x, y), radius, (20, 20, 20), 2)
+        cv2.line(frame, (x - radius, y), (x + radius, y), (20, 20, 20), 2)
+        return frame
+
+    _write_video(path, frames, fps, size, draw)
+    return {'kind': 'ball', 'path': path, 'frames': frames, 'fps': fps,
+            'width': width, 'height': height, 'expected_reps': reps}
+
+def render_stick_figure_video(path, reps=10, fps=30, size=(1280, 720)):
+    """
+    生成做深蹲的火柴人：站立REST_SECONDS秒，然后下蹲reps次。
+
+    Returns:
+        dict: 视频元数据（含expected_reps）
+    """
+    width, height = size
+    unit = height / 10.0
+    cx = width // 2
+    foot_y = int(height * 0.92)
+    thickness = max(4, int(unit * 0.25))
+    frames = int((REST_SECONDS + reps * REP_SECONDS + 1.0) * fps)
+    background = np.full((height, width, 3), 225, dtype=np.uint8)
+
+    def draw(t):
+        frame = background.copy()
+        depth = _rep_phase(t) if t < REST_SECONDS + reps * REP_SECONDS else 0.0
+        hip_y = foot_y - unit * (3.6 - 1.6 * depth)
+        knee_x = unit * (0.2 + 1.0 * depth)
+        knee_y = foot_y - unit * (1.8 - 0.5 * depth)
+        shoulder_y = hip_y - unit * 2.6
+        lean = unit * 0.6 * depth
+        hip = (cx, int(hip_y))
+        shoulder = (int(cx + lean), int(shoulder_y))
+        head = (int(cx + lean), int(shoulder_y - unit * 0.9))
+        color = (40, 40, 40)
+
+        for side in (-1, 1):
+            knee = (int(cx + side * knee_x), int(knee_y))
+            foot = (int(cx + side * unit * 0.6), foot_y)
+            cv2.line(frame, hip, knee, color, thickness)
+            cv2.line(frame, knee, foot, color, thickness)
+            hand = (int(shoulder[0] + unit * 1.4 * depth + side * unit * 0.3),
+                    int(shoulder[1] + unit * (1.6 - 1.5 * depth)))
+            cv2.line(frame, shoulder, hand, color, thickness)
+        cv2.line(frame, hip, shoulder, color, thickness)
+        cv2.circle(frame, head, int(unit * 0.55), (180, 200, 230), -1)
+        cv2.circle(frame, head, int(unit * 0.55), color, thickness // 2)
+        return frame
+
+    _write_video(path, frames, fps, size, draw)
+    return {'kind': 'stick_figure', 'path': path, 'frames': frames, 'fps': fps,
+            'width': width, 'height': height, 'expected_reps': reps}
+
+def create_counter(counter_name, mode, smoothing='none'):
+    """创建计数器实例，返回(counter, counter_type, 姿态工具或None)。"""
+    CounterClass = get_counter(counter_name)
+    if CounterClass is None:
+        raise ValueError(f"计数器 {counter_name} 未找到")
+
+    counter = CounterClass()
+    counter_type = 'yolo' if getattr(counter, 'detection_type', 'mediapipe') == 'yolo' else 'mediapipe'
+    if mode == 'multi_person':
+        if counter_type != 'mediapipe':
+            raise ValueError("多人模式仅支持人体动作计数器")
+        from multi_person import MultiPersonCounter
+        counter = MultiPersonCounter(CounterClass, smoothing=smoothing)
+        counter_type = 'multi_person'
+
+    mediapipe = None
+    if counter_type in ('mediapipe', 'multi_person'):
+        backend = get_pose_backend()
+        pose = backend.create_estimator() if counter_type == 'mediapipe' else None
+        mediapipe = {'pose': pose, 'mp_pose': backend, 'mp_drawing': backend}
+    return counter, counter_type, mediapipe
+
+def run_benchmark(video_path, counter_name, mode='single', expected_reps=None,
+                  smoothing='none', record=False, max_frames=None, buffer_pool=True):
+    """
+    用FramePipeline处理整个视频（不节流），返回该次运行的结果字典。
+    buffer_pool为False时缓冲池不保留数组（每帧分配新数组），用于对比。
+    """
+    counter, counter_type, mediapipe = create_counter(counter_name, mode, smoothing)
+    capture = cv2.VideoCapture(video_path)
+    if not capture.isOpened():
+        raise RuntimeError(f"无法打开视频: {video_path}")
+
+    clock = create_frame_clock(capture, video_path)
+    metrics = SessionMetrics({'counter': counter_name, 'counter_type': counter_type})
+    landmark_smoother = None
+    if counter_type == 'mediapipe' and smoothing != 'none':
+        landmark_smoother = LandmarkSmoother(smoothing, clock.fps)
+    elif counter_type == 'yolo':
+        counter.smoother = create_filter(smoothing, 'bbox', clock.fps)
+
+    mediapipe = mediapipe or {}
+    buffers = FrameBufferPool() if buffer_pool else FrameBufferPool(max_buffers=0)
+    pipeline = FramePipeline(counter, counter_type, counter_name, clock, metrics,
+                             pose=mediapipe.get('pose'), mp_pose=mediapipe.get('mp_pose'),
+                             mp_drawing=mediapipe.get('mp_drawing'),
+                             landmark_smoother=landmark_smoother, buffer_pool=buffers)
+
+    writer = None
+    record_path = None
+    if record:
+        fd, record_path = tempfile.mkstemp(suffix='.mp4', prefix='bench_record_')
+        os.close(fd)
+        width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        writer = cv2.VideoWriter(record_path, cv2.VideoWriter_fourcc(*'mp4v'), clock.fps, (width, height))
+
+    events = []
+    frames = 0
+    last_shape = None
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    try:
+        while max_frames is None or frames < max_frames:
+            timer = metrics.frame_timer()
+            ret, frame = buffers.read(capture, last_shape)
+            captured_at = time.perf_counter()
+            timer.mark('decode')
+            if not ret:
+                break
+            last_shape = frame.shape
+            clock.tick(capture)
+
+            result = pipeline.process(frame, timer, captured_at, recording=writer is not None)
+            events.extend(result.events)
+            if writer is not None and result.recording_frame is not None:
+                writer.write(result.recording_frame)
+                timer.mark('record')
+            metrics.end_frame(timer)
+            frames += 1
+    finally:
+        elapsed = time.perf_counter() - start
+        capture.release()
+        if writer is not None:
+            writer.release()
+            os.remove(record_path)
+        if counter_type == 'multi_person':
+            counter.close()
+        elif mediapipe.get('pose') is not None:
+            mediapipe['pose'].close()
+
+    count = counter.count
+    accuracy = None
+    if expected_reps:
+        accuracy = {
+            'expected': expected_reps,
+            'counted': count,
+            'error': count - expected_reps,
+            'accuracy': round(max(0.0, 1.0 - abs(count - expected_reps) / expected_reps), 4),
+        }
+
+    summary = metrics.summary()
+    return {
+        'video': os.path.basename(video_path),
+        'counter': counter_name,
+        'counter_type': counter_type,
+        'smoothing': smoothing,
+        'record': record,
+        'buffer_pool': buffers.stats() if buffer_pool else None,
+        'frames': frames,
+        'seconds': round(elapsed, 4),
+        'fps': round(frames / elapsed, 2) if elapsed > 0 else None,
+        'count': count,
+        'count_events': [{'count': e['count'], 'video_time': e['video_time']} for e in events],
+        'accuracy': accuracy,
+        'peak_rss_mb': peak_rss_mb(),
+        'peak_rss_before_mb': rss_before,
+        'stages': summary['stages'],
+        'frame_latency': summary['frame'],
+        'rep_latency': summary['rep_latency'],
+    }
+
+def environment_info():
+    """记录运行环境，便于比较不同版本的结果。"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__,
+    }
+
+def _format_ms(value):
+    return f"{value * 1000:.2f}" if value is not None else "-"
+
+def print_result(result):
+    print(f"\n📊 {result['counter']} ({result['counter_type']}) - {result['video']}")
+    print(f"   帧数: {result['frames']}, 用时: {result['seconds']:.2f}s, FPS: {result['fps']}")
+    if result['accuracy']:
+        acc = result['accuracy']
+        print(f"   计数: {acc['counted']}/{acc['expected']} (准确率 {acc['accuracy']:.0%})")
+    else:
+        print(f"   计数: {result['count']}")
+    print(f"   峰值内存: {result['peak_rss_mb']} MB")
+    pool = result.get('buffer_pool')
+    if pool:
+        print(f"   缓冲池: 复用 {pool['reuses']} 次, 分配 {pool['allocations']} 次 "
+              f"({pool['buffers']} 个缓冲区, {pool['mbytes']} MB)")
+    print(f"   {'阶段':<16}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, stats in list(result['stages'].items()) + [('frame', result['frame_latency']),
+                                                         ('rep_latency', result['rep_latency'])]:
+        print(f"   {stage:<16}{_format_ms(stats['p50']):>10}{_format_ms(stats['p95']):>10}{_format_ms(stats['p99']):>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端流水线基准测试")
+    parser.add_argument('--video', help="使用给定的视频片段，而不是生成合成视频")
+    parser.add_argument('--counter', action='append', help="要测试的计数器（可多次指定）")
+    parser.add_argument('--multi-person', action='store_true', help="给定视频时使用多人模式")
+    parser.add_argument('--expected', type=int, help="给定视频中的实际动作次数（用于准确率）")
+    parser.add_argument('--synthetic', choices=sorted(DEFAULT_RUNS), action='append',
+                        help="要生成的合成视频类型（默认全部）")
+    parser.add_argument('--reps', type=int, default=10, help="合成视频中的动作次数")
+    parser.add_argument('--fps', type=int, default=30, help="合成视频的帧率")
+    parser.add_argument('--width', type=int, default=1280, help="合成视频宽度")
+    parser.add_argument('--height', type=int, default=720, help="合成视频高度")
+    parser.add_argument('--max-frames', type=int, help="每次运行最多处理的帧数")
+    parser.add_argument('--smoothing', choices=SMOOTHING_METHODS, default='none', help="平滑方法")
+    parser.add_argument('--record', action='store_true', help="同时测量录制阶段")
+    parser.add_argument('--no-buffer-pool', action='store_true', help="不复用帧缓冲区（每帧分配新数组，用于对比）")
+    parser.add_argument('--output', help="结果JSON路径（默认 benchmark_results/pipeline_<时间>.json）")
+    parser.add_argument('--pose-backend', help="姿态后端（例如 replay:<关键点.npy>，见inference_backends）")
+    parser.add_argument('--detector-backend', help="检测后端（例如 replay:<检测.json>）")
+    args = parser.parse_args()
+    configure_backends(pose=args.pose_backend, detector=args.detector_backend)
+
+    runs = []
+    workdir = tempfile.mkdtemp(prefix='pipeline_bench_')
+    try:
+        if args.video:
+            counters = args.counter or ['SquatCounter']
+            mode = 'multi_person' if args.multi_person else 'single'
+            runs = [(args.video, name, mode, args.expected, None) for name in counters]
+        else:
+            renderers = {'ball': render_ball_video, 'stick_figure': render_stick_figure_video}
+            for kind in args.synthetic or sorted(DEFAULT_RUNS):
+                path = os.path.join(workdir, f"{kind}.mp4")
+                print(f"🎬 生成合成视频: {kind} ({args.reps} 次, {args.width}x{args.height} @ {args.fps} FPS)")
+                meta = renderers[kind](path, args.reps, args.fps, (args.width, args.height))
+                plan = [(name, 'single') for name in args.counter] if args.counter else DEFAULT_RUNS[kind]
+                runs.extend((path, name, mode, meta['expected_reps'], meta) for name, mode in plan)
+
+        results = []
+        for video_path, counter_name, mode, expected, meta in runs:
+            try:
+                result = run_benchmark(video_path, counter_name, mode, expected,
+                                       args.smoothing, args.record, args.max_frames,
+                                       buffer_pool=not args.no_buffer_pool)
+                if meta:
+                    result['synthetic'] = {k: v for k, v in meta.items() if k != 'path'}
+                print_result(result)
+            except Exception as e:
+                print(f"❌ {counter_name} ({mode}) 失败: {e}")
+                result = {'video': os.path.basename(video_path), 'counter': counter_name,
+                          'mode': mode, 'error': str(e)}
+            results.append(result)
+    finally:
+        for name in os.listdir(workdir):
+            os.remove(os.path.join(workdir, name))
+        os.rmdir(workdir)
+
+    output = args.output or os.path.join(
+        'benchmark_results', f"pipeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'environment': environment_info(), 'runs': results}, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 结果已保存: {output}")
+
+if __name__ == "__main__":
+    main()
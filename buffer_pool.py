@@ -0,0 +1,102 @@
+"""
+每个会话的帧缓冲池。
+
+热循环中的每一步（解码、缩放到显示尺寸、BGR→RGB转换、YOLO显示缩放、录制复制）
+都会产生一个新的整帧数组。缓冲池按(用途, 形状, 类型)保留少量数组，通过OpenCV的dst参数
+（以及VideoCapture.read(image)）把结果写入复用的数组，稳定状态下每帧几乎没有新的整帧分配。
+
+数组可能在返回之后仍被其他地方引用：已发布的显示帧由FrameSlot和正在编码的流式传输线程持有。
+复用前检查引用计数，只复用除缓冲池本身以外没有任何引用（包括视图）的数组；
+全部被占用时分配新数组（未达到上限时加入缓冲池），因此复用永远不会覆盖别人正在读取的帧，
+显示帧自然地在几个缓冲区之间轮换。缓冲池只能由处理线程使用。
+"""
+
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+MAX_BUFFERS = 4  # 每个(用途, 形状, 类型)最多保留的数组数
+
+def _free_refcount() -> int:
+    """
+    空闲数组在get()的循环中的引用计数（缓冲池列表、循环变量和getrefcount的参数）。
+    用同样的循环结构测量，而不是写死，不同的Python版本对借用引用的计数可能不同。
+    """
+    buffers = [np.empty(0)]
+    for buffer in buffers:
+        return sys.getrefcount(buffer)
+
+_FREE_REFCOUNT = _free_refcount()
+
+class FrameBufferPool:
+    """
+    按用途复用整帧数组。
+
+    Args:
+        max_buffers: 每个(用途, 形状, 类型)最多保留的数组数；为0时不保留任何数组
+                     （每次都分配新数组，用于对比测试）
+    """
+
+    def __init__(self, max_buffers: int = MAX_BUFFERS):
+        self.max_buffers = max_buffers
+        self._buffers: Dict[Tuple[str, Tuple[int, ...], str], List[np.ndarray]] = {}
+        self.allocations = 0
+        self.reuses = 0
+
+    def get(self, name: str, shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+        """返回一个可写的数组（内容未定义），优先复用没有其他引用的数组。"""
+        key = (name, tuple(shape), np.dtype(dtype).str)
+        buffers = self._buffers.setdefault(key, [])
+        for buffer in buffers:
+            if sys.getrefcount(buffer) <= _FREE_REFCOUNT:
+                # 发布时被设置为只读（见frame_slot），现在已无人引用
+                buffer.flags.writeable = True
+                self.reuses += 1
+                return buffer
+
+        buffer = np.empty(shape, dtype)
+        self.allocations += 1
+        if len(buffers) < self.max_buffers:
+            buffers.append(buffer)
+        return buffer
+
+    def like(self, name: str, array: np.ndarray) -> np.ndarray:
+        """与array形状和类型相同的缓冲区。"""
+        return self.get(name, array.shape, array.dtype)
+
+    def resize(self, name: str, src: np.ndarray, size: Tuple[int, int], **kwargs) -> np.ndarray:
+        """cv2.resize写入复用的数组。size为(宽, 高)。"""
+        dst = self.get(name, (size[1], size[0]) + src.shape[2:], src.dtype)
+        return cv2.resize(src, size, dst=dst, **kwargs)
+
+    def cvt_color(self, name: str, src: np.ndarray, code: int) -> np.ndarray:
+        """cv2.cvtColor写入复用的数组（只用于通道数不变的转换，例如BGR↔RGB）。"""
+        return cv2.cvtColor(src, code, dst=self.like(name, src))
+
+    def copy(self, name: str, src: np.ndarray) -> np.ndarray:
+        """src的副本，写入复用的数组。"""
+        dst = self.like(name, src)
+        np.copyto(dst, src)
+        return dst
+
+    def read(self, capture, shape: Optional[Tuple[int, ...]]):
+        """
+        VideoCapture.read()解码到复用的数组。shape为上一帧的形状（第一帧为None，由OpenCV分配）；
+        形状变化时OpenCV会自动分配新数组。
+        """
+        if shape is None:
+            return capture.read()
+        return capture.read(self.get('decode', shape))
+
+    def stats(self) -> Dict:
+        total = self.allocations + self.reuses
+        return {
+            'allocations': self.allocations,
+            'reuses': self.reuses,
+            'reuse_ratio': round(self.reuses / total, 4) if total else None,
+            'buffers': sum(len(buffers) for buffers in self._buffers.values()),
+            'mbytes': round(sum(buffer.nbytes for buffers in self._buffers.values()
+                                for buffer in buffers) / (1024 * 1024), 2),
+        }
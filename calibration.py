@@ -0,0 +1,84 @@
+"""
+计数器校准的流式统计工具。
+提供固定容量的环形缓冲区，使每帧的校准开销恒定且不分配内存；
+中位数等统计只在校准完成时对窗口精确计算一次。
+"""
+
+import numpy as np
+
+class RingBuffer:
+    """
+    固定容量的数值环形缓冲区（预分配numpy数组）。
+    追加为O(1)且不分配内存，写满后覆盖最旧的值。
+    统计方法只在需要时（例如校准完成时）对有效数据计算一次。
+    """
+
+    def __init__(self, capacity: int, dtype=np.float64):
+        if capacity <= 0:
+            raise ValueError("capacity必须为正数")
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=dtype)
+        self._next = 0
+        self._size = 0
+
+    def append(self, value) -> None:
+        """追加一个值，写满时覆盖最旧的值。"""
+        self._data[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+
+    def clear(self) -> None:
+        """清空缓冲区（保留已分配的内存）。"""
+        self._next = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def full(self) -> bool:
+        return self._size == self.capacity
+
+    @property
+    def last(self):
+        """最近追加的值，缓冲区为空时返回None。"""
+        if self._size == 0:
+            return None
+        return self._data[self._next - 1]
+
+    def _valid(self) -> np.ndarray:
+        # 有效数据的视图（无序，仅用于与顺序无关的统计）
+        return self._data[:self._size]
+
+    def values(self) -> np.ndarray:
+        """按时间顺序（从旧到新）返回有效数据的副本。"""
+        if self._size < self.capacity:
+            return self._data[:self._size].copy()
+        return np.concatenate((self._data[self._next:], self._data[:self._next]))
+
+    def mean(self) -> float:
+        return float(self._valid().mean()) if self._size else 0.0
+
+    def std(self) -> float:
+        return float(self._valid().std()) if self._size else 0.0
+
+    def min(self) -> float:
+        return float(self._valid().min()) if self._size else 0.0
+
+    def max(self) -> float:
+        return float(self._valid().max()) if self._size else 0.0
+
+    def median(self) -> float:
+        return float(np.median(self._valid())) if self._size else 0.0
+
+    def kth_smallest(self, k: int) -> float:
+        """返回第k小的值（从0开始），使用np.partition而不是完整排序。"""
+        return float(np.partition(self._valid(), k)[k])
+
+    def mean_of_largest(self, k: int) -> float:
+        """返回最大的k个值的平均值，使用np.partition而不是完整排序。"""
+        k = min(k, self._size)
+        if k == 0:
+            return 0.0
+        return float(np.partition(self._valid(), self._size - k)[self._size - k:].mean())
@@ -1,101 +1,356 @@
 """
 Multi-Counter Module
 Provides access to all counter types: Human (MediaPipe), Animal (YOLO), and Object (YOLO)
+
+Counters are registered lazily: building the registry only parses the counter
+sources into a manifest (class name, module, category and metadata). A counter
+module, and with it mediapipe or ultralytics/torch, is imported only when
+get_counter() is asked for one of its classes.
+
+Human counters described in configs/generated_counter_config.json are also
+served directly from their config entries by the data-driven ConfigCounter
+engine, so a new config row is available without generating or importing code.
 """
 
 import os
+import ast
+import json
+import sys
+import hashlib
 import importlib
+import importlib.util
 import inspect
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+
+# Counter sub-packages and the category they belong to
+_CATEGORY_DIRS = {
+    'human': 'Human',    # MediaPipe
+    'animal': 'Animal',  # YOLO
+    'object': 'Object',  # YOLO
+}
+
+# Constructor attributes copied into the manifest metadata
+_METADATA_FIELDS = (
+    'detection_type', 'object_class', 'logic_type', 'direction', 'description',
+    'threshold', 'confidence_threshold', 'stable_frames', 'calibration_frames',
+    'min_visibility', 'validation_threshold', 'enable_anti_cheat',
+)
 
-# Global registry for all counter classes
+# Shared counter bases (counters/yolo_base.py) that provide adjust_center_line()
+_CENTER_LINE_BASES = ('JumpTargetCounterBase',)
+
+# Manifest of all known counter classes: class name -> entry
+_manifest = {}
+
+# Global registry for all counter classes that have been imported
 _counter_registry = {}
 
-def _load_counter_module(module_path: str, category: str):
-    """Load a single counter module and register its classes."""
+# Source state of every scanned counter module: module name -> path, mtime, size, hash
+_module_state = {}
+
+# Human counter configs interpreted at runtime (take precedence over generated modules)
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'configs', 'generated_counter_config.json')
+_config_manifest = {}
+_config_classes = {}
+_config_state = {'mtime': None, 'size': None}
+
+def _extract_metadata(class_node: ast.ClassDef) -> Dict[str, Any]:
+    """Collect literal `self.<field> = <value>` assignments and capabilities from a class body."""
+    metadata = {}
+    methods = set()
+    assigned = set()
+
+    for node in class_node.body:
+        if isinstance(node, ast.FunctionDef):
+            methods.add(node.name)
+
+    for node in ast.walk(class_node):
+        if not isinstance(node, ast.Assign):
+            continue
+        for target in node.targets:
+            if (isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name)
+                    and target.value.id == 'self'):
+                assigned.add(target.attr)
+                if target.attr in _METADATA_FIELDS and target.attr not in metadata:
+                    try:
+                        metadata[target.attr] = ast.literal_eval(node.value)
+                    except ValueError:
+                        pass
+
+    bases = {base.id for base in class_node.bases if isinstance(base, ast.Name)}
+
+    metadata.setdefault('detection_type', 'mediapipe')
+    metadata['has_center_line'] = ('adjust_center_line' in methods or
+                                   any(base in bases for base in _CENTER_LINE_BASES) or
+                                   'start_position' in assigned or
+                                   'center_reference' in assigned)
+    return metadata
+
+def _scan_counter_file(path: str, module_name: str, category: str) -> List[Dict[str, Any]]:
+    """Parse a counter source file (without importing it) into manifest entries."""
+    with open(path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    entries = []
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name.endswith('Counter'):
+            entries.append({
+                'class_name': node.name,
+                'module': module_name,
+                'category': category,
+                'path': path,
+                'source': 'module',
+                'metadata': _extract_metadata(node),
+            })
+    return entries
+
+def _file_hash(path: str) -> str:
+    """Return the SHA-256 of a counter source file."""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def _iter_counter_files():
+    """Yield (module name, path, category) for every counter source file."""
+    package_dir = os.path.dirname(__file__)
+    for subdir, category in _CATEGORY_DIRS.items():
+        category_dir = os.path.join(package_dir, subdir)
+        if not os.path.exists(category_dir):
+            continue
+        for file in sorted(os.listdir(category_dir)):
+            if file.endswith('_counter.py'):
+                yield f"counters.{subdir}.{file[:-3]}", os.path.join(category_dir, file), category
+
+def _register_module(module_name: str, path: str, category: str) -> List[str]:
+    """Scan a counter file into the manifest and record its source state."""
+    stat = os.stat(path)
+    _module_state[module_name] = {
+        'path': path,
+        'mtime': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'hash': _file_hash(path),
+    }
+    try:
+        entries = _scan_counter_file(path, module_name, category)
+    except (OSError, SyntaxError) as e:
+        print(f"✗ Failed to scan {module_name}: {e}")
+        return []
+    for entry in entries:
+        _manifest[entry['class_name']] = entry
+    return [entry['class_name'] for entry in entries]
+
+def _unregister_module(module_name: str) -> List[str]:
+    """Drop a module's manifest entries, loaded classes and import cache entry.
+
+    Counter instances that are already running keep their class objects; only
+    new lookups through get_counter() see the change.
+    """
+    class_names = [name for name, entry in _manifest.items() if entry['module'] == module_name]
+    for name in class_names:
+        del _manifest[name]
+        _counter_registry.pop(name, None)
+    # Classes registered from this module under names missing from the manifest
+    for name, cls in list(_counter_registry.items()):
+        if getattr(cls, '__module__', None) == module_name:
+            del _counter_registry[name]
+
+    state = _module_state.pop(module_name, None)
+    sys.modules.pop(module_name, None)
+    if state:
+        # Byte-code is validated by mtime in whole seconds; make sure a rewrite
+        # within the same second is never served from a stale .pyc
+        try:
+            os.remove(importlib.util.cache_from_source(state['path']))
+        except OSError:
+            pass
+    return class_names
+
+def _discover_counters():
+    """Build the counter manifest from the counter sources."""
+    _manifest.clear()
+    _counter_registry.clear()
+    _module_state.clear()
+    _config_manifest.clear()
+    _config_classes.clear()
+    _config_state['mtime'] = _config_state['size'] = None
+
+    for module_name, path, category in _iter_counter_files():
+        try:
+            _register_module(module_name, path, category)
+        except OSError as e:
+            print(f"✗ Failed to scan {module_name}: {e}")
+
+    _refresh_config_counters()
+    print(f"Counter manifest built. Total counters: {len(set(_manifest) | set(_config_manifest))}")
+
+def _load_counter_class(counter_name: str):
+    """Import the module of a manifest entry and register its counter classes."""
+    entry = _manifest[counter_name]
+    module_name = entry['module']
     try:
-        # Convert file path to module name
-        module_name = module_path.replace('.py', '').replace('/', '.').replace('\\', '.')
-        if module_name.startswith('.'):
-            module_name = module_name[1:]
-        
         print(f"Importing {module_name}...")
-        
-        # Import the module
         module = importlib.import_module(module_name)
-        
-        # Find counter classes in the module
+
+        # Register every counter class defined in the module
         for name, obj in inspect.getmembers(module, inspect.isclass):
             if name.endswith('Counter') and obj.__module__ == module_name:
                 _counter_registry[name] = obj
-                print(f"✓ Successfully loaded {name} ({category})")
-                
+                print(f"✓ Successfully loaded {name} ({entry['category']})")
     except Exception as e:
-        print(f"✗ Failed to load {module_path}: {e}")
+        print(f"✗ Failed to load {module_name}: {e}")
 
-def _discover_counters():
-    """Discover and load all counter modules."""
-    print("Loading counter modules...")
-    _counter_registry.clear()
-    
-    # Load human counters (MediaPipe)
-    human_dir = os.path.join(os.path.dirname(__file__), 'human')
-    if os.path.exists(human_dir):
-        for file in os.listdir(human_dir):
-            if file.endswith('_counter.py'):
-                module_path = f"counters.human.{file}"
-                _load_counter_module(module_path, "Human")
-    
-    # Load animal counters (YOLO)
-    animal_dir = os.path.join(os.path.dirname(__file__), 'animal')
-    if os.path.exists(animal_dir):
-        for file in os.listdir(animal_dir):
-            if file.endswith('_counter.py'):
-                module_path = f"counters.animal.{file}"
-                _load_counter_module(module_path, "Animal")
-    
-    # Load object counters (YOLO)
-    object_dir = os.path.join(os.path.dirname(__file__), 'object')
-    if os.path.exists(object_dir):
-        for file in os.listdir(object_dir):
-            if file.endswith('_counter.py'):
-                module_path = f"counters.object.{file}"
-                _load_counter_module(module_path, "Object")
-    
-    print(f"Counter loading complete. Total counters loaded: {len(_counter_registry)}")
-    print(f"Available counters: {list(_counter_registry.keys())}")
+    return _counter_registry.get(counter_name)
+
+def _refresh_config_counters() -> Dict[str, List[str]]:
+    """Sync the config-driven counters with the config file if it changed on disk."""
+    changes = {'added': [], 'changed': [], 'removed': []}
+    try:
+        stat = os.stat(CONFIG_PATH)
+        file_state = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        file_state = (None, None)
+
+    if file_state == (_config_state['mtime'], _config_state['size']):
+        return changes
+    _config_state['mtime'], _config_state['size'] = file_state
+
+    configs = []
+    if file_state[0] is not None:
+        try:
+            with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+                configs = json.load(f) or []
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"✗ Failed to read {CONFIG_PATH}: {e}")
+            return changes
+
+    from counters.config_counter import config_metadata
+
+    rows = {cfg['name']: cfg for cfg in configs if isinstance(cfg, dict) and cfg.get('name')}
+    for name in list(_config_manifest.keys()):
+        if name not in rows:
+            del _config_manifest[name]
+            _config_classes.pop(name, None)
+            changes['removed'].append(name)
+
+    for name, cfg in rows.items():
+        previous = _config_manifest.get(name)
+        if previous is not None and previous['config'] == cfg:
+            continue
+        _config_manifest[name] = {
+            'class_name': name,
+            'module': None,
+            'category': 'Human',
+            'path': None,
+            'source': 'config',
+            'config': cfg,
+            'metadata': config_metadata(cfg),
+        }
+        _config_classes.pop(name, None)
+        changes['changed' if previous is not None else 'added'].append(name)
+
+    return changes
+
+def _merged_manifest() -> Dict[str, Dict[str, Any]]:
+    """Module-backed entries overlaid with config-driven entries."""
+    if not _manifest and not _module_state:
+        _discover_counters()
+    _refresh_config_counters()
+    merged = dict(_manifest)
+    merged.update(_config_manifest)
+    return merged
 
 def list_counters() -> List[str]:
     """Return a list of all available counter names."""
-    if not _counter_registry:
-        _discover_counters()
-    return list(_counter_registry.keys())
+    return list(_merged_manifest().keys())
 
 def get_counter(counter_name: str):
-    """Get a counter class by name."""
-    if not _counter_registry:
+    """Get a counter class by name, importing its module on first use."""
+    entry = _merged_manifest().get(counter_name)
+    if entry is None:
+        return None
+
+    if entry.get('source') == 'config':
+        if counter_name not in _config_classes:
+            from counters.config_counter import make_counter_class
+            _config_classes[counter_name] = make_counter_class(entry['config'])
+        return _config_classes[counter_name]
+
+    if counter_name in _counter_registry:
+        return _counter_registry[counter_name]
+    return _load_counter_class(counter_name)
+
+def get_counter_metadata(counter_name: str) -> Optional[Dict[str, Any]]:
+    """Get the manifest entry (module, category, metadata) of a counter without importing it."""
+    if not _manifest and not _module_state:
         _discover_counters()
-    return _counter_registry.get(counter_name)
+    _refresh_config_counters()
+    return _config_manifest.get(counter_name) or _manifest.get(counter_name)
+
+def get_manifest() -> Dict[str, Dict[str, Any]]:
+    """Return the full counter manifest keyed by class name."""
+    return _merged_manifest()
+
+def reload_counters() -> Dict[str, List[str]]:
+    """
+    Incrementally reload counter modules (useful after generating new counters).
 
-def reload_counters():
-    """Reload all counter modules (useful after generating new counters)."""
+    Only modules whose source changed (by mtime/size, confirmed by content hash),
+    were added or were removed are rescanned; their classes are re-imported on
+    the next get_counter() call. Everything else stays loaded.
+
+    Returns:
+        dict: Class names that were 'added', 'changed' and 'removed'
+    """
     print("Reloading counter modules...")
-    
-    # Clear import cache for counter modules
-    modules_to_remove = []
-    for module_name in list(importlib.sys.modules.keys()):
-        if module_name.startswith('counters.'):
-            modules_to_remove.append(module_name)
-    
-    for module_name in modules_to_remove:
-        del importlib.sys.modules[module_name]
-    
-    # Rediscover all counters
-    _discover_counters()
-    print("Counter reload complete.")
-
-# Auto-load counters when module is imported
+    if not _manifest and not _module_state:
+        _discover_counters()
+        return {'added': list(_merged_manifest().keys()), 'changed': [], 'removed': []}
+
+    changes = {'added': [], 'changed': [], 'removed': []}
+    seen = set()
+
+    for module_name, path, category in _iter_counter_files():
+        seen.add(module_name)
+        try:
+            state = _module_state.get(module_name)
+            if state is None:
+                changes['added'].extend(_register_module(module_name, path, category))
+                continue
+
+            stat = os.stat(path)
+            if stat.st_mtime_ns == state['mtime'] and stat.st_size == state['size']:
+                continue
+
+            new_hash = _file_hash(path)
+            if new_hash == state['hash']:
+                # Touched but identical: keep the loaded module
+                state['mtime'] = stat.st_mtime_ns
+                state['size'] = stat.st_size
+                continue
+
+            old_names = set(_unregister_module(module_name))
+            new_names = set(_register_module(module_name, path, category))
+            changes['changed'].extend(sorted(old_names & new_names))
+            changes['added'].extend(sorted(new_names - old_names))
+            changes['removed'].extend(sorted(old_names - new_names))
+        except OSError as e:
+            print(f"✗ Failed to rescan {module_name}: {e}")
+
+    for module_name in list(_module_state.keys()):
+        if module_name not in seen:
+            changes['removed'].extend(_unregister_module(module_name))
+
+    config_changes = _refresh_config_counters()
+    for key in changes:
+        changes[key].extend(config_changes[key])
+
+    importlib.invalidate_caches()
+    print(f"Counter reload complete. Added: {changes['added']}, "
+          f"changed: {changes['changed']}, removed: {changes['removed']}")
+    return changes
+
+# Build the manifest when module is imported (no counter modules are imported)
 _discover_counters()
 
 # Export main functions
-__all__ = ['list_counters', 'get_counter', 'reload_counters'] 
\ No newline at end of file
+__all__ = ['list_counters', 'get_counter', 'get_counter_metadata', 'get_manifest', 'reload_counters']
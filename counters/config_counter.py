@@ -0,0 +1,272 @@
+"""
+Data-driven human action counter.
+Runs the same calibration, anti-cheat validation and state machine as the
+counters rendered from counter_template.py.j2, but takes its constants from a
+generated_counter_config.json entry at runtime instead of from generated code.
+"""
+
+from calibration import RingBuffer
+from counters.landmarks import landmark_index
+from peak_detection import PeakRepDetector
+
+# Defaults applied by add_action.generate_all_counters() when rendering the template
+CONFIG_DEFAULTS = {
+    'logic_type': 'vertical_movement',
+    'direction': 'up-first',
+    'threshold': 0.1,
+    'min_conf': 0.7,
+    'stable_frames': 3,
+    'landmark_name': 'NOSE',
+    'aux_landmark_name': None,
+    'enable_anti_cheat': False,
+    'validation_landmarks': [],
+    'validation_threshold': 0.03,
+}
+
+def _is_landmark_name(value) -> bool:
+    return isinstance(value, str) and value not in ('None', 'null', '')
+
+class ConfigCounter:
+    """
+    A counter for a human action described by a config entry.
+    Behaves exactly like a counter generated from the standardized template.
+    """
+    # Config entry for classes created by make_counter_class()
+    config = None
+
+    def __init__(self, config=None):
+        cfg = dict(CONFIG_DEFAULTS)
+        cfg.update(config if config is not None else (self.config or {}))
+
+        self.count = 0
+        self.state = 'calibrating'  # Possible states: calibrating, start, down, up
+        self.start_val = None
+        self.calibration_frames = 0
+        self.calibration_window = 30  # Frames used to calibrate the start position
+        self.calibration_samples = RingBuffer(self.calibration_window)  # Preallocated samples of the primary landmark
+        self.stable_counter = 0
+        self.debug_info = {}
+        self.validation_score = 1.0 # Start with a positive validation
+
+        # --- Parameters from config ---
+        self.logic_type = cfg['logic_type']
+        self.direction = cfg['direction']
+        self.landmark = landmark_index(cfg['landmark_name'] or 'NOSE')
+        aux_landmark_name = cfg['aux_landmark_name']
+        self.aux_landmark = landmark_index(aux_landmark_name) if _is_landmark_name(aux_landmark_name) else None
+        self.min_visibility = cfg['min_conf']
+        self.threshold = cfg['threshold']
+        self.stable_frames = cfg['stable_frames']
+
+        # --- Anti-cheat validation landmarks (optional) ---
+        if cfg['validation_landmarks']:
+            self.validation_landmarks = [landmark_index(name) for name in cfg['validation_landmarks']]
+            self.enable_anti_cheat = bool(cfg['enable_anti_cheat'])
+            self.validation_threshold = cfg['validation_threshold']
+        else:
+            self.validation_landmarks = []
+            self.enable_anti_cheat = False
+            self.validation_threshold = 0.03
+
+        # Store calibration values for validation landmarks
+        self.validation_start_vals = {}
+
+        # --- Peak detection engine (adaptive baseline, no calibration phase) ---
+        self.peak_detector = None
+        if self.logic_type == 'peak_detection':
+            self.peak_detector = PeakRepDetector(self.threshold, self.direction)
+            self.state = 'start'
+
+    def calibrate(self, current_val, landmarks=None):
+        """Calibrates the starting position over a number of frames."""
+        if self.calibration_frames < self.calibration_window:
+            self.calibration_samples.append(current_val)
+
+            # Also calibrate validation landmarks if anti-cheat is enabled
+            if self.enable_anti_cheat and landmarks:
+                for val_landmark in self.validation_landmarks:
+                    if val_landmark not in self.validation_start_vals:
+                        self.validation_start_vals[val_landmark] = RingBuffer(self.calibration_window)
+
+                    val_keypoint = landmarks.landmark[val_landmark]
+                    if val_keypoint.visibility > self.min_visibility:
+                        self.validation_start_vals[val_landmark].append(val_keypoint.y)
+
+            self.calibration_frames += 1
+            return False
+
+        # Exact median of the window (robust to frames where the user is still settling)
+        self.start_val = self.calibration_samples.median()
+
+        # Finalize validation landmark calibration
+        if self.enable_anti_cheat:
+            for val_landmark in self.validation_landmarks:
+                if val_landmark in self.validation_start_vals and len(self.validation_start_vals[val_landmark]):
+                    self.validation_start_vals[val_landmark] = self.validation_start_vals[val_landmark].median()
+                else:
+                    self.validation_start_vals[val_landmark] = None
+
+        self.state = 'start'  # Set initial state after calibration
+        self.calibration_samples.clear()
+        print(f"[{self.__class__.__name__}] Calibration complete. Start value: {self.start_val:.3f}")
+        return True
+
+    def calculate_validation_score(self, landmarks, movement_from_start):
+        """
+        Calculates a validation score based on whether validation landmarks
+        are moving in coordination with the primary landmark.
+        Returns a score between 0.0 (poor form/cheating) and 1.0 (good form).
+        """
+        if not self.enable_anti_cheat or not self.validation_landmarks:
+            return 1.0
+
+        valid_movements = 0
+        total_landmarks = 0
+
+        for val_landmark in self.validation_landmarks:
+            if (val_landmark in self.validation_start_vals and
+                self.validation_start_vals[val_landmark] is not None):
+
+                val_keypoint = landmarks.landmark[val_landmark]
+                if val_keypoint.visibility > self.min_visibility:
+                    val_movement = val_keypoint.y - self.validation_start_vals[val_landmark]
+
+                    if abs(movement_from_start) > self.threshold:
+                        # Primary landmark is moving significantly: validation landmark
+                        # must also move, and in the same direction
+                        if abs(val_movement) > self.validation_threshold:
+                            if (movement_from_start > 0 and val_movement > 0) or \
+                               (movement_from_start < 0 and val_movement < 0):
+                                valid_movements += 1
+                    else:
+                        # Primary landmark is near start, validation should be too
+                        if abs(val_movement) < self.validation_threshold * 2:
+                            valid_movements += 1
+
+                    total_landmarks += 1
+
+        if total_landmarks == 0:
+            return 1.0  # No validation landmarks available
+
+        return valid_movements / total_landmarks
+
+    def update(self, landmarks):
+        """Updates the counter based on the new landmarks."""
+        keypoint = landmarks.landmark[self.landmark]
+        if keypoint.visibility < self.min_visibility:
+            return self.count
+
+        current_val = keypoint.y
+        if self.peak_detector is not None:
+            return self.update_peak(current_val)
+
+        # --- Calibration Phase ---
+        if self.state == 'calibrating':
+            self.calibrate(current_val, landmarks)
+            return self.count
+
+        movement_from_start = current_val - self.start_val
+
+        # --- Calculate validation score (anti-cheat) ---
+        self.validation_score = self.calculate_validation_score(landmarks, movement_from_start)
+
+        # --- State Conditions ---
+        is_down = movement_from_start > self.threshold
+        is_up = -movement_from_start > self.threshold
+        is_at_start = abs(movement_from_start) < (self.threshold * 0.5)
+
+        # Apply anti-cheat validation - only count reps if validation score is good
+        min_validation_score = 0.4  # Require at least 40% of validation landmarks to move properly
+        is_valid_form = self.validation_score >= min_validation_score
+
+        # Update debug info for the visualizer
+        self.debug_info = {
+            'movement_from_start': movement_from_start,
+            'is_down': is_down,
+            'is_up': is_up,
+            'is_at_start': is_at_start,
+            'stable_counter': self.stable_counter,
+            'state': self.state,
+            'validation_score': self.validation_score,
+            'is_valid_form': is_valid_form,
+            'anti_cheat_enabled': self.enable_anti_cheat
+        }
+
+        # --- State Machine (with validation) ---
+        if self.direction == 'down-first':
+            first_state, is_first = 'down', is_down
+        elif self.direction == 'up-first':
+            first_state, is_first = 'up', is_up
+        else:
+            return self.count
+
+        if self.state == 'start' and is_first and is_valid_form:
+            self.state = first_state
+            print(f"[{self.__class__.__name__}] State: {first_state} (validation: {self.validation_score:.2f})")
+        elif self.state == first_state and is_at_start and is_valid_form:
+            self.count += 1
+            self.state = 'start'
+            print(f"[{self.__class__.__name__}] Rep Complete! Count: {self.count} (validation: {self.validation_score:.2f})")
+        elif (self.state == 'start' and is_first and not is_valid_form) or \
+             (self.state == first_state and is_at_start and not is_valid_form):
+            print(f"[{self.__class__.__name__}] Poor form detected! Validation: {self.validation_score:.2f}")
+
+        return self.count
+
+    def update_peak(self, current_val):
+        """
+        Peak detection logic: a rep is counted as soon as the filtered signal
+        falls back after a peak beyond the threshold, with no stable_frames delay.
+        Anti-cheat validation needs a calibrated start position and is not applied here.
+        """
+        detector = self.peak_detector
+        detector.threshold = self.threshold  # Keep runtime parameter changes in effect
+        completed = detector.update(current_val)
+
+        first_state = 'up' if self.direction == 'up-first' else 'down'
+        self.start_val = detector.baseline
+        self.state = first_state if detector.armed else 'start'
+        self.debug_info = {
+            'movement_from_start': current_val - detector.baseline,
+            'deviation': detector.deviation,
+            'is_down': first_state == 'down' and detector.armed,
+            'is_up': first_state == 'up' and detector.armed,
+            'is_at_start': not detector.armed,
+            'state': self.state,
+            'validation_score': self.validation_score,
+            'is_valid_form': True,
+            'anti_cheat_enabled': False
+        }
+
+        if completed:
+            self.count += 1
+            print(f"[{self.__class__.__name__}] Rep Complete! Count: {self.count} (peak: {detector.deviation:.3f})")
+        return self.count
+
+def make_counter_class(config):
+    """
+    Create a counter class for a config entry.
+    The class takes no constructor arguments, like the generated counter classes.
+    """
+    class_name = config.get('name') or config.get('class_name') or 'ConfigCounter'
+    return type(class_name, (ConfigCounter,), {
+        'config': dict(config),
+        '__module__': __name__,
+        '__doc__': f"A counter for the '{class_name}' action, interpreted from its config entry.",
+    })
+
+def config_metadata(config):
+    """Return manifest metadata for a config entry, mirroring the generated counter attributes."""
+    cfg = dict(CONFIG_DEFAULTS)
+    cfg.update(config)
+    return {
+        'detection_type': 'mediapipe',
+        'logic_type': cfg['logic_type'],
+        'direction': cfg['direction'],
+        'threshold': cfg['threshold'],
+        'min_visibility': cfg['min_conf'],
+        'stable_frames': cfg['stable_frames'],
+        'enable_anti_cheat': bool(cfg['enable_anti_cheat']) if cfg['validation_landmarks'] else False,
+        'validation_threshold': cfg['validation_threshold'] if cfg['validation_landmarks'] else 0.03,
+        'has_center_line': False,
+    }
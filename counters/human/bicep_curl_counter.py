@@ -1,5 +1,5 @@
 import mediapipe as mp
-import numpy as np
+from calibration import RingBuffer
 
 class BicepCurlCounter:
     """
@@ -12,7 +12,8 @@ class BicepCurlCounter:
         self.state = 'calibrating'  # Possible states: calibrating, start, down, up
         self.start_val = None
         self.calibration_frames = 0
-        self.calibration_samples = []
+        self.calibration_window = 30  # Frames used to calibrate the start position
+        self.calibration_samples = RingBuffer(self.calibration_window)  # Preallocated samples of the primary landmark
         self.stable_counter = 0
         self.debug_info = {}
         self.validation_score = 1.0 # Start with a positive validation
@@ -39,14 +40,14 @@ class BicepCurlCounter:
 
     def calibrate(self, current_val, landmarks=None):
         """Calibrates the starting position over a number of frames."""
-        if self.calibration_frames < 30:
+        if self.calibration_frames < self.calibration_window:
             self.calibration_samples.append(current_val)
             
             # Also calibrate validation landmarks if anti-cheat is enabled
             if self.enable_anti_cheat and landmarks:
                 for val_landmark in self.validation_landmarks:
                     if val_landmark not in self.validation_start_vals:
-                        self.validation_start_vals[val_landmark] = []
+                        self.validation_start_vals[val_landmark] = RingBuffer(self.calibration_window)
                     
                     val_keypoint = landmarks.landmark[val_landmark]
                     if val_keypoint.visibility > self.min_visibility:
@@ -55,18 +56,19 @@ class BicepCurlCounter:
             self.calibration_frames += 1
             return False
         
-        self.start_val = np.median(self.calibration_samples)
+        # Exact median of the window (robust to frames where the user is still settling)
+        self.start_val = self.calibration_samples.median()
         
         # Finalize validation landmark calibration
         if self.enable_anti_cheat:
             for val_landmark in self.validation_landmarks:
-                if val_landmark in self.validation_start_vals and self.validation_start_vals[val_landmark]:
-                    self.validation_start_vals[val_landmark] = np.median(self.validation_start_vals[val_landmark])
+                if val_landmark in self.validation_start_vals and len(self.validation_start_vals[val_landmark]):
+                    self.validation_start_vals[val_landmark] = self.validation_start_vals[val_landmark].median()
                 else:
                     self.validation_start_vals[val_landmark] = None
         
         self.state = 'start'  # Set initial state after calibration
-        self.calibration_samples = []
+        self.calibration_samples.clear()
         print(f"[{self.__class__.__name__}] Calibration complete. Start value: {self.start_val:.3f}")
         return True
 
@@ -0,0 +1,34 @@
+"""
+MediaPipe Pose landmark names in index order.
+Lets data-driven counters resolve landmark names without importing mediapipe.
+"""
+
+POSE_LANDMARK_NAMES = [
+    'NOSE',
+    'LEFT_EYE_INNER', 'LEFT_EYE', 'LEFT_EYE_OUTER',
+    'RIGHT_EYE_INNER', 'RIGHT_EYE', 'RIGHT_EYE_OUTER',
+    'LEFT_EAR', 'RIGHT_EAR',
+    'MOUTH_LEFT', 'MOUTH_RIGHT',
+    'LEFT_SHOULDER', 'RIGHT_SHOULDER',
+    'LEFT_ELBOW', 'RIGHT_ELBOW',
+    'LEFT_WRIST', 'RIGHT_WRIST',
+    'LEFT_PINKY', 'RIGHT_PINKY',
+    'LEFT_INDEX', 'RIGHT_INDEX',
+    'LEFT_THUMB', 'RIGHT_THUMB',
+    'LEFT_HIP', 'RIGHT_HIP',
+    'LEFT_KNEE', 'RIGHT_KNEE',
+    'LEFT_ANKLE', 'RIGHT_ANKLE',
+    'LEFT_HEEL', 'RIGHT_HEEL',
+    'LEFT_FOOT_INDEX', 'RIGHT_FOOT_INDEX',
+]
+
+NUM_POSE_LANDMARKS = len(POSE_LANDMARK_NAMES)
+
+_LANDMARK_INDEX = {name: index for index, name in enumerate(POSE_LANDMARK_NAMES)}
+
+def landmark_index(name: str) -> int:
+    """Return the MediaPipe PoseLandmark index for a landmark name (e.g. 'RIGHT_HIP')."""
+    try:
+        return _LANDMARK_INDEX[name.upper()]
+    except KeyError:
+        raise ValueError(f"Unknown pose landmark: {name}")
@@ -0,0 +1,808 @@
+"""
+Shared engine for YOLO-based counters.
+
+YOLOCounterBase runs the detection loop, calibration, state machines and debug
+overlay. Concrete counters assign their configuration in __init__ before
+calling super().__init__() and override strategy hooks:
+
+    _calibrate()              derive start position and thresholds once the
+                              calibration buffer is full
+    _detect_<pattern>()       per-frame state machine, selected by logic_type
+    _reference_line(), line_labels, _status_lines()
+                              debug overlay
+
+Instance state lives in __slots__ and position/height history in preallocated
+ring buffers, so a session carries no per-instance dict and a frame update does
+not grow any containers. debug_info is built on access instead of every frame.
+"""
+
+import cv2
+from yolo_tracker import YOLOTracker
+from calibration import RingBuffer
+
+class YOLOCounterBase:
+    """Base class for counters that track a single YOLO object's vertical movement."""
+
+    __slots__ = (
+        # Configuration
+        'object_class', 'detection_type', 'logic_type', 'threshold',
+        'confidence_threshold', 'stable_frames', 'calibration_frames',
+        # Counter state
+        'count', 'state', 'stable_count', 'calibrated',
+        # Landmark tracking (using bounding box as landmarks)
+        'start_position', 'current_position', 'up_threshold', 'down_threshold',
+        'position_history', 'body_heights',
+        # Adaptive threshold calculation and manual adjustment
+        'position_variance', 'movement_range', 'adaptive_multiplier', 'sensitivity_multiplier',
+        # Frame scaling tracking
+        'original_frame_size', 'display_scale', 'video_height',
+        # Latest detection (debug_info is derived from these)
+        '_detected', '_confidence', '_position_x', '_position_y',
+        # Video time (seconds) of the latest frame and the latest count
+        'last_timestamp', 'last_count_time',
+        # Optional bounding box smoothing filter (see smoothing.create_filter)
+        'smoother',
+        'tracker',
+    )
+
+    # Logic type -> state machine method
+    DETECTORS = {
+        'bounce_detection': '_detect_bounce',
+        'jump_detection': '_detect_jump',
+        'movement_detection': '_detect_movement',
+    }
+    DEFAULT_DETECTOR = '_detect_vertical_movement'
+
+    # Number of recent bounding box heights kept for body-size based thresholds
+    BODY_HEIGHT_WINDOW = 50
+
+    # Debug overlay labels for the reference, up and down lines
+    line_labels = ("START", "UP", "DOWN")
+    count_icon = "🎯"
+
+    def __init__(self):
+        self.calibration_frames = 30  # Reduced for faster calibration
+
+        # Counter state
+        self.count = 0
+        self.state = "start"
+        self.stable_count = 0
+        self.calibrated = False
+
+        self.start_position = None
+        self.current_position = None
+        self.up_threshold = None
+        self.down_threshold = None
+
+        # Fixed-size, allocation-free history for calibration and body size
+        self.position_history = RingBuffer(self.calibration_frames)
+        self.body_heights = RingBuffer(self.BODY_HEIGHT_WINDOW)
+
+        self.position_variance = 0
+        self.movement_range = 0
+        self.adaptive_multiplier = 1.0
+        self.sensitivity_multiplier = 1.0
+
+        self.original_frame_size = None
+        self.display_scale = 1.0
+        self.video_height = None
+
+        self._detected = False
+        self._confidence = 0.0
+        self._position_x = 0
+        self._position_y = 0
+
+        self.last_timestamp = None
+        self.last_count_time = None
+        self.smoother = None
+
+        # YOLO tracker
+        self.tracker = YOLOTracker(
+            object_class=self.object_class,
+            confidence_threshold=self.confidence_threshold
+        )
+
+    @property
+    def debug_info(self):
+        """Debug values for the visualizer and web interface, built on access."""
+        position_y = self._position_y
+        return {
+            'detected': self._detected,
+            'confidence': self._confidence,
+            'state': self.state,
+            'position_x': self._position_x,
+            'position_y': position_y,
+            'start_y': self.start_position or 0,
+            'up_threshold': self.up_threshold or 0,
+            'down_threshold': self.down_threshold or 0,
+            'is_up': self.up_threshold is not None and position_y < self.up_threshold,
+            'is_down': self.down_threshold is not None and position_y > self.down_threshold,
+            'is_at_start': abs(position_y - self.start_position) < (self.threshold * 0.3) if self.start_position else False,
+            'movement_range': self.movement_range,
+            'adaptive_multiplier': self.adaptive_multiplier
+        }
+
+    def update(self, frame, timestamp=None):
+        """
+        Update counter with new frame using landmark-based detection.
+
+        Args:
+            frame: OpenCV frame (numpy array)
+            timestamp: Optional video time of the frame in seconds (see frame_clock)
+
+        Returns:
+            int: Current count
+        """
+        return self.update_detection(self.detect(frame), timestamp)
+
+    def detect(self, frame):
+        """
+        Run YOLO on a frame and return the best detection (or None).
+        Split from update() so callers can time inference separately and
+        reuse the detection for drawing instead of running the model twice.
+        """
+        # Store original frame size for proper scaling
+        if self.original_frame_size is None:
+            self.original_frame_size = (frame.shape[1], frame.shape[0])  # width, height
+            self.video_height = frame.shape[0]  # Store for threshold calculations
+
+        detections = self.tracker.detect_objects(frame)
+        return self.tracker.get_best_detection(detections)
+
+    def update_detection(self, best_detection, timestamp=None):
+        """
+        Update counter state from a detection returned by detect().
+
+        Args:
+            best_detection: Detection dict with 'bbox' and 'confidence', or None
+            timestamp: Optional video time of the frame in seconds (see frame_clock)
+
+        Returns:
+            int: Current count
+        """
+        self.last_timestamp = timestamp
+
+        if not best_detection:
+            self._detected = False
+            self._confidence = 0.0
+            return self.count
+
+        self._detected = True
+        self._confidence = best_detection['confidence']
+        if timestamp is not None:
+            self.tracker.last_detection_time = timestamp
+
+        # Get position from bounding box center (in original coordinates)
+        x1, y1, x2, y2 = best_detection['bbox']
+        if self.smoother is not None:
+            x1, y1, x2, y2 = self.smoother.filter((x1, y1, x2, y2), timestamp).tolist()
+        center_x = (x1 + x2) / 2
+        center_y = (y1 + y2) / 2
+        self.current_position = (center_x, center_y)
+        self._position_x = center_x
+        self._position_y = center_y
+        self.body_heights.append(y2 - y1)
+
+        # Calibration phase
+        if not self.calibrated:
+            if self.position_history.capacity < self.calibration_frames:
+                # calibration_frames was raised at runtime: restart with a larger buffer
+                self.position_history = RingBuffer(self.calibration_frames)
+            self.position_history.append(center_y)
+            if len(self.position_history) >= self.calibration_frames:
+                self._calibrate()
+                self.calibrated = True
+            return self.count
+
+        # Update position tracking (ring buffer keeps the most recent positions)
+        self.position_history.append(center_y)
+
+        # Apply detection logic
+        getattr(self, self.DETECTORS.get(self.logic_type, self.DEFAULT_DETECTOR))(center_y)
+        return self.count
+
+    def _calibrate(self):
+        """Enhanced calibration with adaptive threshold calculation."""
+        # Calculate start position as median for stability
+        self.start_position = self.position_history.kth_smallest(len(self.position_history) // 2)
+
+        # Calculate movement variance and range for adaptive thresholds
+        self.position_variance = self.position_history.std()
+        self.movement_range = self.position_history.max() - self.position_history.min()
+
+        # Adaptive multiplier based on object characteristics
+        if self.logic_type == "bounce_detection":
+            # Bouncing objects need larger thresholds
+            base_multiplier = 1.2
+            variance_factor = max(1.0, self.position_variance / 10)
+        elif self.logic_type == "jump_detection":
+            # Animals jumping - asymmetric thresholds
+            base_multiplier = 1.0
+            variance_factor = max(0.8, self.position_variance / 15)
+        else:
+            # General movement - moderate thresholds
+            base_multiplier = 0.8
+            variance_factor = max(0.6, self.position_variance / 20)
+
+        self.adaptive_multiplier = base_multiplier * variance_factor
+
+        # Calculate adaptive thresholds
+        if self.logic_type == "bounce_detection":
+            # Symmetric thresholds for bouncing
+            threshold_adjusted = max(self.threshold, self.movement_range * 0.3) * self.adaptive_multiplier
+            self.up_threshold = self.start_position - threshold_adjusted
+            self.down_threshold = self.start_position + threshold_adjusted
+        elif self.logic_type == "jump_detection":
+            # Asymmetric thresholds - up movement is primary
+            up_threshold_adjusted = max(self.threshold * 0.8, self.movement_range * 0.4) * self.adaptive_multiplier
+            down_threshold_adjusted = max(self.threshold * 0.3, self.movement_range * 0.2) * self.adaptive_multiplier
+            self.up_threshold = self.start_position - up_threshold_adjusted
+            self.down_threshold = self.start_position + down_threshold_adjusted
+        else:
+            # Balanced thresholds for general movement
+            threshold_adjusted = max(self.threshold * 0.6, self.movement_range * 0.25) * self.adaptive_multiplier
+            self.up_threshold = self.start_position - threshold_adjusted
+            self.down_threshold = self.start_position + threshold_adjusted
+
+        print(f"🎯 {self.__class__.__name__} adaptively calibrated:")
+        print(f"   Start position: {self.start_position:.1f}")
+        print(f"   Movement range: {self.movement_range:.1f}")
+        print(f"   Position variance: {self.position_variance:.1f}")
+        print(f"   Adaptive multiplier: {self.adaptive_multiplier:.2f}")
+        print(f"   Up threshold: {self.up_threshold:.1f}")
+        print(f"   Down threshold: {self.down_threshold:.1f}")
+
+    def _detect_bounce(self, center_y):
+        """Detect bouncing movement pattern with adaptive sensitivity."""
+        # Safety check - only run if thresholds are set
+        if self.up_threshold is None or self.down_threshold is None:
+            return
+
+        if self.state == "start":
+            if center_y > self.down_threshold:
+                self.state = "down"
+                self.stable_count = 0
+
+        elif self.state == "down":
+            if center_y < self.up_threshold:
+                self.stable_count += 1
+                if self.stable_count >= self.stable_frames:
+                    self._increment_count()
+                    self.state = "start"
+                    self.stable_count = 0
+            elif center_y < self.down_threshold:
+                self.stable_count = 0
+
+    def _detect_jump(self, center_y):
+        """Detect jumping movement pattern optimized for animals."""
+        # Safety check - only run if thresholds are set
+        if self.up_threshold is None or self.start_position is None:
+            return
+
+        if self.state == "start":
+            if center_y < self.up_threshold:
+                self.state = "up"
+                self.stable_count = 0
+
+        elif self.state == "up":
+            # More lenient return condition for animals
+            return_threshold = self.start_position + (self.start_position - self.up_threshold) * 0.3
+            if center_y > return_threshold:
+                self.stable_count += 1
+                if self.stable_count >= self.stable_frames:
+                    self._increment_count()
+                    self.state = "start"
+                    self.stable_count = 0
+            elif center_y > self.up_threshold:
+                self.stable_count = 0
+
+    def _detect_movement(self, center_y):
+        """Detect general movement pattern with improved sensitivity."""
+        # Safety check - only run if thresholds are set
+        if self.up_threshold is None or self.down_threshold is None or self.start_position is None:
+            return
+
+        if self.state == "start":
+            if center_y < self.up_threshold or center_y > self.down_threshold:
+                self.state = "moving"
+                self.stable_count = 0
+
+        elif self.state == "moving":
+            # Dynamic return zone based on movement range
+            return_zone = max(self.threshold * 0.3, self.movement_range * 0.15)
+            if abs(center_y - self.start_position) < return_zone:
+                self.stable_count += 1
+                if self.stable_count >= self.stable_frames:
+                    self._increment_count()
+                    self.state = "start"
+                    self.stable_count = 0
+            else:
+                self.stable_count = 0
+
+    def _detect_vertical_movement(self, center_y):
+        """Default vertical movement detection with adaptive thresholds."""
+        # Safety check - only run if thresholds are set
+        if self.up_threshold is None or self.down_threshold is None or self.start_position is None:
+            return
+
+        if self.state == "start":
+            if center_y < self.up_threshold:
+                self.state = "up"
+            elif center_y > self.down_threshold:
+                self.state = "down"
+
+        elif self.state == "up":
+            if center_y > self.start_position:
+                self._increment_count()
+                self.state = "start"
+
+        elif self.state == "down":
+            if center_y < self.start_position:
+                self._increment_count()
+                self.state = "start"
+
+    def _increment_count(self):
+        """Increment the counter."""
+        self.count += 1
+        self.last_count_time = self.last_timestamp
+        print(f"{self.count_icon} {self.__class__.__name__}: {self.count} ({self.object_class})")
+
+    def reset(self):
+        """Reset the counter."""
+        self.count = 0
+        self.state = "start"
+        self.stable_count = 0
+        self.start_position = None
+        self.current_position = None
+        self.up_threshold = None
+        self.down_threshold = None
+        self.position_history.clear()
+        self.body_heights.clear()
+        self.calibrated = False
+        self.position_variance = 0
+        self.movement_range = 0
+        self.adaptive_multiplier = 1.0
+        self.sensitivity_multiplier = 1.0
+        self.original_frame_size = None
+        self.display_scale = 1.0
+        self.video_height = None
+        self.last_timestamp = None
+        self.last_count_time = None
+        if self.smoother is not None:
+            self.smoother.reset()
+        self.tracker.reset()
+
+    def _reference_line(self):
+        """Y position of the line drawn as the movement reference."""
+        return self.start_position
+
+    def _status_lines(self):
+        """Status lines shown once the counter is calibrated."""
+        debug_info = self.debug_info
+        return [
+            f"Position Y: {debug_info['position_y']:.1f}",
+            f"Start Pos: {self.start_position:.1f}",
+            f"Up Line: {self.up_threshold:.1f}",
+            f"Down Line: {self.down_threshold:.1f}",
+            f"Movement Range: {self.movement_range:.1f}",
+            f"Adaptive Mult: {self.adaptive_multiplier:.2f}",
+            f"Stable: {self.stable_count}/{self.stable_frames}"
+        ]
+
+    def draw_debug_info(self, frame, detection=None, buffer_pool=None):
+        """
+        Simple, fast debug display with proper aspect ratio scaling.
+
+        If a buffer_pool (see buffer_pool.FrameBufferPool) is given, the
+        resized display frame is written into a reused array.
+        """
+        # Get original dimensions
+        original_height, original_width = frame.shape[:2]
+
+        # Use the smaller scale factor so the video fits within 800x600
+        scale_factor = min(800 / original_width, 600 / original_height)
+
+        # Calculate final display dimensions
+        display_width = int(original_width * scale_factor)
+        display_height = int(original_height * scale_factor)
+
+        # Resize with proper aspect ratio
+        if buffer_pool is not None:
+            display_frame = buffer_pool.resize('yolo_display', frame, (display_width, display_height))
+        else:
+            display_frame = cv2.resize(frame, (display_width, display_height))
+        self.display_scale = scale_factor
+
+        # Calculate scaling factors for coordinate conversion
+        scale_x = display_width / original_width
+        scale_y = display_height / original_height
+
+        # Draw detection bounding box if available
+        if detection:
+            bbox = detection['bbox']
+
+            x1 = int(bbox[0] * scale_x)
+            y1 = int(bbox[1] * scale_y)
+            x2 = int(bbox[2] * scale_x)
+            y2 = int(bbox[3] * scale_y)
+
+            # Draw bounding box
+            cv2.rectangle(display_frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+
+            # Draw confidence
+            cv2.putText(display_frame, f"{detection['class']} {detection['confidence']:.2f}",
+                       (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+
+        # Draw threshold lines if calibrated
+        if self.calibrated and self.start_position is not None:
+            reference_y = int(self._reference_line() * scale_y)
+            up_y = int(self.up_threshold * scale_y) if self.up_threshold is not None else reference_y - 50
+            down_y = int(self.down_threshold * scale_y) if self.down_threshold is not None else reference_y + 50
+
+            # Ensure lines are within frame bounds
+            reference_y = max(5, min(display_height - 5, reference_y))
+            up_y = max(5, min(display_height - 5, up_y))
+            down_y = max(5, min(display_height - 5, down_y))
+
+            # Draw threshold lines with proper width
+            cv2.line(display_frame, (0, reference_y), (display_width, reference_y), (0, 255, 255), 3)  # Yellow reference line
+            cv2.line(display_frame, (0, up_y), (display_width, up_y), (0, 255, 0), 3)        # Green up line
+            cv2.line(display_frame, (0, down_y), (display_width, down_y), (255, 0, 0), 3)    # Blue down line
+
+            # Add labels
+            reference_label, up_label, down_label = self.line_labels
+            cv2.putText(display_frame, reference_label, (10, reference_y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 2)
+            cv2.putText(display_frame, up_label, (10, up_y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+            cv2.putText(display_frame, down_label, (10, down_y + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
+
+            # Show current object position
+            if detection:
+                object_center_y = (detection['bbox'][1] + detection['bbox'][3]) / 2
+                cv2.circle(display_frame, (display_width // 2, int(object_center_y * scale_y)), 5, (255, 255, 255), -1)
+
+        # Draw status info
+        status_lines = [
+            f"Count: {self.count}",
+            f"State: {self.state}",
+            f"Detected: {self._detected}",
+            f"Calibrated: {self.calibrated}",
+            f"Video: {original_width}x{original_height} → {display_width}x{display_height}",
+            f"Scale: {scale_factor:.2f}"
+        ]
+
+        if self._detected:
+            status_lines.append(f"Confidence: {self._confidence:.2f}")
+
+        # Add position info if calibrated
+        if self.calibrated:
+            status_lines.extend(self._status_lines())
+
+        # Draw status with background
+        for i, line in enumerate(status_lines):
+            y_pos = 30 + i * 20
+            # Black background for text
+            (text_width, text_height), _ = cv2.getTextSize(line, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
+            cv2.rectangle(display_frame, (5, y_pos - text_height - 2), (text_width + 10, y_pos + 3), (0, 0, 0), -1)
+            # White text
+            cv2.putText(display_frame, line, (8, y_pos), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+        # Show calibration progress if not calibrated
+        if not self.calibrated:
+            progress_text = f"Calibrating: {len(self.position_history)}/{self.calibration_frames}"
+            cv2.putText(display_frame, progress_text, (10, 250), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+
+        return display_frame
+
+    def overlay_info(self, detection, frame_size):
+        """
+        Overlay metadata for client-side rendering: the same content as
+        draw_debug_info(), with coordinates normalized to frame_size (width, height).
+        """
+        width, height = frame_size
+        info = {
+            'kind': 'yolo',
+            'detection': None,
+            'lines': None,
+            'marker_y': None,
+            'calibration': None,
+        }
+
+        if detection:
+            x1, y1, x2, y2 = detection['bbox']
+            info['detection'] = {
+                'bbox': [round(x1 / width, 4), round(y1 / height, 4), round(x2 / width, 4), round(y2 / height, 4)],
+                'label': f"{detection['class']} {detection['confidence']:.2f}",
+            }
+
+        if self.calibrated and self.start_position is not None:
+            reference_y = self._reference_line()
+            up_y = self.up_threshold if self.up_threshold is not None else reference_y - 50
+            down_y = self.down_threshold if self.down_threshold is not None else reference_y + 50
+            info['lines'] = {
+                'reference': round(reference_y / height, 4),
+                'up': round(up_y / height, 4),
+                'down': round(down_y / height, 4),
+                'labels': list(self.line_labels),
+            }
+            if detection:
+                info['marker_y'] = round((detection['bbox'][1] + detection['bbox'][3]) / 2 / height, 4)
+
+        status_lines = [
+            f"Count: {self.count}",
+            f"State: {self.state}",
+            f"Detected: {self._detected}",
+            f"Calibrated: {self.calibrated}",
+        ]
+        if self._detected:
+            status_lines.append(f"Confidence: {self._confidence:.2f}")
+        if self.calibrated:
+            status_lines.extend(self._status_lines())
+        info['status'] = status_lines
+
+        if not self.calibrated:
+            info['calibration'] = f"Calibrating: {len(self.position_history)}/{self.calibration_frames}"
+        return info
+
+    def get_debug_info(self):
+        """Get debug information for web interface."""
+        debug_info = self.debug_info
+        return {
+            'count': self.count,
+            'state': self.state,
+            'detected': self._detected,
+            'confidence': self._confidence,
+            'object_class': self.object_class,
+            'logic_type': self.logic_type,
+            'calibrated': self.calibrated,
+            'position_y': debug_info['position_y'],
+            'start_y': debug_info['start_y'],
+            'is_up': debug_info['is_up'],
+            'is_down': debug_info['is_down'],
+            'is_at_start': debug_info['is_at_start'],
+            'movement_range': debug_info['movement_range'],
+            'adaptive_multiplier': debug_info['adaptive_multiplier'],
+            'display_scale': self.display_scale
+        }
+
+class JumpTargetCounterBase(YOLOCounterBase):
+    """
+    Counts jumps of an animal: a rep is crossing a center reference line placed
+    above the resting position and returning to rest. Thresholds scale with the
+    animal's median bounding box height.
+    """
+
+    __slots__ = ('center_reference', 'body_height', 'jump_threshold_px', 'jump_ratio_used')
+
+    line_labels = ("CENTER (JUMP TARGET)", "HIGH JUMP", "REST ZONE")
+
+    def __init__(self):
+        super().__init__()
+        self.center_reference = None
+        self.body_height = 0
+        self.jump_threshold_px = 0
+        self.jump_ratio_used = 0
+
+    def _video_height(self):
+        # Use actual frame dimensions instead of hardcoded 1080
+        if self.original_frame_size:
+            return self.original_frame_size[1]
+        return 1080
+
+    def _calibrate(self):
+        """Calculate movement thresholds based on body height and improved logic."""
+        positions = self.position_history
+        self.start_position = positions.median()
+
+        # Calculate body height from recent detections
+        if len(self.body_heights):
+            median_body_height = self.body_heights.median()
+        else:
+            # Fallback to standard deviation method if no body height data
+            self.movement_range = positions.std() * 2
+            median_body_height = max(60, self.movement_range)  # Minimum fallback
+
+        # Define jumping thresholds based on body height ratios
+        # For animals, a "jump" should be more conservative to avoid false positives
+        # Real animal jumps are typically 50-80% of body height, but we detect smaller movements
+        jump_ratio = 0.25  # 25% of body height for definitive jump (more conservative)
+        movement_ratio = 0.15  # 15% of body height for movement detection (more selective)
+
+        # Calculate thresholds
+        jump_threshold = median_body_height * jump_ratio
+        self.movement_range = max(median_body_height * movement_ratio * 2, 40)  # Minimum 40px
+
+        # Use the larger threshold for more reliable detection
+        detection_range = max(jump_threshold, self.movement_range / 2)
+
+        # IMPORTANT: Move center reference away from resting position
+        # The center line should be positioned where animal needs to jump UP to reach
+        # This prevents counting when animal is just sitting/resting at initial position
+        center_offset = median_body_height * 0.4  # Move center 40% of body height upward
+        self.center_reference = self.start_position - center_offset  # Higher up (smaller Y)
+
+        # Calculate thresholds relative to the new center reference (not initial position)
+        raw_up_threshold = self.center_reference - detection_range * 0.5  # Above center
+        raw_down_threshold = self.center_reference + detection_range * 2.0  # Below center (must include initial position)
+
+        # Ensure the initial resting position is well within the "down" zone
+        min_distance_from_center = median_body_height * 0.2  # At least 20% of body height from center
+        if abs(self.start_position - self.center_reference) < min_distance_from_center:
+            # If still too close, move center even further up
+            additional_offset = min_distance_from_center - abs(self.start_position - self.center_reference)
+            self.center_reference -= additional_offset
+
+        # Ensure thresholds are within video bounds with intelligent adjustment
+        margin = 50
+        video_height = 1080  # Could be made dynamic from frame.shape[0]
+
+        # Apply bounds with intelligent adjustment
+        if raw_up_threshold < margin:
+            # Animal is too high in frame, shift detection zone down
+            shift = margin - raw_up_threshold
+            self.up_threshold = margin
+            self.down_threshold = min(raw_down_threshold + shift, video_height - margin)
+        elif raw_down_threshold > video_height - margin:
+            # Animal is too low in frame, shift detection zone up
+            shift = raw_down_threshold - (video_height - margin)
+            self.down_threshold = video_height - margin
+            self.up_threshold = max(raw_up_threshold - shift, margin)
+        else:
+            # Animal is well within bounds, use original calculations
+            self.up_threshold = raw_up_threshold
+            self.down_threshold = raw_down_threshold
+
+        # Final safety check - ensure proper threshold order and minimum range
+        if self.up_threshold >= self.down_threshold:
+            # Emergency fallback: create small symmetric range around center
+            center = self.start_position
+            min_range = 40  # Minimum detection range
+            self.up_threshold = max(center - min_range/2, margin)
+            self.down_threshold = min(center + min_range/2, video_height - margin)
+
+        # Recalculate movement range for consistency
+        self.movement_range = self.down_threshold - self.up_threshold
+
+        # Store body height info for debugging
+        self.body_height = median_body_height
+        self.jump_threshold_px = detection_range
+        self.jump_ratio_used = detection_range / median_body_height if median_body_height > 0 else 0
+
+        print(f"🎯 {self.__class__.__name__} calibrated (Body-Height-Based Detection):")
+        print(f"   Center position: {self.start_position:.1f}")
+        print(f"   Body height: {self.body_height:.1f}px")
+        print(f"   Jump threshold: {self.jump_threshold_px:.1f}px ({self.jump_ratio_used:.1%} of body)")
+        print(f"   Center reference: {self.center_reference:.1f} (jump target)")
+        print(f"   Up threshold: {self.up_threshold:.1f}")
+        print(f"   Down threshold: {self.down_threshold:.1f}")
+        print(f"   Detection zone: {self.down_threshold - self.up_threshold:.1f}px")
+        print(f"🎮 KEYBOARD CONTROLS NOW ACTIVE:")
+        print(f"   ↑/W: Move center line up    ↓/S: Move center line down")
+        print(f"   +: Less sensitive (larger dead zone)    -: More sensitive")
+        print(f"   0: Reset to auto-calibration")
+
+    def _return_zone(self):
+        # Return zone should be near the original resting position, not center
+        return max(self.body_height * 0.2, 30)
+
+    def _detect_movement(self, center_y):
+        """Detect movement pattern that requires actually crossing the center reference line."""
+        # Safety check - only run if calibration is complete
+        if not self.calibrated or self.start_position is None:
+            return
+
+        # Use adjustable dead zone
+        dead_zone_radius = self.get_current_dead_zone()
+
+        # Use center_reference as the target line that must be crossed
+        center_ref = self._reference_line()
+
+        if self.state == "start":
+            # Only trigger if animal moves significantly from resting position AND crosses center line
+            distance_from_rest = abs(center_y - self.start_position)
+
+            # First check: animal must move beyond dead zone from resting position
+            if distance_from_rest > dead_zone_radius:
+                # Second check: animal must actually cross the center reference line to count
+                if center_y <= center_ref:  # Animal reached or crossed center line (jumped up)
+                    self.state = "jumped"
+                    self.stable_count = 0
+                # If animal moves but doesn't reach center, don't count (just moving around)
+
+        elif self.state == "jumped":
+            # Count when animal returns to resting area after jumping
+            if abs(center_y - self.start_position) < self._return_zone():
+                self.stable_count += 1
+                if self.stable_count >= self.stable_frames:
+                    self._increment_count()
+                    self.state = "start"
+                    self.stable_count = 0
+            else:
+                # Reset stability if animal moves away from resting area again
+                self.stable_count = 0
+
+    def _reference_line(self):
+        return self.center_reference if self.center_reference is not None else self.start_position
+
+    def _status_lines(self):
+        return [
+            f"Animal Y: {self._position_y:.1f}",
+            f"Initial Pos: {self.start_position:.1f}",
+            f"Center Ref: {self._reference_line():.1f} (ADJUSTABLE)",
+            f"Body Height: {self.body_height:.1f}px",
+            f"Jump Threshold: {self.jump_threshold_px:.1f}px",
+            f"Dead Zone: ±{self.get_current_dead_zone():.1f}px (×{self.sensitivity_multiplier:.1f})",
+            f"Return Zone: ±{self._return_zone():.1f}px",
+            f"Up Line: {self.up_threshold:.1f}",
+            f"Down Line: {self.down_threshold:.1f}",
+            f"State: {self.state}",
+            f"Stable: {self.stable_count}/{self.stable_frames}"
+        ]
+
+    def reset(self):
+        """Reset the counter."""
+        super().reset()
+        self.center_reference = None
+        self.body_height = 0
+        self.jump_threshold_px = 0
+        self.jump_ratio_used = 0
+
+    def adjust_center_line(self, direction, amount=10):
+        """Adjust center reference line position in real-time."""
+        if self.center_reference is None:
+            return
+
+        if direction == 'up':
+            self.center_reference -= amount  # Move up (smaller Y)
+        elif direction == 'down':
+            self.center_reference += amount  # Move down (larger Y)
+
+        margin = 50
+        video_height = self._video_height()
+        self.center_reference = max(margin, min(self.center_reference, video_height - margin))
+
+        # Recalculate thresholds based on new center reference
+        if self.jump_threshold_px:
+            detection_range = self.jump_threshold_px
+            self.up_threshold = max(self.center_reference - detection_range * 0.5, margin)
+            self.down_threshold = min(self.center_reference + detection_range * 2.0, video_height - margin)
+
+        print(f"🎯 Center line moved {direction}: {self.center_reference:.1f}")
+        print(f"   Up threshold: {self.up_threshold:.1f}")
+        print(f"   Down threshold: {self.down_threshold:.1f}")
+
+    def adjust_sensitivity(self, direction, factor=0.1):
+        """Adjust detection sensitivity (dead zone size)."""
+        if self.body_height > 0:
+            current_dead_zone = max(15, self.body_height * 0.1)
+
+            if direction == 'increase':
+                # Increase dead zone (less sensitive)
+                self.sensitivity_multiplier += factor
+                print(f"🔧 Sensitivity decreased (dead zone: {current_dead_zone * self.sensitivity_multiplier:.1f}px)")
+            elif direction == 'decrease':
+                # Decrease dead zone (more sensitive)
+                self.sensitivity_multiplier = max(0.3, self.sensitivity_multiplier - factor)
+                print(f"🔧 Sensitivity increased (dead zone: {current_dead_zone * self.sensitivity_multiplier:.1f}px)")
+
+    def reset_to_auto_calibration(self):
+        """Reset center line to automatically calibrated position."""
+        if self.body_height > 0:
+            # Recalculate original center reference
+            self.center_reference = self.start_position - self.body_height * 0.4
+            self.sensitivity_multiplier = 1.0
+
+            # Recalculate thresholds
+            margin = 50
+            detection_range = self.jump_threshold_px
+            self.up_threshold = max(self.center_reference - detection_range * 0.5, margin)
+            self.down_threshold = min(self.center_reference + detection_range * 2.0, self._video_height() - margin)
+
+            print(f"🔄 Reset to auto-calibrated center: {self.center_reference:.1f}")
+            print(f"   Up threshold: {self.up_threshold:.1f}")
+            print(f"   Down threshold: {self.down_threshold:.1f}")
+
+    def get_current_dead_zone(self):
+        """Get current dead zone radius with sensitivity adjustment."""
+        if self.body_height > 0:
+            return max(15, self.body_height * 0.1) * self.sensitivity_multiplier
+        return max(20, self.threshold * 0.3)
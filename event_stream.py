@@ -0,0 +1,134 @@
+"""
+会话事件推送（Server-Sent Events）。
+处理线程在计数发生时发布事件，并定期发布只包含变化字段的统计增量；
+每个/events连接订阅同一个事件序列。
+
+每个事件只序列化一次（发布时），连接只是把已编码的字节写出去，
+因此服务器的工作量与事件数量成正比，而不是与“客户端数 × 会话长度”成正比。
+最近的事件保存在环形缓冲区中，断线重连时浏览器发送Last-Event-ID，只补发错过的事件；
+错过的事件已被覆盖时重新发送一次会话快照。
+"""
+
+import json
+import threading
+from collections import deque
+from itertools import islice
+from typing import Callable, Dict, Iterator, Optional
+
+HISTORY_SIZE = 512       # 为断线重连保留的事件数
+KEEPALIVE_SECONDS = 15.0 # 没有事件时发送注释行，保持连接并及时发现断开的客户端
+RETRY_MILLISECONDS = 2000
+
+def format_event(event: str, data: Dict, event_id: Optional[int] = None) -> bytes:
+    """编码一个SSE消息。"""
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=str)
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {payload}")
+    return ('\n'.join(lines) + '\n\n').encode('utf-8')
+
+class EventBroker:
+    """
+    会话事件的发布/订阅。
+
+    publish() 由处理线程和请求处理函数调用，stream() 为每个SSE连接生成字节流。
+    """
+
+    def __init__(self, history: int = HISTORY_SIZE, keepalive: float = KEEPALIVE_SECONDS):
+        self.keepalive = keepalive
+        self._events = deque(maxlen=history)  # (事件ID, 编码后的消息)
+        self._last_id = 0
+        self._condition = threading.Condition()
+        self.subscribers = 0
+
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+
+    def publish(self, event: str, data: Dict) -> int:
+        """发布一个事件，返回事件ID。"""
+        with self._condition:
+            self._last_id += 1
+            self._events.append((self._last_id, format_event(event, data, self._last_id)))
+            self._condition.notify_all()
+            return self._last_id
+
+    def _pending(self, cursor: int):
+        """
+        返回(游标之后的消息列表, 新游标)；游标之后的事件已被环形缓冲区覆盖时消息为None。
+        调用方需持有_condition。
+        """
+        if not self._events or cursor >= self._last_id:
+            return [], cursor
+        first_id = self._events[0][0]
+        if cursor + 1 < first_id:
+            return None, self._last_id
+        messages = [message for _, message in islice(self._events, cursor + 1 - first_id, None)]
+        return messages, self._last_id
+
+    def stream(self, snapshot: Callable[[], Dict], last_event_id: Optional[int] = None) -> Iterator[bytes]:
+        """
+        生成一个SSE连接的字节流。
+
+        Args:
+            snapshot: 返回当前会话快照的函数（新连接或无法补发时作为'session'事件发送）
+            last_event_id: 浏览器重连时的Last-Event-ID
+        """
+        with self._condition:
+            self.subscribers += 1
+            cursor = self._last_id
+            resume = last_event_id is not None and last_event_id <= cursor
+            if resume:
+                messages, _ = self._pending(last_event_id)
+                resume = messages is not None
+                if resume:
+                    cursor = last_event_id
+
+        try:
+            yield f"retry: {RETRY_MILLISECONDS}\n\n".encode('utf-8')
+            if not resume:
+                yield format_event('session', snapshot(), cursor)
+
+            while True:
+                with self._condition:
+                    if cursor >= self._last_id:
+                        self._condition.wait(self.keepalive)
+                    messages, cursor = self._pending(cursor)
+
+                if messages is None:
+                    # 客户端落后太多，错过的事件已被覆盖：用快照重新同步
+                    yield format_event('session', snapshot(), cursor)
+                elif messages:
+                    yield b''.join(messages)
+                else:
+                    yield b': keepalive\n\n'
+        finally:
+            with self._condition:
+                self.subscribers -= 1
+
+class StatsTracker:
+    """
+    生成定期的统计增量：只包含自上次发布以来发生变化的字段。
+    """
+
+    def __init__(self, interval: float = 1.0, start: Optional[float] = None):
+        self.interval = interval
+        self._last_values: Dict = {}
+        self._last_time = start
+
+    def reset(self) -> None:
+        self._last_values = {}
+        self._last_time = None
+
+    def due(self, now: float) -> bool:
+        """距上次发布是否已超过发布间隔。"""
+        return self._last_time is None or now - self._last_time >= self.interval
+
+    def delta(self, values: Dict, now: float) -> Dict:
+        """记录本次发布的时间，返回与上次相比发生变化的字段（没有变化时为空字典）。"""
+        self._last_time = now
+        changed = {key: value for key, value in values.items() if self._last_values.get(key) != value}
+        self._last_values.update(changed)
+        return changed
@@ -0,0 +1,139 @@
+"""
+视频帧时钟。
+用视频时间（相机捕获时间戳或文件的帧序号/FPS）代替挂钟时间为帧和事件打时间戳，
+使计数结果和事件时间与处理速度无关：快于实时或并行处理同一视频，
+得到的计数和时间戳与实时播放完全相同。
+"""
+
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Optional
+
+import cv2
+
+DEFAULT_FPS = 30.0
+MAX_FPS = 240.0
+
+def source_fps(capture) -> float:
+    """读取视频源的FPS，无效时回退到DEFAULT_FPS。"""
+    fps = capture.get(cv2.CAP_PROP_FPS) if capture is not None else 0
+    if not fps or fps <= 0 or fps > MAX_FPS:
+        return DEFAULT_FPS
+    return float(fps)
+
+class FrameClock(ABC):
+    """
+    帧时钟基类（子类实现_frame_time）。
+    每读取一帧调用一次tick()，返回该帧相对于视频源开始的时间（秒）。
+    事件的绝对时间由会话开始时间加上视频时间得到，而不是处理时的当前时间。
+    """
+
+    def __init__(self, fps: float = DEFAULT_FPS, start_time: Optional[datetime] = None):
+        self.fps = fps
+        self.start_time = start_time or datetime.now()
+        self.frame_index = -1
+        self.timestamp = 0.0
+
+    def tick(self, capture=None) -> float:
+        """推进到下一帧并返回其视频时间（秒）。"""
+        self.frame_index += 1
+        self.timestamp = self._frame_time(capture)
+        return self.timestamp
+
+    @abstractmethod
+    def _frame_time(self, capture) -> float:
+        """当前帧（frame_index）相对于视频源开始的时间（秒）。"""
+
+    def reset(self, start_time: Optional[datetime] = None) -> None:
+        """重置时钟（例如开始新的会话）。"""
+        self.start_time = start_time or datetime.now()
+        self.frame_index = -1
+        self.timestamp = 0.0
+
+    def to_datetime(self, timestamp: Optional[float] = None) -> datetime:
+        """将视频时间转换为绝对时间（会话开始时间 + 视频时间）。"""
+        if timestamp is None:
+            timestamp = self.timestamp
+        return self.start_time + timedelta(seconds=timestamp)
+
+    def isoformat(self, timestamp: Optional[float] = None) -> str:
+        return self.to_datetime(timestamp).isoformat()
+
+    def event(self) -> dict:
+        """会话事件使用的时间字段。"""
+        return {
+            'timestamp': self.isoformat(),
+            'video_time': round(self.timestamp, 6),
+            'frame': self.frame_index
+        }
+
+class FileFrameClock(FrameClock):
+    """
+    视频文件时钟：时间 = 帧序号 / FPS。
+    完全由帧序号决定，与读取速度无关；循环播放时时间继续递增。
+    """
+
+    def _frame_time(self, capture) -> float:
+        return self.frame_index / self.fps
+
+class CaptureFrameClock(FrameClock):
+    """
+    相机时钟：使用驱动提供的捕获时间戳（CAP_PROP_POS_MSEC）。
+    驱动不提供有效时间戳时，回退到读取帧时的单调时钟。
+    时间基准在第一帧时选定并在整个会话中保持不变：两种时间戳的原点无关，
+    逐帧切换会使时间跳变（有的驱动只是偶尔返回0）。
+    """
+
+    def __init__(self, fps: float = DEFAULT_FPS, start_time: Optional[datetime] = None):
+        super().__init__(fps, start_time)
+        self._use_capture_time = None  # 第一帧时选定：True为驱动时间戳，False为单调时钟
+        self._origin = None
+        self._last = 0.0
+
+    def reset(self, start_time: Optional[datetime] = None) -> None:
+        super().reset(start_time)
+        self._use_capture_time = None
+        self._origin = None
+        self._last = 0.0
+
+    def _frame_time(self, capture) -> float:
+        position_ms = capture.get(cv2.CAP_PROP_POS_MSEC) if capture is not None else 0
+        valid = bool(position_ms and position_ms > 0)
+        if self._use_capture_time is None:
+            self._use_capture_time = valid
+
+        if not self._use_capture_time:
+            stamp = time.monotonic()
+        elif valid:
+            stamp = position_ms / 1000.0
+        else:
+            # 驱动偶尔不提供时间戳：按一帧间隔推进，而不是切换到另一个时间基准
+            stamp = None
+
+        if self._origin is None:
+            self._origin = stamp
+        current = self._last + 1.0 / self.fps if stamp is None else stamp - self._origin
+
+        # 时间戳必须单调递增，驱动时间戳跳变时按一帧间隔推进
+        if self.frame_index > 0 and current <= self._last:
+            current = self._last + 1.0 / self.fps
+        self._last = current
+        return current
+
+def create_frame_clock(capture, video_source: str, start_time: Optional[datetime] = None) -> FrameClock:
+    """
+    为视频源创建合适的帧时钟。
+
+    Args:
+        capture: cv2.VideoCapture
+        video_source: 视频源（数字为相机索引，否则为文件路径/URL）
+        start_time: 会话开始时间
+
+    Returns:
+        FrameClock: 相机使用CaptureFrameClock，文件使用FileFrameClock
+    """
+    fps = source_fps(capture)
+    if str(video_source).isdigit():
+        return CaptureFrameClock(fps, start_time)
+    return FileFrameClock(fps, start_time)
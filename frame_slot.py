@@ -0,0 +1,49 @@
+"""
+处理线程与流式传输之间的帧交接。
+
+处理线程每帧发布一个新的显示帧数组（连同覆盖层元数据）和递增的序号，
+流式传输的读取方取得(序号, 帧, 覆盖层)的不可变引用，编码和发送都不持有任何锁，
+也不需要为交接复制帧。
+
+发布只是替换一个元组引用（CPython中单次属性赋值是原子的），读取方要么看到旧的元组，
+要么看到新的元组，不会看到序号和帧不一致的中间状态。发布后的帧被设置为只读：
+读取方持有的引用在它用完之前不会被修改，任何试图在已发布的帧上绘制的代码都会立即报错，
+而不是产生撕裂的画面。处理线程每帧使用新的（或从缓冲池中确认已无人引用的）数组，
+因此不需要固定数量的双缓冲/三缓冲。
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+class FrameSlot:
+    """单生产者、多读取方的最新帧交接。"""
+
+    def __init__(self):
+        self._seq = 0
+        self._latest: Tuple[int, Optional[np.ndarray], Optional[bytes]] = (0, None, None)
+
+    @property
+    def seq(self) -> int:
+        return self._latest[0]
+
+    def publish(self, frame: np.ndarray, overlay: Optional[bytes] = None) -> int:
+        """
+        发布一帧（只能由处理线程调用），返回该帧的序号。
+
+        Args:
+            frame: 网页显示帧，发布后不能再修改
+            overlay: 客户端覆盖层模式下该帧已编码的覆盖层元数据
+        """
+        frame.flags.writeable = False
+        self._seq += 1
+        self._latest = (self._seq, frame, overlay)
+        return self._seq
+
+    def latest(self) -> Tuple[int, Optional[np.ndarray], Optional[bytes]]:
+        """返回(序号, 帧, 覆盖层元数据)；还没有帧时帧为None。"""
+        return self._latest
+
+    def clear(self) -> None:
+        """会话结束时清除当前帧（序号保持递增，读取方不会把下一个会话的帧当作旧帧）。"""
+        self._latest = (self._seq, None, None)
@@ -0,0 +1,375 @@
+"""
+H.264分片MP4（fMP4）视频流。
+
+显示帧只编码一次：一个ffmpeg进程（libx264，ultrafast + zerolatency，baseline profile，
+没有B帧）把原始BGR帧编码为每帧一个分片的fragmented MP4，所有观看者共享同一个输出。
+浏览器用fetch()读取/video_mp4并通过MediaSource播放。
+
+关键帧间隔固定（默认1秒，关闭场景切换检测），新观看者收到初始化段（ftyp+moov）和
+从最近一个关键帧开始的分片，因此不需要等待下一个关键帧就能开始播放。
+编码器在第一个观看者连接时启动，最后一个观看者离开一段时间后停止；
+显示帧尺寸变化（新的会话）时重启编码器，已连接的观看者的流随之结束，由浏览器重新连接。
+
+需要系统中的ffmpeg（可通过FFMPEG_BINARY环境变量指定路径）；没有ffmpeg时该模式不可用，
+网页回退到MJPEG。
+"""
+
+import os
+import shutil
+import struct
+import subprocess
+import threading
+import time
+from collections import deque
+from itertools import islice
+from typing import Callable, Iterator, Optional, Tuple
+
+import numpy as np
+
+STREAM_FPS = 25           # 输入编码器的帧率（处理线程没有新帧时重复上一帧，保持时间轴连续）
+KEYFRAME_INTERVAL = 1.0   # 关键帧间隔（秒），决定新观看者最多需要回放多少个分片
+BITRATE = '1M'            # 目标码率（同时作为maxrate，bufsize为1秒）
+HISTORY_SECONDS = 3.0     # 为落后的观看者保留的分片时长
+IDLE_TIMEOUT = 10.0       # 没有观看者多久后停止编码器（秒）
+INIT_TIMEOUT = 5.0        # 等待初始化段的最长时间（秒）
+
+SAMPLE_IS_NON_SYNC = 0x10000  # ISO/IEC 14496-12 sample_flags中的sample_is_non_sync_sample位
+
+def find_ffmpeg() -> Optional[str]:
+    """返回ffmpeg可执行文件路径，找不到时返回None。"""
+    return shutil.which(os.environ.get('FFMPEG_BINARY', 'ffmpeg'))
+
+def _read_exact(stream, size: int) -> Optional[bytes]:
+    data = b''
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+def read_boxes(stream) -> Iterator[Tuple[str, bytes]]:
+    """从字节流中逐个读取顶层MP4 box，生成(类型, 完整box字节)。"""
+    while True:
+        header = _read_exact(stream, 8)
+        if header is None:
+            return
+        size, box_type = struct.unpack('>I4s', header)
+        if size == 1:
+            large = _read_exact(stream, 8)
+            if large is None:
+                return
+            header += large
+            size = struct.unpack('>Q', large)[0]
+        elif size < 8:
+            # size为0（延伸到流末尾）不会出现在分片MP4中
+            return
+        payload = _read_exact(stream, size - len(header))
+        if payload is None:
+            return
+        yield box_type.decode('ascii', 'replace'), header + payload
+
+def _child_boxes(data: bytes, start: int, end: int) -> Iterator[Tuple[str, int, int]]:
+    """遍历data[start:end]中的子box，生成(类型, 负载起始位置, box结束位置)。"""
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from('>I4s', data, offset)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', data, offset + 8)[0]
+            header = 16
+        if size < header or offset + size > end:
+            return
+        yield box_type.decode('ascii', 'replace'), offset + header, offset + size
+        offset += size
+
+def first_sample_is_sync(moof: bytes) -> Optional[bool]:
+    """
+    根据moof中tfhd/trun的样本标志判断分片的第一个样本是否为关键帧。
+    标志未出现在moof中（使用moov中trex的默认值）时返回None。
+    """
+    for box_type, start, end in _child_boxes(moof, 8, len(moof)):
+        if box_type != 'traf':
+            continue
+        default_flags = None
+        for child, payload, child_end in _child_boxes(moof, start, end):
+            flags = struct.unpack_from('>I', moof, payload)[0] & 0xffffff
+            offset = payload + 4
+            if child == 'tfhd':
+                offset += 4  # track_ID
+                for bit, size in ((0x1, 8), (0x2, 4), (0x8, 4), (0x10, 4)):
+                    if flags & bit:
+                        offset += size
+                if flags & 0x20:
+                    default_flags = struct.unpack_from('>I', moof, offset)[0]
+            elif child == 'trun':
+                offset += 4  # sample_count
+                if flags & 0x1:
+                    offset += 4  # data_offset
+                if flags & 0x4:
+                    sample_flags = struct.unpack_from('>I', moof, offset)[0]
+                    return not sample_flags & SAMPLE_IS_NON_SYNC
+                if flags & 0x400:
+                    # 第一个样本的各字段按duration、size、flags的顺序排列
+                    offset += 4 * bool(flags & 0x100) + 4 * bool(flags & 0x200)
+                    sample_flags = struct.unpack_from('>I', moof, offset)[0]
+                    return not sample_flags & SAMPLE_IS_NON_SYNC
+                if default_flags is not None:
+                    return not default_flags & SAMPLE_IS_NON_SYNC
+    return None
+
+def codec_string(init_segment: bytes) -> Optional[str]:
+    """从初始化段的avcC中读取RFC 6381编解码器字符串（例如avc1.42C01F）。"""
+    index = init_segment.find(b'avcC')
+    if index < 0 or index + 8 > len(init_segment):
+        return None
+    profile, compatibility, level = init_segment[index + 5:index + 8]
+    return f"avc1.{profile:02X}{compatibility:02X}{level:02X}"
+
+class H264Broadcaster:
+    """
+    共享的H.264 fMP4编码器和分片分发。
+
+    Args:
+        frame_source: 返回(帧序号, 当前显示帧)的函数，没有帧时帧为None
+        fps: 编码帧率
+        keyframe_interval: 关键帧间隔（秒）
+        bitrate: 目标码率（ffmpeg格式，例如'1M'）
+    """
+
+    def __init__(self, frame_source: Callable[[], Tuple[int, Optional[np.ndarray]]],
+                 fps: float = STREAM_FPS, keyframe_interval: float = KEYFRAME_INTERVAL,
+                 bitrate: str = BITRATE, ffmpeg: Optional[str] = None):
+        self.frame_source = frame_source
+        self.fps = fps
+        self.gop = max(1, int(round(fps * keyframe_interval)))
+        self.bitrate = bitrate
+        self.ffmpeg = ffmpeg or find_ffmpeg()
+
+        self._condition = threading.Condition()
+        # (分片ID, 编码器代数, 是否关键帧, 字节)；至少保留一个完整的关键帧间隔
+        self._fragments = deque(maxlen=max(self.gop + 1, int(fps * HISTORY_SECONDS)))
+        self._last_id = 0
+        self._key_id = None         # 当前编码器最近一个关键帧分片的ID
+        self._init_segment = None
+        self._codec = None
+        self._generation = 0        # 每次（重新）启动编码器加1
+        self._feeder = None
+        self._process = None
+        self._size = None
+        self.subscribers = 0
+        self.frames_encoded = 0
+        self.bytes_out = 0
+        self.restarts = 0
+
+    @property
+    def available(self) -> bool:
+        return self.ffmpeg is not None
+
+    @property
+    def running(self) -> bool:
+        return self._feeder is not None and self._feeder.is_alive()
+
+    def describe(self):
+        return {
+            'available': self.available,
+            'running': self.running,
+            'codec': self._codec,
+            'size': self._size,
+            'fps': self.fps,
+            'gop_frames': self.gop,
+            'bitrate': self.bitrate,
+            'subscribers': self.subscribers,
+            'frames_encoded': self.frames_encoded,
+            'mbytes_out': round(self.bytes_out / (1024 * 1024), 2),
+            'restarts': self.restarts,
+        }
+
+    def ensure_running(self) -> None:
+        """启动编码线程（已在运行时不做任何事）。"""
+        with self._condition:
+            if self.running or not self.available:
+                return
+            self._feeder = threading.Thread(target=self._feed, name='h264-feeder', daemon=True)
+            self._feeder.start()
+
+    def wait_ready(self, timeout: float = INIT_TIMEOUT) -> Optional[str]:
+        """等待初始化段和第一个关键帧，返回编解码器字符串，超时返回None。"""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self._init_segment is None or self._key_id is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.running:
+                    return None
+                self._condition.wait(remaining)
+            return self._codec
+
+    def _command(self, width: int, height: int):
+        return [
+            self.ffmpeg, '-hide_banner', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f'{width}x{height}', '-r', str(self.fps),
+            '-i', 'pipe:0', '-an',
+            '-c:v', 'libx264', '-preset', 'ultrafast', '-tune', 'zerolatency',
+            '-profile:v', 'baseline', '-pix_fmt', 'yuv420p',
+            '-g', str(self.gop), '-keyint_min', str(self.gop), '-sc_threshold', '0', '-bf', '0',
+            '-b:v', self.bitrate, '-maxrate', self.bitrate, '-bufsize', self.bitrate,
+            '-f', 'mp4', '-movflags', 'empty_moov+default_base_moof+frag_every_frame',
+            '-flush_packets', '1', 'pipe:1',
+        ]
+
+    def _start_encoder(self, width: int, height: int) -> None:
+        self._stop_encoder()
+        with self._condition:
+            self._generation += 1
+            self._init_segment = None
+            self._codec = None
+            self._key_id = None
+            self._size = (width, height)
+            # 通知已连接的观看者：旧编码器的流结束
+            self._condition.notify_all()
+        self._process = subprocess.Popen(self._command(width, height), stdin=subprocess.PIPE,
+                                         stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=0)
+        reader = threading.Thread(target=self._read, args=(self._process, self._generation),
+                                  name='h264-reader', daemon=True)
+        reader.start()
+        self.restarts += 1
+
+    def _stop_encoder(self) -> None:
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        try:
+            process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    def _feed(self) -> None:
+        """按固定帧率把最新的显示帧写入编码器；没有观看者超过IDLE_TIMEOUT后退出。"""
+        interval = 1.0 / self.fps
+        next_time = time.monotonic()
+        idle_since = None
+        try:
+            while True:
+                now = time.monotonic()
+                if self.subscribers == 0:
+                    idle_since = idle_since or now
+                    if now - idle_since > IDLE_TIMEOUT:
+                        break
+                else:
+                    idle_since = None
+
+                _, frame = self.frame_source()
+                if frame is not None:
+                    # yuv420p需要偶数尺寸
+                    height, width = frame.shape[0] & ~1, frame.shape[1] & ~1
+                    if self._process is None or self._process.poll() is not None or self._size != (width, height):
+                        self._start_encoder(width, height)
+                    if frame.shape[0] != height or frame.shape[1] != width:
+                        frame = frame[:height, :width]
+                    try:
+                        self._process.stdin.write(np.ascontiguousarray(frame).data)
+                        self.frames_encoded += 1
+                    except (BrokenPipeError, OSError, ValueError):
+                        # 编码器退出：下一帧时重启
+                        self._stop_encoder()
+
+                next_time += interval
+                delay = next_time - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    # 落后时不追赶，从当前时间重新计时
+                    next_time = time.monotonic()
+        finally:
+            self._stop_encoder()
+            with self._condition:
+                self._generation += 1
+                self._condition.notify_all()
+
+    def _read(self, process, generation: int) -> None:
+        """把编码器输出切分为初始化段和分片（moof+mdat）并发布。"""
+        init_parts = []
+        moof = None
+        index = 0
+        for box_type, data in read_boxes(process.stdout):
+            if box_type in ('ftyp', 'moov'):
+                init_parts.append(data)
+                if box_type == 'moov':
+                    init_segment = b''.join(init_parts)
+                    with self._condition:
+                        if generation != self._generation:
+                            return
+                        self._init_segment = init_segment
+                        self._codec = codec_string(init_segment)
+                        self._condition.notify_all()
+            elif box_type == 'moof':
+                moof = data
+            elif box_type == 'mdat' and moof is not None:
+                is_key = first_sample_is_sync(moof)
+                if is_key is None:
+                    # 每帧一个分片且关键帧间隔固定
+                    is_key = index % self.gop == 0
+                self._publish(generation, is_key, moof + data)
+                moof = None
+                index += 1
+
+    def _publish(self, generation: int, is_key: bool, data: bytes) -> None:
+        with self._condition:
+            if generation != self._generation:
+                return
+            self._last_id += 1
+            self._fragments.append((self._last_id, generation, is_key, data))
+            if is_key:
+                self._key_id = self._last_id
+            self._condition.notify_all()
+
+    def _start_position(self):
+        """新观看者（或落后的观看者）的起点：最近一个关键帧分片之前的ID。调用方需持有_condition。"""
+        return self._key_id - 1 if self._key_id is not None else self._last_id
+
+    def _pending(self, cursor: int):
+        """返回游标之后的(分片ID, 字节)列表；落后太多时从最近的关键帧开始。调用方需持有_condition。"""
+        if not self._fragments or cursor >= self._last_id:
+            return []
+        first_id = self._fragments[0][0]
+        if cursor + 1 < first_id:
+            cursor = self._start_position()
+        return [(fragment_id, data) for fragment_id, _, _, data
+                in islice(self._fragments, cursor + 1 - first_id, None)]
+
+    def stream(self) -> Iterator[bytes]:
+        """
+        一个观看者的字节流：初始化段、从最近关键帧开始的分片，然后是新的分片。
+        编码器重启或停止时结束。落后太多（分片已被覆盖）时跳到最近的关键帧。
+        """
+        with self._condition:
+            self.subscribers += 1
+            generation = self._generation
+            init_segment = self._init_segment
+            cursor = self._start_position()
+
+        try:
+            if init_segment is None:
+                return
+            yield init_segment
+            while True:
+                with self._condition:
+                    if cursor >= self._last_id and generation == self._generation:
+                        self._condition.wait(1.0)
+                    if generation != self._generation:
+                        return
+                    pending = self._pending(cursor)
+                    if pending:
+                        cursor = pending[-1][0]
+
+                if pending:
+                    chunk = b''.join(data for _, data in pending)
+                    self.bytes_out += len(chunk)
+                    yield chunk
+        finally:
+            with self._condition:
+                self.subscribers -= 1
@@ -0,0 +1,589 @@
+"""
+可插拔的推理后端。
+姿态估计（MediaPipe）和目标检测（YOLO）通过后端接口提供，web_app、多人模式和YOLO计数器
+都从这里获取推理实现，而不是直接依赖mediapipe/ultralytics：
+
+- mediapipe / yolo: 真实模型（默认）
+- replay: 从文件回放预先录制的关键点和检测结果，可设置人工延迟，
+  不需要模型和权重，用于对网页、会话和流式传输层进行确定性的压力测试
+
+后端通过规格字符串选择，例如 'mediapipe'、'yolo:yolov8s.pt'、'replay:landmarks.npy'，
+可在代码中调用configure_backends()或set_pose_backend()/set_detector_backend()，也可使用环境变量
+POSE_BACKEND、DETECTOR_BACKEND、INFERENCE_LATENCY_MS 和 INFERENCE_JITTER_MS。
+
+录制文件格式:
+- 关键点: .npy，形状(N, 33, 4)，每行为(x, y, z, visibility)归一化坐标，没有检测到人的帧全为NaN
+- 检测: .json，{"width": W, "height": H, "fps": fps, "frames": [[{"class", "confidence", "bbox": [x1, y1, x2, y2]}, ...], ...]}
+  回放时边界框按当前帧与录制帧尺寸之比缩放
+
+用法（生成回放文件）:
+    python inference_backends.py record video.mp4 --landmarks pose.npy --detections boxes.json
+    python inference_backends.py synthesize --landmarks pose.npy --detections boxes.json --object-class dog
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+NUM_LANDMARKS = 33
+
+# MediaPipe Pose的骨架连接（与mp.solutions.pose.POSE_CONNECTIONS相同），回放后端绘图使用
+POSE_CONNECTIONS = frozenset([
+    (0, 1), (1, 2), (2, 3), (3, 7), (0, 4), (4, 5), (5, 6), (6, 8), (9, 10),
+    (11, 12), (11, 13), (13, 15), (15, 17), (15, 19), (15, 21), (17, 19),
+    (12, 14), (14, 16), (16, 18), (16, 20), (16, 22), (18, 20), (11, 23),
+    (12, 24), (23, 24), (23, 25), (24, 26), (25, 27), (26, 28), (27, 29),
+    (28, 30), (29, 31), (30, 32), (27, 31), (28, 32),
+])
+
+class Landmark:
+    """与MediaPipe NormalizedLandmark具有相同属性的轻量关键点。"""
+    __slots__ = ('x', 'y', 'z', 'visibility')
+
+    def __init__(self, x, y, z, visibility):
+        self.x = x
+        self.y = y
+        self.z = z
+        self.visibility = visibility
+
+class PoseLandmarks:
+    """与MediaPipe pose_landmarks相同的访问方式：landmarks.landmark[index]。"""
+    __slots__ = ('landmark',)
+
+    def __init__(self, array):
+        self.landmark = [Landmark(*row) for row in array.tolist()]
+
+def landmark_list(pose_landmarks):
+    """将关键点转换为紧凑的[[x, y, visibility], ...]列表（用于客户端绘制），没有关键点时返回None。"""
+    if pose_landmarks is None:
+        return None
+    return [[round(lm.x, 4), round(lm.y, 4), round(lm.visibility, 2)] for lm in pose_landmarks.landmark]
+
+class PoseResult:
+    """与MediaPipe Pose.process()的返回值相同的访问方式：results.pose_landmarks。"""
+    __slots__ = ('pose_landmarks',)
+
+    def __init__(self, pose_landmarks=None):
+        self.pose_landmarks = pose_landmarks
+
+class _Latency:
+    """人工推理延迟：每次调用睡眠 latency ± jitter 秒（正态分布，截断为非负）。"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self._random = random.Random(seed)
+
+    def wait(self) -> None:
+        if self.latency <= 0 and self.jitter <= 0:
+            return
+        delay = self._random.gauss(self.latency, self.jitter) if self.jitter > 0 else self.latency
+        if delay > 0:
+            time.sleep(delay)
+
+class _Cursor:
+    """回放位置。每个消费者（估计器/检测器）一个，多线程调用时加锁推进。"""
+
+    def __init__(self, length: int, loop: bool):
+        self.length = length
+        self.loop = loop
+        self.index = 0
+        self._lock = threading.Lock()
+
+    def next(self) -> Optional[int]:
+        with self._lock:
+            index = self.index
+            self.index += 1
+        if self.loop:
+            return index % self.length
+        return index if index < self.length else None
+
+# ---------------------------------------------------------------------------
+# 姿态后端
+# ---------------------------------------------------------------------------
+
+class PoseBackend(ABC):
+    """
+    姿态估计后端接口。
+
+    create_estimator() 返回一个新的估计器（具有MediaPipe Pose的 process(frame_rgb) 和 close()），
+    每个会话或每个被跟踪的人使用独立的估计器，各自保持内部状态。
+    后端本身也提供绘图（draw_landmarks）和骨架连接（POSE_CONNECTIONS），
+    因此可以直接替代 mp.solutions.pose 和 mp.solutions.drawing_utils 传入FramePipeline。
+    """
+    name = 'base'
+    POSE_CONNECTIONS = POSE_CONNECTIONS
+
+    @abstractmethod
+    def create_estimator(self):
+        """返回一个新的姿态估计器。"""
+
+    def draw_landmarks(self, frame: np.ndarray, pose_landmarks, connections=None) -> None:
+        """在BGR帧上绘制关键点和骨架（归一化坐标）。"""
+        if pose_landmarks is None:
+            return
+        height, width = frame.shape[:2]
+        points = {}
+        for index, lm in enumerate(pose_landmarks.landmark):
+            if lm.visibility < 0.5:
+                continue
+            points[index] = (int(lm.x * width), int(lm.y * height))
+        for start, end in connections or ():
+            if start in points and end in points:
+                cv2.line(frame, points[start], points[end], (224, 224, 224), 2)
+        for point in points.values():
+            cv2.circle(frame, point, 2, (0, 0, 255), -1)
+
+class MediaPipePoseBackend(PoseBackend):
+    """MediaPipe Pose（默认）。"""
+    name = 'mediapipe'
+
+    def __init__(self, min_detection_confidence: float = 0.5, min_tracking_confidence: float = 0.5):
+        import mediapipe as mp
+
+        self.min_detection_confidence = min_detection_confidence
+        self.min_tracking_confidence = min_tracking_confidence
+        self.mp_pose = mp.solutions.pose
+        self.drawing = mp.solutions.drawing_utils
+        self.POSE_CONNECTIONS = self.mp_pose.POSE_CONNECTIONS
+
+    def create_estimator(self):
+        return self.mp_pose.Pose(
+            static_image_mode=False,
+            min_detection_confidence=self.min_detection_confidence,
+            min_tracking_confidence=self.min_tracking_confidence
+        )
+
+    def draw_landmarks(self, frame: np.ndarray, pose_landmarks, connections=None) -> None:
+        self.drawing.draw_landmarks(frame, pose_landmarks, connections)
+
+class _ReplayPoseEstimator:
+    """回放姿态估计器：每次process()按顺序返回下一帧录制的关键点（忽略输入帧）。"""
+
+    def __init__(self, backend: 'ReplayPoseBackend'):
+        self.backend = backend
+        self.cursor = _Cursor(len(backend.frames), backend.loop)
+        self.latency = _Latency(backend.latency, backend.jitter, backend.seed)
+
+    def process(self, frame_rgb: np.ndarray) -> PoseResult:
+        self.latency.wait()
+        index = self.cursor.next()
+        if index is None or not self.backend.present[index]:
+            return PoseResult(None)
+        # 每次返回新的关键点对象：平滑和多人模式的坐标映射会原地修改关键点
+        return PoseResult(PoseLandmarks(self.backend.frames[index]))
+
+    def close(self) -> None:
+        pass
+
+class ReplayPoseBackend(PoseBackend):
+    """
+    回放预先录制的关键点。
+
+    Args:
+        path: 关键点.npy文件，形状(N, 33, 3或4)
+        latency: 每次推理的人工延迟（秒）
+        jitter: 延迟的标准差（秒）
+        loop: 回放结束后是否从头循环（否则返回没有检测到人）
+        seed: 延迟抖动的随机种子
+    """
+    name = 'replay'
+
+    def __init__(self, path: str, latency: float = 0.0, jitter: float = 0.0,
+                 loop: bool = True, seed: Optional[int] = None):
+        frames = load_landmarks(path)
+        self.path = path
+        self.present = ~np.isnan(frames).any(axis=(1, 2))
+        self.frames = np.nan_to_num(frames)
+        self.latency = latency
+        self.jitter = jitter
+        self.loop = loop
+        self.seed = seed
+
+    def create_estimator(self) -> _ReplayPoseEstimator:
+        return _ReplayPoseEstimator(self)
+
+# ---------------------------------------------------------------------------
+# 检测后端
+# ---------------------------------------------------------------------------
+
+class DetectorBackend(ABC):
+    """
+    目标检测后端接口。
+
+    create_detector() 返回一个新的检测器，detect(frame) 返回本帧的全部检测
+    [{'class', 'confidence', 'bbox': (x1, y1, x2, y2)}]（浮点像素坐标，未按类别过滤），
+    类别和置信度过滤由YOLOTracker完成。
+    """
+    name = 'base'
+    available = True
+
+    @abstractmethod
+    def create_detector(self):
+        """返回一个新的检测器。"""
+
+    def warmup(self, frame: np.ndarray, iterations: int) -> None:
+        """用几次虚拟推理完成首次推理的初始化。"""
+        detector = self.create_detector()
+        for _ in range(iterations):
+            detector.detect(frame)
+
+class _YOLODetector:
+    def __init__(self, model):
+        self.model = model
+
+    def detect(self, frame: np.ndarray) -> List[Dict]:
+        detections = []
+        names = self.model.names
+        for result in self.model(frame, verbose=False):
+            boxes = result.boxes
+            if boxes is None or len(boxes) == 0:
+                continue
+            # 整批转换，避免逐个框访问张量
+            for (x1, y1, x2, y2), class_id, confidence in zip(
+                    boxes.xyxy.tolist(), boxes.cls.tolist(), boxes.conf.tolist()):
+                detections.append({
+                    'class': names[int(class_id)].lower(),
+                    'confidence': float(confidence),
+                    'bbox': (x1, y1, x2, y2),
+                })
+        return detections
+
+class YOLODetectorBackend(DetectorBackend):
+    """Ultralytics YOLO（默认）。模型按权重文件缓存，所有检测器共享。"""
+    name = 'yolo'
+
+    def __init__(self, weights: str = 'yolov8n.pt'):
+        from yolo_tracker import load_yolo_model
+
+        self.weights = weights
+        self.model = None
+        try:
+            self.model = load_yolo_model(weights)
+        except Exception as e:
+            print(f"❌ 加载YOLO模型时出错: {e}")
+        if self.model is None:
+            print("❌ YOLO不可用。请安装依赖项。")
+
+    @property
+    def available(self) -> bool:
+        return self.model is not None
+
+    def create_detector(self) -> _YOLODetector:
+        return _YOLODetector(self.model)
+
+class _ReplayDetector:
+    """回放检测器：每次detect()按顺序返回下一帧录制的检测（按帧尺寸缩放边界框）。"""
+
+    def __init__(self, backend: 'ReplayDetectorBackend'):
+        self.backend = backend
+        self.cursor = _Cursor(len(backend.frames), backend.loop)
+        self.latency = _Latency(backend.latency, backend.jitter, backend.seed)
+
+    def detect(self, frame: np.ndarray) -> List[Dict]:
+        self.latency.wait()
+        index = self.cursor.next()
+        if index is None:
+            return []
+
+        backend = self.backend
+        scale_x = frame.shape[1] / backend.width if backend.width else 1.0
+        scale_y = frame.shape[0] / backend.height if backend.height else 1.0
+        detections = []
+        for detection in backend.frames[index]:
+            x1, y1, x2, y2 = detection['bbox']
+            detections.append({
+                'class': detection['class'],
+                'confidence': detection['confidence'],
+                'bbox': (x1 * scale_x, y1 * scale_y, x2 * scale_x, y2 * scale_y),
+            })
+        return detections
+
+class ReplayDetectorBackend(DetectorBackend):
+    """
+    回放预先录制的检测结果。
+
+    Args:
+        path: 检测.json文件（格式见模块说明）
+        latency, jitter, loop, seed: 同ReplayPoseBackend
+
+    注意：每次detect()推进一帧，同一帧调用两次（例如录制时在原始分辨率帧上再次检测）会前进两帧。
+    """
+    name = 'replay'
+
+    def __init__(self, path: str, latency: float = 0.0, jitter: float = 0.0,
+                 loop: bool = True, seed: Optional[int] = None):
+        data = load_detections(path)
+        self.path = path
+        self.frames = data['frames']
+        self.width = data.get('width')
+        self.height = data.get('height')
+        self.latency = latency
+        self.jitter = jitter
+        self.loop = loop
+        self.seed = seed
+
+    def create_detector(self) -> _ReplayDetector:
+        return _ReplayDetector(self)
+
+    def warmup(self, frame: np.ndarray, iterations: int) -> None:
+        pass
+
+# ---------------------------------------------------------------------------
+# 文件读写
+# ---------------------------------------------------------------------------
+
+def load_landmarks(path: str) -> np.ndarray:
+    """读取录制的关键点（.npy，形状(N, 33, 3或4)），返回(N, 33, 4)。"""
+    data = np.load(path)
+    if data.ndim != 3 or data.shape[1] != NUM_LANDMARKS or data.shape[2] < 3 or len(data) == 0:
+        raise ValueError(f"关键点数组形状应为(N, 33, 3/4)，实际为{data.shape}")
+    if data.shape[2] == 3:
+        data = np.concatenate([data, np.ones(data.shape[:2] + (1,))], axis=2)
+    return data[:, :, :4].astype(np.float64)
+
+def save_landmarks(path: str, frames: List) -> None:
+    """
+    保存关键点序列。
+
+    Args:
+        frames: 每帧的pose_landmarks（MediaPipe或PoseLandmarks）或(33, 4)数组，None表示没有检测到人
+    """
+    data = np.full((len(frames), NUM_LANDMARKS, 4), np.nan)
+    for index, landmarks in enumerate(frames):
+        if landmarks is None:
+            continue
+        if isinstance(landmarks, np.ndarray):
+            data[index] = landmarks[:, :4]
+        else:
+            data[index] = [(lm.x, lm.y, lm.z, lm.visibility) for lm in landmarks.landmark]
+    np.save(path, data)
+
+def load_detections(path: str) -> Dict:
+    """读取录制的检测结果（.json），也接受只有帧列表的文件。"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        data = {'frames': data}
+    if not data.get('frames'):
+        raise ValueError(f"检测文件没有帧: {path}")
+    for detections in data['frames']:
+        for detection in detections:
+            detection['class'] = str(detection['class']).lower()
+            detection['confidence'] = float(detection.get('confidence', 1.0))
+            detection['bbox'] = tuple(float(v) for v in detection['bbox'])
+    return data
+
+def save_detections(path: str, frames: List[List[Dict]], width: Optional[int] = None,
+                    height: Optional[int] = None, fps: Optional[float] = None) -> None:
+    """保存每帧的检测列表（只保留class、confidence和bbox）。"""
+    data = {
+        'width': width,
+        'height': height,
+        'fps': fps,
+        'frames': [[{
+            'class': detection['class'],
+            'confidence': round(float(detection['confidence']), 4),
+            'bbox': [round(float(v), 2) for v in detection['bbox']],
+        } for detection in detections] for detections in frames],
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+# ---------------------------------------------------------------------------
+# 后端选择
+# ---------------------------------------------------------------------------
+
+def _env_seconds(name: str) -> float:
+    return float(os.environ.get(name, 0) or 0) / 1000.0
+
+def create_pose_backend(spec: str = 'mediapipe', latency: Optional[float] = None,
+                        jitter: Optional[float] = None) -> PoseBackend:
+    """
+    按规格字符串创建姿态后端：'mediapipe' 或 'replay:<关键点.npy>'。
+    latency/jitter（秒）未指定时读取 INFERENCE_LATENCY_MS / INFERENCE_JITTER_MS。
+    """
+    kind, _, argument = spec.partition(':')
+    if kind == 'mediapipe':
+        return MediaPipePoseBackend()
+    if kind == 'replay':
+        if not argument:
+            raise ValueError("回放姿态后端需要关键点文件: replay:<path.npy>")
+        return ReplayPoseBackend(
+            argument,
+            latency=_env_seconds('INFERENCE_LATENCY_MS') if latency is None else latency,
+            jitter=_env_seconds('INFERENCE_JITTER_MS') if jitter is None else jitter
+        )
+    raise ValueError(f"未知的姿态后端: {spec}（可选: mediapipe, replay:<path>）")
+
+def create_detector_backend(spec: str = 'yolo', latency: Optional[float] = None,
+                            jitter: Optional[float] = None) -> DetectorBackend:
+    """按规格字符串创建检测后端：'yolo'、'yolo:<权重>' 或 'replay:<检测.json>'。"""
+    kind, _, argument = spec.partition(':')
+    if kind == 'yolo':
+        return YOLODetectorBackend(argument or 'yolov8n.pt')
+    if kind == 'replay':
+        if not argument:
+            raise ValueError("回放检测后端需要检测文件: replay:<path.json>")
+        return ReplayDetectorBackend(
+            argument,
+            latency=_env_seconds('INFERENCE_LATENCY_MS') if latency is None else latency,
+            jitter=_env_seconds('INFERENCE_JITTER_MS') if jitter is None else jitter
+        )
+    raise ValueError(f"未知的检测后端: {spec}（可选: yolo, yolo:<weights>, replay:<path>）")
+
+_pose_backend = None
+_detector_backend = None
+_backend_specs = {'pose': None, 'detector': None, 'latency': None, 'jitter': None}
+_backend_lock = threading.Lock()
+
+def configure_backends(pose: Optional[str] = None, detector: Optional[str] = None,
+                       latency: Optional[float] = None, jitter: Optional[float] = None) -> None:
+    """
+    设置后端规格（覆盖环境变量）。后端在首次使用时才创建，
+    因此启动时配置不会同步加载模型（模型加载仍在预热线程中进行）。
+    """
+    global _pose_backend, _detector_backend
+    with _backend_lock:
+        _backend_specs.update(pose=pose, detector=detector, latency=latency, jitter=jitter)
+        _pose_backend = None
+        _detector_backend = None
+
+def get_pose_backend() -> PoseBackend:
+    """当前的姿态后端（首次调用时创建，默认按POSE_BACKEND环境变量或mediapipe）。"""
+    global _pose_backend
+    with _backend_lock:
+        if _pose_backend is None:
+            spec = _backend_specs['pose'] or os.environ.get('POSE_BACKEND', 'mediapipe')
+            _pose_backend = create_pose_backend(spec, _backend_specs['latency'], _backend_specs['jitter'])
+        return _pose_backend
+
+def get_detector_backend() -> DetectorBackend:
+    """当前的检测后端（首次调用时创建，默认按DETECTOR_BACKEND环境变量或yolo）。"""
+    global _detector_backend
+    with _backend_lock:
+        if _detector_backend is None:
+            spec = _backend_specs['detector'] or os.environ.get('DETECTOR_BACKEND', 'yolo')
+            _detector_backend = create_detector_backend(spec, _backend_specs['latency'], _backend_specs['jitter'])
+        return _detector_backend
+
+def set_pose_backend(backend) -> PoseBackend:
+    """设置姿态后端（后端实例或规格字符串），之后创建的估计器使用新后端。"""
+    global _pose_backend
+    if isinstance(backend, str):
+        backend = create_pose_backend(backend)
+    with _backend_lock:
+        _pose_backend = backend
+    return backend
+
+def set_detector_backend(backend) -> DetectorBackend:
+    """设置检测后端（后端实例或规格字符串），之后创建的跟踪器使用新后端。"""
+    global _detector_backend
+    if isinstance(backend, str):
+        backend = create_detector_backend(backend)
+    with _backend_lock:
+        _detector_backend = backend
+    return backend
+
+# ---------------------------------------------------------------------------
+# 生成回放文件
+# ---------------------------------------------------------------------------
+
+def record_video(video_path: str, landmarks_path: Optional[str] = None,
+                 detections_path: Optional[str] = None, max_frames: Optional[int] = None) -> int:
+    """用真实模型处理视频，保存每帧的关键点和/或检测结果，返回处理的帧数。"""
+    capture = cv2.VideoCapture(video_path)
+    if not capture.isOpened():
+        raise RuntimeError(f"无法打开视频: {video_path}")
+    fps = capture.get(cv2.CAP_PROP_FPS) or None
+    width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    estimator = MediaPipePoseBackend().create_estimator() if landmarks_path else None
+    detector = YOLODetectorBackend().create_detector() if detections_path else None
+    landmarks, detections = [], []
+    frames = 0
+    try:
+        while max_frames is None or frames < max_frames:
+            ret, frame = capture.read()
+            if not ret:
+                break
+            frames += 1
+            if estimator is not None:
+                landmarks.append(estimator.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)).pose_landmarks)
+            if detector is not None:
+                detections.append(detector.detect(frame))
+    finally:
+        capture.release()
+        if estimator is not None:
+            estimator.close()
+
+    if landmarks_path:
+        save_landmarks(landmarks_path, landmarks)
+    if detections_path:
+        save_detections(detections_path, detections, width, height, fps)
+    return frames
+
+def synthesize(frames: int, landmarks_path: Optional[str] = None, detections_path: Optional[str] = None,
+               object_classes: Optional[List[str]] = None, width: int = 1280, height: int = 720,
+               fps: float = 30.0) -> None:
+    """生成合成的回放文件：关键点上下运动（人体动作），每个类别一个上下弹跳的边界框。"""
+    from benchmark_counters import synthetic_detections, synthetic_landmarks
+
+    if landmarks_path:
+        save_landmarks(landmarks_path, list(synthetic_landmarks(frames)))
+    if detections_path:
+        per_class = [synthetic_detections(frames, object_class, seed=i)
+                     for i, object_class in enumerate(object_classes or ['sports ball'])]
+        stream = []
+        for index in range(frames):
+            detections = []
+            for offset, class_stream in enumerate(per_class):
+                for detection in class_stream[index]:
+                    x1, y1, x2, y2 = detection['bbox']
+                    shift = offset * 150.0  # 不同类别水平错开
+                    detections.append(dict(detection, bbox=(x1 + shift, y1, x2 + shift, y2)))
+            stream.append(detections)
+        save_detections(detections_path, stream, width, height, fps)
+
+def main():
+    parser = argparse.ArgumentParser(description="生成推理回放文件")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = subparsers.add_parser('record', help="用真实模型处理视频并保存结果")
+    record_parser.add_argument('video', help="输入视频")
+    record_parser.add_argument('--landmarks', help="输出关键点.npy")
+    record_parser.add_argument('--detections', help="输出检测.json")
+    record_parser.add_argument('--max-frames', type=int, help="最多处理的帧数")
+
+    synth_parser = subparsers.add_parser('synthesize', help="生成合成的回放文件（不需要模型）")
+    synth_parser.add_argument('--landmarks', help="输出关键点.npy")
+    synth_parser.add_argument('--detections', help="输出检测.json")
+    synth_parser.add_argument('--object-class', action='append', help="检测类别（可多次指定，默认sports ball）")
+    synth_parser.add_argument('--frames', type=int, default=3000, help="帧数")
+    synth_parser.add_argument('--width', type=int, default=1280, help="检测坐标对应的帧宽度")
+    synth_parser.add_argument('--height', type=int, default=720, help="检测坐标对应的帧高度")
+    synth_parser.add_argument('--fps', type=float, default=30.0, help="帧率")
+
+    args = parser.parse_args()
+    if not args.landmarks and not args.detections:
+        parser.error("至少需要 --landmarks 或 --detections")
+
+    if args.command == 'record':
+        frames = record_video(args.video, args.landmarks, args.detections, args.max_frames)
+    else:
+        synthesize(args.frames, args.landmarks, args.detections, args.object_class,
+                   args.width, args.height, args.fps)
+        frames = args.frames
+    print(f"✅ 已生成 {frames} 帧的回放文件")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+LLM响应缓存和并发批量生成。
+以(渲染后的提示, 模型, 选项)为键将LLM原始响应缓存在本地磁盘，
+相同的提示再次运行时直接返回缓存结果，不再调用模型。
+只缓存通过调用方校验（能被解析）的响应，错误的响应不会在之后的运行中被反复重放。
+
+环境变量:
+    LLM_CACHE_DIR: 缓存目录（默认 ./.llm_cache）
+    LLM_CACHE_DISABLE: 设为 1/true 时禁用缓存
+    LLM_MAX_WORKERS: 批量生成的最大并发数（默认 4）
+    OLLAMA_HOST: Ollama服务地址，可指向本地替身服务用于测试
+"""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+CACHE_DIR = os.environ.get('LLM_CACHE_DIR', './.llm_cache')
+DEFAULT_MAX_WORKERS = int(os.environ.get('LLM_MAX_WORKERS', '4'))
+
+# 同一个键的并发请求只调用一次模型
+_key_locks = {}
+_key_locks_guard = threading.Lock()
+
+def cache_enabled():
+    """缓存是否启用（可通过LLM_CACHE_DISABLE环境变量关闭）。"""
+    return os.environ.get('LLM_CACHE_DISABLE', '').lower() not in ('1', 'true', 'yes')
+
+def cache_key(prompt, model, options=None):
+    """返回(提示, 模型, 选项)的SHA-256缓存键。"""
+    payload = json.dumps({'prompt': prompt, 'model': model, 'options': options or {}},
+                         sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def _cache_path(key):
+    return os.path.join(CACHE_DIR, key[:2], f"{key}.json")
+
+def load_cached(key):
+    """读取缓存的响应文本，未命中时返回None。"""
+    try:
+        with open(_cache_path(key), 'r', encoding='utf-8') as f:
+            return json.load(f)['response']
+    except (OSError, ValueError, KeyError):
+        return None
+
+def store_cached(key, prompt, model, options, response):
+    """原子地将响应写入缓存。"""
+    path = _cache_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    entry = {
+        'model': model,
+        'options': options or {},
+        'prompt': prompt,
+        'response': response,
+        'created_at': time.time()
+    }
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp_', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _lock_for(key):
+    with _key_locks_guard:
+        return _key_locks.setdefault(key, threading.Lock())
+
+def _is_valid(response, validate):
+    """用调用方的校验函数检查响应：抛出异常或返回False视为无效。"""
+    if validate is None:
+        return True
+    try:
+        return validate(response) is not False
+    except Exception:
+        return False
+
+def cached_completion(prompt, model, generate, options=None, validate=None):
+    """
+    返回提示的LLM响应文本，优先使用磁盘缓存。
+
+    Args:
+        prompt: 渲染后的提示文本
+        model: 模型名称（例如 'llama3'）
+        generate: 无参数的可调用对象，缓存未命中时调用并返回响应文本；
+                  调用失败时应抛出异常，失败的响应不会被缓存
+        options: 影响输出的其他选项（例如 format、temperature），参与缓存键
+        validate: 可选的 validate(response) 校验函数（通常就是调用方的解析函数），
+                  抛出异常或返回False时响应不会被缓存，已缓存的无效响应会被丢弃并重新生成
+
+    Returns:
+        str: 响应文本
+    """
+    if not cache_enabled():
+        return generate()
+
+    key = cache_key(prompt, model, options)
+    with _lock_for(key):
+        cached = load_cached(key)
+        if cached is not None:
+            if _is_valid(cached, validate):
+                print(f"💾 LLM缓存命中 ({model}, {key[:12]})")
+                return cached
+            print(f"⚠️  丢弃无效的LLM缓存 ({model}, {key[:12]})")
+
+        response = generate()
+        if not _is_valid(response, validate):
+            # 返回给调用方处理（回退到默认值等），但不写入缓存，下次运行会重新调用模型
+            return response
+        try:
+            store_cached(key, prompt, model, options, response)
+        except OSError as e:
+            print(f"⚠️  无法写入LLM缓存: {e}")
+        return response
+
+def run_concurrent(func, items, max_workers=None, on_error=None):
+    """
+    使用有界线程池并发地对每个项目调用func，按输入顺序返回结果。
+
+    Args:
+        func: 对单个项目调用的函数
+        items: 项目列表
+        max_workers: 最大并发数（默认 LLM_MAX_WORKERS）
+        on_error: 可选的 on_error(item, exception) 回调，其返回值作为该项目的结果；
+                  未提供时异常会被重新抛出
+
+    Returns:
+        list: 与items顺序一致的结果列表
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    workers = max(1, min(max_workers or DEFAULT_MAX_WORKERS, len(items)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-worker") as executor:
+        futures = [executor.submit(func, item) for item in items]
+        results = []
+        for item, future in zip(items, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                if on_error is None:
+                    raise
+                results.append(on_error(item, e))
+    return results
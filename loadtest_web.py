@@ -0,0 +1,466 @@
+"""
+web_app的HTTP负载测试。
+在本地启动一个使用回放推理后端（见inference_backends，不需要模型）的web_app进程，
+播放合成视频，然后按级别逐步增加并发的MJPEG观看者（/video_feed）和会话数据轮询者
+（/get_session_data），测量每个客户端收到的帧率、JPEG字节率、轮询延迟，
+以及服务器处理线程的帧率（来自/metrics）和进程CPU占用，输出饱和曲线。
+
+用法:
+    python loadtest_web.py                                   # 默认级别 0,1,2,4,8,16
+    python loadtest_web.py --levels 0,4,16,64 --duration 10 --latency-ms 20
+    python loadtest_web.py --counter SportsBallCounter --pollers-per-viewer 2 --plot curve.png
+    python loadtest_web.py --url http://127.0.0.1:5000       # 测试已经在运行的服务器（不启动新进程）
+    python loadtest_web.py --viewer-quality auto --viewer-kbps 200   # 模拟慢速客户端，观察自适应档位
+    python loadtest_web.py --viewer-stream h264              # 观看者读取/video_mp4（需要ffmpeg）
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from h264_stream import STREAM_FPS
+from stream_tiers import QUALITY_AUTO, STREAM_TIERS
+
+try:
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    MATPLOTLIB_AVAILABLE = True
+except ImportError:
+    MATPLOTLIB_AVAILABLE = False
+
+MJPEG_BOUNDARY = b'--frame\r\n'
+TIER_FPS = {tier.name: tier.fps for tier in STREAM_TIERS}  # 固定档位观看者的目标帧率
+H264_FPS = STREAM_FPS  # /video_mp4的编码帧率
+READ_SIZE = 64 * 1024
+THROTTLED_READ_SIZE = 4 * 1024
+THROTTLED_RECV_BUFFER = 64 * 1024  # 限速客户端的接收缓冲区（让服务器尽快感受到背压）
+
+class MJPEGClient(threading.Thread):
+    """
+    读取/video_feed的MJPEG流，统计收到的帧数和字节数。
+    max_kbps不为None时按该速率读取，模拟带宽受限的客户端。
+    """
+
+    MARKER = MJPEG_BOUNDARY  # 每帧出现一次的字节序列
+
+    def __init__(self, host, port, stop_event, timeout=2.0, quality='high', max_kbps=None):
+        super().__init__(daemon=True)
+        self.host = host
+        self.port = port
+        self.stop_event = stop_event
+        self.timeout = timeout
+        self.quality = quality
+        self.max_kbps = max_kbps
+        self.frames = 0
+        self.bytes = 0
+        self.error = None
+
+    def run(self):
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        read_size = READ_SIZE
+        try:
+            if self.max_kbps:
+                connection.connect()
+                connection.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, THROTTLED_RECV_BUFFER)
+                read_size = THROTTLED_READ_SIZE
+            connection.request('GET', self.path())
+            response = connection.getresponse()
+            if response.status != 200:
+                raise RuntimeError(f"HTTP {response.status}: {response.read()[:200].decode('utf-8', 'replace')}")
+            tail = b''
+            start = time.perf_counter()
+            while not self.stop_event.is_set():
+                try:
+                    chunk = response.read1(read_size)
+                except socket.timeout:
+                    continue
+                if not chunk:
+                    break
+                # 边界可能跨越两次读取：带上上一块末尾的几个字节一起查找
+                data = tail + chunk
+                self.frames += data.count(self.MARKER)
+                tail = data[-(len(self.MARKER) - 1):]
+                self.bytes += len(chunk)
+                if self.max_kbps:
+                    # 读得比限速快时等待
+                    ahead = self.bytes / (self.max_kbps * 1024) - (time.perf_counter() - start)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        except Exception as e:
+            if not self.stop_event.is_set():
+                self.error = str(e)
+        finally:
+            connection.close()
+
+    def path(self):
+        return f'/video_feed?quality={self.quality}'
+
+class MP4Client(MJPEGClient):
+    """读取/video_mp4的H.264 fMP4流（每帧一个moof分片）。"""
+
+    MARKER = b'moof'
+
+    def path(self):
+        return '/video_mp4'
+
+class SessionPoller(threading.Thread):
+    """
+    按固定间隔轮询/get_session_data，记录每次请求的延迟和响应大小。
+    incremental为True时与前端的轮询回退相同：使用since游标和If-None-Match，
+    否则每次请求完整的会话数据。
+    """
+
+    def __init__(self, host, port, stop_event, interval=1.0, timeout=5.0, incremental=True):
+        super().__init__(daemon=True)
+        self.host = host
+        self.port = port
+        self.stop_event = stop_event
+        self.interval = interval
+        self.timeout = timeout
+        self.incremental = incremental
+        self.latencies = []
+        self.bytes = 0
+        self.errors = 0
+        self.not_modified = 0
+        self._cursor = 0
+        self._etag = None
+
+    def _poll(self, connection):
+        if not self.incremental:
+            connection.request('GET', '/get_session_data')
+            return len(connection.getresponse().read())
+
+        headers = {'If-None-Match': self._etag} if self._etag else {}
+        connection.request('GET', f'/get_session_data?since={self._cursor}', headers=headers)
+        response = connection.getresponse()
+        body = response.read()
+        if response.status == 304:
+            self.not_modified += 1
+            return 0
+        self._etag = response.getheader('ETag')
+        self._cursor = json.loads(body).get('next', self._cursor)
+        return len(body)
+
+    def run(self):
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        next_poll = time.perf_counter()
+        try:
+            while not self.stop_event.is_set():
+                start = time.perf_counter()
+                try:
+                    self.bytes += self._poll(connection)
+                    self.latencies.append(time.perf_counter() - start)
+                except Exception:
+                    self.errors += 1
+                    connection.close()
+                    connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                next_poll += self.interval
+                self.stop_event.wait(max(0.0, next_poll - time.perf_counter()))
+        finally:
+            connection.close()
+
+def process_cpu_seconds(pid):
+    """进程累计的用户态+内核态CPU时间（秒，读取/proc），不支持时返回None。"""
+    try:
+        with open(f'/proc/{pid}/stat', 'r') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        # 第14、15个字段（utime、stime），去掉pid和comm后的下标为11、12
+        return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+    except (OSError, IndexError, ValueError):
+        return None
+
+def http_request(host, port, method, path, body=None, timeout=10.0):
+    """发送一个请求，返回(状态码, 响应体)。"""
+    connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        connection.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+        response = connection.getresponse()
+        return response.status, response.read()
+    finally:
+        connection.close()
+
+def frames_processed(host, port):
+    """从/metrics读取处理线程已处理的帧数。"""
+    _, body = http_request(host, port, 'GET', '/metrics')
+    for line in body.decode('utf-8').splitlines():
+        if line.startswith('multi_counter_frames_total'):
+            return float(line.rsplit(' ', 1)[1])
+    return 0.0
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def prepare_replay(workdir, counter, reps, fps, width, height):
+    """生成合成视频和对应的回放文件，返回(视频路径, 关键点路径, 检测路径)。"""
+    from benchmark_pipeline import render_ball_video, render_stick_figure_video
+    from inference_backends import synthesize
+
+    video_path = os.path.join(workdir, 'loadtest.mp4')
+    render = render_stick_figure_video if counter in ('SquatCounter',) else render_ball_video
+    video = render(video_path, reps=reps, fps=fps, size=(width, height))
+
+    landmarks_path = os.path.join(workdir, 'pose.npy')
+    detections_path = os.path.join(workdir, 'boxes.json')
+    synthesize(video['frames'], landmarks_path, detections_path,
+               ['sports ball', 'dog', 'cat', 'person'], width, height, fps)
+    return video_path, landmarks_path, detections_path
+
+def start_server(port, landmarks_path, detections_path, latency_ms, jitter_ms, log_path):
+    """启动使用回放后端的web_app子进程，等待/ready后返回进程。"""
+    command = [sys.executable, 'web_app.py', '--port', str(port),
+               '--pose-backend', f'replay:{landmarks_path}',
+               '--detector-backend', f'replay:{detections_path}',
+               '--inference-latency-ms', str(latency_ms),
+               '--inference-jitter-ms', str(jitter_ms)]
+    log = open(log_path, 'w')
+    process = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)),
+                               stdout=log, stderr=subprocess.STDOUT)
+
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"web_app启动失败，日志: {log_path}")
+        try:
+            status, _ = http_request('127.0.0.1', port, 'GET', '/ready', timeout=1.0)
+            if status == 200:
+                return process
+        except OSError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"web_app在60秒内没有就绪，日志: {log_path}")
+
+def stream_tiers_in_use(host, port):
+    """从/stream_stats读取各档位的观看者数量。"""
+    _, body = http_request(host, port, 'GET', '/stream_stats')
+    tiers = {}
+    for client in json.loads(body).get('clients', []):
+        tiers[client['tier']] = tiers.get(client['tier'], 0) + 1
+    return tiers
+
+def run_level(host, port, pid, viewers, pollers, duration, warmup, poll_interval, incremental=True,
+              quality='high', max_kbps=None, stream='mjpeg'):
+    """运行一个负载级别，返回该级别的测量结果。"""
+    stop_event = threading.Event()
+    client_class = MP4Client if stream == 'h264' else MJPEGClient
+    mjpeg_clients = [client_class(host, port, stop_event, quality=quality, max_kbps=max_kbps)
+                     for _ in range(viewers)]
+    poll_clients = [SessionPoller(host, port, stop_event, poll_interval, incremental=incremental)
+                    for _ in range(pollers)]
+    for client in mjpeg_clients + poll_clients:
+        client.start()
+
+    # 预热：等待连接建立和帧率稳定后再开始测量
+    time.sleep(warmup)
+    frames_before = frames_processed(host, port)
+    cpu_before = process_cpu_seconds(pid) if pid else None
+    received_before = [(c.frames, c.bytes) for c in mjpeg_clients]
+    polls_before = [len(c.latencies) for c in poll_clients]
+    poll_bytes_before = sum(c.bytes for c in poll_clients)
+    start = time.perf_counter()
+
+    time.sleep(duration)
+
+    elapsed = time.perf_counter() - start
+    frames_after = frames_processed(host, port)
+    cpu_after = process_cpu_seconds(pid) if pid else None
+    client_fps = [(c.frames - f) / elapsed for c, (f, _) in zip(mjpeg_clients, received_before)]
+    client_bps = [(c.bytes - b) / elapsed for c, (_, b) in zip(mjpeg_clients, received_before)]
+    latencies = [latency for c, n in zip(poll_clients, polls_before) for latency in c.latencies[n:]]
+    poll_bytes = sum(c.bytes for c in poll_clients) - poll_bytes_before
+    tiers = stream_tiers_in_use(host, port) if viewers and stream == 'mjpeg' else {}
+
+    stop_event.set()
+    for client in mjpeg_clients + poll_clients:
+        client.join(timeout=5)
+
+    return {
+        'viewers': viewers,
+        'pollers': pollers,
+        'duration': round(elapsed, 3),
+        'processing_fps': round((frames_after - frames_before) / elapsed, 2),
+        'cpu_percent': round((cpu_after - cpu_before) / elapsed * 100, 1)
+                       if cpu_before is not None and cpu_after is not None else None,
+        'viewer_fps_mean': round(float(np.mean(client_fps)), 2) if client_fps else None,
+        'viewer_fps_min': round(float(np.min(client_fps)), 2) if client_fps else None,
+        'viewer_kbytes_per_second': round(float(np.mean(client_bps)) / 1024, 1) if client_bps else None,
+        'total_mbytes_per_second': round(float(np.sum(client_bps)) / (1024 * 1024), 2) if client_bps else 0.0,
+        'polls_per_second': round(len(latencies) / elapsed, 2),
+        'poll_p50_ms': round(float(np.percentile(latencies, 50)) * 1000, 2) if latencies else None,
+        'poll_p95_ms': round(float(np.percentile(latencies, 95)) * 1000, 2) if latencies else None,
+        'poll_bytes_per_request': round(poll_bytes / len(latencies), 1) if latencies else None,
+        'viewer_tiers': tiers,
+        'errors': sum(1 for c in mjpeg_clients if c.error) + sum(c.errors for c in poll_clients),
+    }
+
+def find_saturation(levels, collapse_ratio, quality='high'):
+    """
+    饱和点：处理帧率低于无客户端基线的collapse_ratio，或（固定档位时）观看者平均帧率低于
+    档位帧率的collapse_ratio的第一个级别。返回(最后一个可持续的级别, 饱和级别)。
+    自适应档位的观看者会主动降低帧率，因此只按处理帧率判断。
+    """
+    baseline = levels[0]['processing_fps'] if levels else 0
+    target_fps = H264_FPS if quality == 'h264' else TIER_FPS.get(quality)
+    sustained = None
+    for level in levels:
+        fps_collapsed = baseline and level['processing_fps'] < baseline * collapse_ratio
+        viewers_starved = (target_fps is not None and level['viewer_fps_mean'] is not None
+                           and level['viewer_fps_mean'] < target_fps * collapse_ratio)
+        if fps_collapsed or viewers_starved:
+            return sustained, level
+        sustained = level
+    return sustained, None
+
+def _format(value, pattern):
+    return '-' if value is None else format(value, pattern)
+
+def print_table(levels):
+    header = (f"{'观看者':>6}{'轮询者':>7}{'处理FPS':>10}{'CPU%':>8}{'观看FPS':>9}{'最低FPS':>9}"
+              f"{'KB/s/客户端':>12}{'总MB/s':>9}{'轮询p50':>9}{'轮询p95':>9}{'轮询B/次':>9}{'错误':>6}")
+    print(header)
+    print('-' * len(header))
+    for level in levels:
+        print(f"{level['viewers']:>6}{level['pollers']:>7}{level['processing_fps']:>10.1f}"
+              f"{_format(level['cpu_percent'], '.1f'):>8}{_format(level['viewer_fps_mean'], '.1f'):>9}"
+              f"{_format(level['viewer_fps_min'], '.1f'):>9}{_format(level['viewer_kbytes_per_second'], '.0f'):>12}"
+              f"{level['total_mbytes_per_second']:>9.2f}{_format(level['poll_p50_ms'], '.1f'):>9}"
+              f"{_format(level['poll_p95_ms'], '.1f'):>9}{_format(level['poll_bytes_per_request'], '.0f'):>9}"
+              f"{level['errors']:>6}")
+
+def plot_curve(levels, path):
+    """保存饱和曲线图（需要matplotlib）。"""
+    viewers = [level['viewers'] for level in levels]
+    fig, ax = plt.subplots(figsize=(8, 5))
+    ax.plot(viewers, [level['processing_fps'] for level in levels], 'o-', label='processing FPS')
+    ax.plot(viewers, [level['viewer_fps_mean'] or 0 for level in levels], 's-', label='viewer FPS (mean)')
+    ax.set_xlabel('MJPEG viewers')
+    ax.set_ylabel('FPS')
+    ax2 = ax.twinx()
+    ax2.plot(viewers, [level['cpu_percent'] or 0 for level in levels], 'r--', label='server CPU %')
+    ax2.set_ylabel('CPU %')
+    ax.legend(loc='upper left')
+    ax2.legend(loc='upper right')
+    fig.tight_layout()
+    fig.savefig(path)
+
+def main():
+    parser = argparse.ArgumentParser(description="web_app负载测试（回放推理后端）")
+    parser.add_argument('--levels', default='0,1,2,4,8,16', help="MJPEG观看者数量级别（逗号分隔）")
+    parser.add_argument('--pollers-per-viewer', type=float, default=1.0, help="每个观看者对应的轮询者数量")
+    parser.add_argument('--poll-interval', type=float, default=1.0, help="轮询间隔（秒，前端为1秒）")
+    parser.add_argument('--full-poll', action='store_true', help="轮询完整的会话数据（默认使用since游标和ETag）")
+    parser.add_argument('--duration', type=float, default=8.0, help="每个级别的测量时长（秒）")
+    parser.add_argument('--warmup', type=float, default=2.0, help="每个级别开始测量前的等待时间（秒）")
+    parser.add_argument('--viewer-quality', default='high', choices=[QUALITY_AUTO] + list(TIER_FPS),
+                        help="观看者请求的流质量（默认high，与自适应之前的固定设置相同）")
+    parser.add_argument('--viewer-stream', choices=['mjpeg', 'h264'], default='mjpeg',
+                        help="观看者读取的视频流：MJPEG（/video_feed）或H.264 fMP4（/video_mp4）")
+    parser.add_argument('--viewer-kbps', type=float, help="限制每个观看者的读取速率（KB/s），模拟慢速客户端")
+    parser.add_argument('--counter', default='SquatCounter', help="使用的计数器")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="回放后端每次推理的人工延迟（毫秒）")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="人工延迟的标准差（毫秒）")
+    parser.add_argument('--realtime', action='store_true', help="按视频帧率播放（默认不节流，测量最大处理能力）")
+    parser.add_argument('--reps', type=int, default=10, help="合成视频中的动作次数")
+    parser.add_argument('--fps', type=int, default=30, help="合成视频的帧率")
+    parser.add_argument('--width', type=int, default=1280, help="合成视频宽度")
+    parser.add_argument('--height', type=int, default=720, help="合成视频高度")
+    parser.add_argument('--collapse-ratio', type=float, default=0.8, help="判定饱和的帧率比例")
+    parser.add_argument('--url', help="测试已经在运行的服务器（不启动新进程，也不测量CPU）")
+    parser.add_argument('--video-source', help="与--url一起使用：要播放的视频源")
+    parser.add_argument('--output', help="结果JSON路径（默认 benchmark_results/loadtest_<时间>.json）")
+    parser.add_argument('--plot', help="保存饱和曲线图（需要matplotlib）")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.levels.split(',') if level.strip()]
+    workdir = tempfile.mkdtemp(prefix='loadtest_')
+    process = None
+    try:
+        if args.url:
+            parts = urlsplit(args.url)
+            host, port = parts.hostname, parts.port or 80
+            video_path = args.video_source or '0'
+            pid = None
+        else:
+            print("🎬 正在生成合成视频和回放文件...")
+            video_path, landmarks_path, detections_path = prepare_replay(
+                workdir, args.counter, args.reps, args.fps, args.width, args.height)
+            host, port = '127.0.0.1', free_port()
+            log_path = os.path.join(workdir, 'web_app.log')
+            print(f"🚀 正在启动web_app（端口 {port}，日志 {log_path}）...")
+            process = start_server(port, landmarks_path, detections_path,
+                                   args.latency_ms, args.jitter_ms, log_path)
+            pid = process.pid
+
+        status, body = http_request(host, port, 'POST', '/start_counter', {
+            'counter': args.counter, 'video_source': video_path, 'realtime': args.realtime})
+        if status != 200:
+            raise RuntimeError(f"启动计数器失败: {body.decode('utf-8', 'replace')}")
+
+        results = []
+        for viewers in levels:
+            pollers = int(round(viewers * args.pollers_per_viewer))
+            print(f"📈 级别: {viewers} 个观看者, {pollers} 个轮询者...")
+            results.append(run_level(host, port, pid, viewers, pollers, args.duration, args.warmup,
+                                     args.poll_interval, incremental=not args.full_poll,
+                                     quality=args.viewer_quality, max_kbps=args.viewer_kbps,
+                                     stream=args.viewer_stream))
+
+        http_request(host, port, 'POST', '/stop_counter')
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    print()
+    print_table(results)
+    sustained, saturated = find_saturation(
+        results, args.collapse_ratio, 'h264' if args.viewer_stream == 'h264' else args.viewer_quality)
+    print()
+    if saturated is None:
+        print(f"✅ 在测试的所有级别下都没有饱和（最多 {levels[-1]} 个观看者）")
+    else:
+        print(f"⚠️  饱和于 {saturated['viewers']} 个观看者: 处理 {saturated['processing_fps']:.1f} FPS, "
+              f"观看 {_format(saturated['viewer_fps_mean'], '.1f')} FPS")
+        if sustained is not None:
+            print(f"   最后一个可持续的级别: {sustained['viewers']} 个观看者")
+
+    output = args.output
+    if not output:
+        os.makedirs('benchmark_results', exist_ok=True)
+        output = os.path.join('benchmark_results', f"loadtest_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'config': vars(args),
+            'levels': results,
+            'sustained_viewers': sustained['viewers'] if sustained else None,
+            'saturated_viewers': saturated['viewers'] if saturated else None,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"💾 结果已保存: {output}")
+
+    if args.plot:
+        if MATPLOTLIB_AVAILABLE:
+            plot_curve(results, args.plot)
+            print(f"📊 饱和曲线已保存: {args.plot}")
+        else:
+            print("⚠️  未安装matplotlib，跳过绘图")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+会话性能指标。
+记录每帧各处理阶段（解码、缩放、颜色转换、推理、计数器更新、覆盖层绘制、录制、编码）
+的耗时直方图，以及“动作完成 → 计数增加”的延迟分布，并以Prometheus文本格式导出。
+
+直方图按线程分片：每个线程只写自己的分片（只做整数/浮点累加，不加锁），
+读取时合并所有分片，因此处理线程和多个流式传输线程可以同时记录而互不阻塞。
+"""
+
+import bisect
+import threading
+import time
+from typing import Dict, List, Optional
+
+# 阶段耗时的桶边界（秒），覆盖0.1毫秒到2秒
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.0075, 0.01,
+                 0.015, 0.02, 0.03, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1.0, 2.0)
+
+# 动作到计数延迟的桶边界（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.02, 0.03, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3,
+                   0.5, 0.75, 1.0, 2.0, 5.0)
+
+# 处理阶段（按流水线顺序）
+STAGES = ('decode', 'resize', 'color_convert', 'inference', 'counter_update',
+          'overlay_draw', 'record', 'encode')
+
+METRIC_PREFIX = 'multi_counter'
+
+class _Shard:
+    """单个线程的直方图分片。"""
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.total = 0.0
+        self.count = 0
+
+class Histogram:
+    """
+    固定桶的按线程分片直方图。
+    observe()只写当前线程的分片（不加锁）；只有线程第一次记录时才在锁内注册分片。
+    """
+
+    def __init__(self, buckets=STAGE_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._shards: List[_Shard] = []
+        self._register_lock = threading.Lock()
+        self._local = threading.local()
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = _Shard(len(self.buckets) + 1)  # 最后一个为+Inf桶
+            with self._register_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def observe(self, value: float) -> None:
+        """记录一个观测值（秒）。"""
+        shard = self._shard()
+        shard.counts[bisect.bisect_left(self.buckets, value)] += 1
+        shard.total += value
+        shard.count += 1
+
+    def snapshot(self) -> Dict:
+        """合并所有分片，返回 {'buckets', 'counts'（非累积）, 'sum', 'count'}。"""
+        counts = [0] * (len(self.buckets) + 1)
+        total = 0.0
+        count = 0
+        for shard in list(self._shards):
+            for i, value in enumerate(shard.counts):
+                counts[i] += value
+            total += shard.total
+            count += shard.count
+        return {'buckets': self.buckets, 'counts': counts, 'sum': total, 'count': count}
+
+    def quantile(self, q: float) -> Optional[float]:
+        """按桶线性插值估计分位数（与Prometheus的histogram_quantile相同），没有数据时返回None。"""
+        snap = self.snapshot()
+        if snap['count'] == 0:
+            return None
+        rank = q * snap['count']
+        cumulative = 0
+        lower = 0.0
+        for bound, value in zip(self.buckets + (float('inf'),), snap['counts']):
+            if cumulative + value >= rank and value > 0:
+                if bound == float('inf'):
+                    return lower
+                return lower + (bound - lower) * (rank - cumulative) / value
+            cumulative += value
+            lower = bound
+        return lower
+
+class FrameTimer:
+    """
+    单帧的分阶段计时器：每个阶段结束时调用mark(stage)，
+    记录自上一次mark（或计时开始）以来的耗时。
+    """
+    __slots__ = ('metrics', 'start', '_last')
+
+    def __init__(self, metrics: 'SessionMetrics'):
+        self.metrics = metrics
+        self.start = time.perf_counter()
+        self._last = self.start
+
+    def mark(self, stage: str) -> float:
+        now = time.perf_counter()
+        elapsed = now - self._last
+        self.metrics.observe(stage, elapsed)
+        self._last = now
+        return elapsed
+
+    def skip(self) -> None:
+        """丢弃自上一次mark以来的时间（不属于任何阶段，例如帧率节流）。"""
+        self._last = time.perf_counter()
+
+class SessionMetrics:
+    """一个计数会话的全部指标。"""
+
+    def __init__(self, labels: Optional[Dict[str, str]] = None):
+        self.labels = dict(labels or {})
+        self.started_at = time.time()
+        self.stages = {stage: Histogram(STAGE_BUCKETS) for stage in STAGES}
+        self.rep_latency = Histogram(LATENCY_BUCKETS)
+        self.frame_time = Histogram(STAGE_BUCKETS)
+        self.frames = 0
+        self.reps = 0
+
+    def observe(self, stage: str, seconds: float) -> None:
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            # 新阶段只由记录它的线程创建，dict赋值在GIL下是原子的
+            histogram = self.stages.setdefault(stage, Histogram(STAGE_BUCKETS))
+        histogram.observe(seconds)
+
+    def frame_timer(self) -> FrameTimer:
+        """开始一帧的分阶段计时。"""
+        return FrameTimer(self)
+
+    def end_frame(self, timer: FrameTimer) -> None:
+        """结束一帧：记录整帧处理时间。"""
+        self.frames += 1
+        self.frame_time.observe(time.perf_counter() - timer.start)
+
+    def observe_rep(self, captured_at: float, reps: int = 1) -> None:
+        """
+        记录一次计数增加。
+
+        Args:
+            captured_at: 完成该动作的帧被读取时的time.perf_counter()
+            reps: 本帧新增的计数
+        """
+        latency = time.perf_counter() - captured_at
+        for _ in range(reps):
+            self.rep_latency.observe(latency)
+        self.reps += reps
+
+    def summary(self) -> Dict:
+        """各阶段的计数、平均值和p50/p95/p99（秒），用于JSON输出。"""
+        def describe(histogram: Histogram) -> Dict:
+            snap = histogram.snapshot()
+            return {
+                'count': snap['count'],
+                'mean': snap['sum'] / snap['count'] if snap['count'] else None,
+                'p50': histogram.quantile(0.5),
+                'p95': histogram.quantile(0.95),
+                'p99': histogram.quantile(0.99),
+            }
+
+        return {
+            'frames': self.frames,
+            'reps': self.reps,
+            'stages': {stage: describe(h) for stage, h in self.stages.items() if h.snapshot()['count']},
+            'frame': describe(self.frame_time),
+            'rep_latency': describe(self.rep_latency),
+        }
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+def _format_bound(bound: float) -> str:
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+def _histogram_lines(name: str, histogram: Histogram, labels: Dict[str, str]) -> List[str]:
+    snap = histogram.snapshot()
+    lines = []
+    cumulative = 0
+    for bound, value in zip(snap['buckets'] + (float('inf'),), snap['counts']):
+        cumulative += value
+        bucket_labels = dict(labels, le=_format_bound(bound))
+        lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+    lines.append(f"{name}_sum{_format_labels(labels)} {snap['sum']!r}")
+    lines.append(f"{name}_count{_format_labels(labels)} {snap['count']}")
+    return lines
+
+def render_prometheus(metrics: Optional[SessionMetrics]) -> str:
+    """以Prometheus文本格式（0.0.4）导出会话指标。"""
+    lines = []
+    if metrics is None:
+        return '\n'.join(lines) + '\n'
+
+    labels = metrics.labels
+    name = f'{METRIC_PREFIX}_stage_seconds'
+    lines.append(f'# HELP {name} Per-stage frame processing time.')
+    lines.append(f'# TYPE {name} histogram')
+    for stage, histogram in metrics.stages.items():
+        lines.extend(_histogram_lines(name, histogram, dict(labels, stage=stage)))
+
+    name = f'{METRIC_PREFIX}_frame_seconds'
+    lines.append(f'# HELP {name} Total processing time per frame.')
+    lines.append(f'# TYPE {name} histogram')
+    lines.extend(_histogram_lines(name, metrics.frame_time, labels))
+
+    name = f'{METRIC_PREFIX}_rep_latency_seconds'
+    lines.append(f'# HELP {name} Time from capturing the frame that completed a rep to the count increment.')
+    lines.append(f'# TYPE {name} histogram')
+    lines.extend(_histogram_lines(name, metrics.rep_latency, labels))
+
+    for suffix, help_text, value in (
+        ('frames_total', 'Frames processed in the session.', metrics.frames),
+        ('reps_total', 'Reps counted in the session.', metrics.reps),
+    ):
+        name = f'{METRIC_PREFIX}_{suffix}'
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        lines.append(f'{name}{_format_labels(labels)} {value}')
+
+    name = f'{METRIC_PREFIX}_session_start_time_seconds'
+    lines.append(f'# HELP {name} Unix time when the session started.')
+    lines.append(f'# TYPE {name} gauge')
+    lines.append(f'{name}{_format_labels(labels)} {metrics.started_at!r}')
+    return '\n'.join(lines) + '\n'
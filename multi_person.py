@@ -0,0 +1,285 @@
+"""
+多人运动计数。
+一次YOLO人体检测找到画面中的所有人，跨帧跟踪，并在线程池中对每个人的裁剪区域运行MediaPipe姿态估计。
+每个被跟踪的人拥有所选人体计数器（例如SquatCounter）的独立实例。
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from yolo_tracker import YOLOTracker
+from smoothing import LandmarkSmoother
+from inference_backends import get_pose_backend, landmark_list
+
+def bbox_iou(box_a: Tuple[int, int, int, int], box_b: Tuple[int, int, int, int]) -> float:
+    """计算两个(x1, y1, x2, y2)边界框的IoU。"""
+    ix1 = max(box_a[0], box_b[0])
+    iy1 = max(box_a[1], box_b[1])
+    ix2 = min(box_a[2], box_b[2])
+    iy2 = min(box_a[3], box_b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    if inter == 0:
+        return 0.0
+    area_a = (box_a[2] - box_a[0]) * (box_a[3] - box_a[1])
+    area_b = (box_b[2] - box_b[0]) * (box_b[3] - box_b[1])
+    return inter / float(area_a + area_b - inter)
+
+class PersonTrack:
+    """
+    单个被跟踪的人：边界框、独立的计数器实例和专用的姿态估计器。
+    """
+
+    def __init__(self, track_id: int, bbox: Tuple[int, int, int, int], counter, pose,
+                 smoother: Optional[LandmarkSmoother] = None):
+        self.track_id = track_id
+        self.bbox = bbox
+        self.counter = counter
+        self.pose = pose  # 每人一个姿态估计器实例，保持其内部跟踪状态
+        self.smoother = smoother  # 每人独立的关键点平滑状态
+        self.missed_frames = 0
+        self.landmarks = None
+
+    @property
+    def count(self) -> int:
+        return self.counter.count
+
+class MultiPersonCounter:
+    """
+    多人模式的计数器包装器。
+
+    对外提供与单人计数器相同的 count / update() 接口，
+    count 为所有被跟踪人员的计数总和。
+    """
+
+    def __init__(self, counter_class, max_people: int = 8, max_workers: int = 4,
+                 confidence_threshold: float = 0.5, iou_threshold: float = 0.3,
+                 max_missed_frames: int = 15, crop_padding: float = 0.15,
+                 smoothing: str = 'none', fps: float = 30.0):
+        """
+        初始化多人计数器。
+
+        Args:
+            counter_class: 为每个人实例化的人体计数器类（例如SquatCounter）
+            max_people: 同时跟踪的最大人数
+            max_workers: 并行姿态估计的工作线程数
+            confidence_threshold: 人体检测的最小置信度
+            iou_threshold: 将检测匹配到已有轨迹所需的最小IoU
+            max_missed_frames: 轨迹在未被检测到多少帧后被移除
+            crop_padding: 裁剪时边界框四周扩展的比例
+            smoothing: 关键点平滑方法（'none'、'one_euro' 或 'kalman'，见smoothing模块）
+            fps: 没有帧时间戳时平滑滤波使用的帧率
+        """
+        self.counter_class = counter_class
+        self.detection_type = "multi_person"
+        self.max_people = max_people
+        self.iou_threshold = iou_threshold
+        self.max_missed_frames = max_missed_frames
+        self.crop_padding = crop_padding
+        self.smoothing = smoothing
+        self.fps = fps
+        self.counter_params = {}
+
+        self.pose_backend = get_pose_backend()  # 姿态估计后端（默认MediaPipe，见inference_backends）
+        self.tracker = YOLOTracker(object_class="person", confidence_threshold=confidence_threshold)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pose-worker")
+
+        self.tracks: Dict[int, PersonTrack] = {}
+        self.next_track_id = 1
+        self.last_increments: List[Tuple[int, int]] = []  # 本帧新增计数的(track_id, count)
+        self.removed_count = 0  # 已离开画面的人员累积的计数
+
+        # 用于参数校验的计数器原型
+        self._prototype = counter_class()
+
+    @property
+    def count(self) -> int:
+        return self.removed_count + sum(track.count for track in self.tracks.values())
+
+    def has_counter_param(self, name: str) -> bool:
+        """检查底层人体计数器是否支持该参数。"""
+        return hasattr(self._prototype, name)
+
+    def get_counter_param(self, name: str):
+        """返回人体计数器参数的当前值。"""
+        return getattr(self._prototype, name)
+
+    def set_counter_param(self, name: str, value) -> None:
+        """为当前和之后出现的所有人员设置计数器参数。"""
+        self.counter_params[name] = value
+        setattr(self._prototype, name, value)
+        for track in self.tracks.values():
+            setattr(track.counter, name, value)
+
+    def _create_track(self, bbox: Tuple[int, int, int, int]) -> PersonTrack:
+        counter = self.counter_class()
+        for name, value in self.counter_params.items():
+            setattr(counter, name, value)
+        pose = self.pose_backend.create_estimator()
+        smoother = LandmarkSmoother(self.smoothing, self.fps) if self.smoothing != 'none' else None
+        track = PersonTrack(self.next_track_id, bbox, counter, pose, smoother)
+        self.next_track_id += 1
+        return track
+
+    def _match_detections(self, detections: List[Dict]) -> None:
+        """按IoU贪心地将检测匹配到已有轨迹，创建新轨迹并清理丢失的轨迹。"""
+        detections = sorted(detections, key=lambda d: d['confidence'], reverse=True)[:self.max_people]
+
+        candidates = []
+        for track_id, track in self.tracks.items():
+            for det_index, detection in enumerate(detections):
+                iou = bbox_iou(track.bbox, detection['bbox'])
+                if iou >= self.iou_threshold:
+                    candidates.append((iou, track_id, det_index))
+        candidates.sort(reverse=True)
+
+        matched_tracks = set()
+        matched_detections = set()
+        for iou, track_id, det_index in candidates:
+            if track_id in matched_tracks or det_index in matched_detections:
+                continue
+            track = self.tracks[track_id]
+            track.bbox = detections[det_index]['bbox']
+            track.missed_frames = 0
+            matched_tracks.add(track_id)
+            matched_detections.add(det_index)
+
+        for track_id, track in list(self.tracks.items()):
+            if track_id not in matched_tracks:
+                track.missed_frames += 1
+                track.landmarks = None
+                if track.missed_frames > self.max_missed_frames:
+                    self.removed_count += track.count
+                    track.pose.close()
+                    del self.tracks[track_id]
+
+        for det_index, detection in enumerate(detections):
+            if det_index not in matched_detections and len(self.tracks) < self.max_people:
+                track = self._create_track(detection['bbox'])
+                self.tracks[track.track_id] = track
+
+    def _crop_box(self, bbox: Tuple[int, int, int, int], width: int, height: int) -> Tuple[int, int, int, int]:
+        x1, y1, x2, y2 = bbox
+        pad_x = int((x2 - x1) * self.crop_padding)
+        pad_y = int((y2 - y1) * self.crop_padding)
+        return (max(0, x1 - pad_x), max(0, y1 - pad_y),
+                min(width, x2 + pad_x), min(height, y2 + pad_y))
+
+    def _process_track(self, track: PersonTrack, frame_rgb: np.ndarray, timestamp: Optional[float] = None):
+        """在工作线程中对单个人的裁剪区域运行姿态估计，将关键点映射回整帧坐标并平滑。"""
+        height, width = frame_rgb.shape[:2]
+        x1, y1, x2, y2 = self._crop_box(track.bbox, width, height)
+        if x2 - x1 < 2 or y2 - y1 < 2:
+            return None
+
+        crop = np.ascontiguousarray(frame_rgb[y1:y2, x1:x2])
+        results = track.pose.process(crop)
+        if not results.pose_landmarks:
+            return None
+
+        # 将裁剪区域的归一化坐标转换为整帧归一化坐标，计数器行为与单人模式一致
+        crop_w = (x2 - x1) / width
+        crop_h = (y2 - y1) / height
+        for landmark in results.pose_landmarks.landmark:
+            landmark.x = x1 / width + landmark.x * crop_w
+            landmark.y = y1 / height + landmark.y * crop_h
+        if track.smoother is not None:
+            track.smoother.apply(results.pose_landmarks, timestamp)
+        return results.pose_landmarks
+
+    def update(self, frame: np.ndarray, timestamp: Optional[float] = None, buffer_pool=None) -> int:
+        """
+        用新帧更新所有人员的计数器。
+
+        Args:
+            frame: OpenCV BGR帧
+            timestamp: 可选的帧视频时间（秒，见frame_clock），用于关键点平滑
+            buffer_pool: 可选的帧缓冲池（见buffer_pool），RGB转换写入复用的数组
+
+        Returns:
+            int: 所有人员的计数总和
+        """
+        self.last_increments = []
+
+        detections = self.tracker.detect_objects(frame)
+        self._match_detections(detections)
+
+        active_tracks = [track for track in self.tracks.values() if track.missed_frames == 0]
+        if not active_tracks:
+            return self.count
+
+        if buffer_pool is not None:
+            frame_rgb = buffer_pool.cvt_color('rgb', frame, cv2.COLOR_BGR2RGB)
+        else:
+            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        futures = [(track, self.executor.submit(self._process_track, track, frame_rgb, timestamp))
+                   for track in active_tracks]
+
+        for track, future in futures:
+            try:
+                track.landmarks = future.result()
+            except Exception as e:
+                print(f"⚠️  人员 {track.track_id} 姿态估计出错: {e}")
+                track.landmarks = None
+
+            if track.landmarks is not None:
+                old_count = track.counter.count
+                new_count = track.counter.update(track.landmarks)
+                if new_count > old_count:
+                    self.last_increments.append((track.track_id, new_count))
+
+        return self.count
+
+    def draw_debug_info(self, frame: np.ndarray, mp_drawing=None) -> np.ndarray:
+        """在帧上绘制每个人的边界框、编号、计数和姿态关键点。"""
+        for track in self.tracks.values():
+            if track.missed_frames > 0:
+                continue
+            x1, y1, x2, y2 = track.bbox
+            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            label = f"#{track.track_id}: {track.count} ({track.counter.state})"
+            cv2.putText(frame, label, (x1, max(15, y1 - 10)),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+            if mp_drawing is not None and track.landmarks is not None:
+                mp_drawing.draw_landmarks(frame, track.landmarks, self.pose_backend.POSE_CONNECTIONS)
+
+        cv2.putText(frame, f"People: {len(self.tracks)}  Total: {self.count}", (10, 60),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
+        return frame
+
+    def overlay_info(self, frame_size: Tuple[int, int]) -> Dict:
+        """draw_debug_info()的内容作为客户端绘制的元数据（坐标按frame_size归一化）。"""
+        width, height = frame_size
+        people = []
+        for track in self.tracks.values():
+            if track.missed_frames > 0:
+                continue
+            x1, y1, x2, y2 = track.bbox
+            people.append({
+                'id': track.track_id,
+                'bbox': [round(x1 / width, 4), round(y1 / height, 4), round(x2 / width, 4), round(y2 / height, 4)],
+                'label': f"#{track.track_id}: {track.count} ({track.counter.state})",
+                'landmarks': landmark_list(track.landmarks),
+            })
+        return {
+            'kind': 'multi_person',
+            'people': people,
+            'summary': f"People: {len(self.tracks)}  Total: {self.count}",
+        }
+
+    def get_people(self) -> List[Dict]:
+        """返回每个被跟踪人员的计数摘要。"""
+        return [{
+            'person_id': track.track_id,
+            'count': track.count,
+            'state': track.counter.state,
+            'bbox': track.bbox
+        } for track in self.tracks.values()]
+
+    def close(self) -> None:
+        """释放工作线程池和所有姿态估计器。"""
+        self.executor.shutdown(wait=False)
+        for track in self.tracks.values():
+            track.pose.close()
+        self.tracks.clear()
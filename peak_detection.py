@@ -0,0 +1,247 @@
+"""
+基于峰值检测的动作计数引擎。
+对关键点信号做在线低通滤波，用滚动窗口最小值作为自适应基线，
+并用迟滞阈值检测每次偏离基线的峰值：偏离超过阈值时进入峰值，
+回落到阈值的一定比例以下时计数一次。
+
+与固定start_val的阈值状态机相比：
+- 不需要30帧的校准阶段，基线会跟随用户在画面中的位置漂移；
+- 迟滞代替stable_frames去抖，回到起始位置的那一帧立即计数。
+
+PeakRepDetector每帧O(1)（均摊）；count_reps()对整个缓存的关键点数组
+做同样的计算（向量化），用于离线分析，计数结果与逐帧处理一致。
+"""
+
+from collections import deque
+from typing import Dict, Optional
+
+import numpy as np
+
+DEFAULT_SMOOTHING = 0.5       # 低通滤波系数（1.0 = 不滤波）
+DEFAULT_BASELINE_WINDOW = 90  # 自适应基线的窗口帧数（30 FPS下约3秒）
+DEFAULT_RELEASE_RATIO = 0.5   # 回落到阈值的该比例以下时完成一次动作
+
+def direction_sign(direction: str) -> int:
+    """down-first的峰值在y增大方向（+1），up-first在y减小方向（-1）。"""
+    return -1 if direction == 'up-first' else 1
+
+class PeakRepDetector:
+    """
+    流式峰值检测计数器。
+
+    每个样本依次经过：
+    1. 一阶低通滤波（指数移动平均）
+    2. 按方向取符号，使峰值总是正方向
+    3. 自适应基线 = 最近baseline_window帧滤波信号的最小值（单调队列，均摊O(1)）
+    4. 迟滞：偏离 > threshold 时进入峰值，偏离 < threshold * release_ratio 时计数
+
+    注意：在峰值位置停留超过baseline_window帧时，基线会追上当前位置并计数一次。
+    """
+
+    def __init__(self, threshold: float, direction: str = 'down-first',
+                 smoothing: float = DEFAULT_SMOOTHING,
+                 baseline_window: int = DEFAULT_BASELINE_WINDOW,
+                 release_ratio: float = DEFAULT_RELEASE_RATIO):
+        if not 0.0 < smoothing <= 1.0:
+            raise ValueError("smoothing必须在(0, 1]之间")
+        if baseline_window <= 0:
+            raise ValueError("baseline_window必须为正数")
+        if not 0.0 <= release_ratio < 1.0:
+            raise ValueError("release_ratio必须在[0, 1)之间")
+        self.threshold = threshold
+        self.direction = direction
+        self.smoothing = smoothing
+        self.baseline_window = baseline_window
+        self.release_ratio = release_ratio
+        self.reset()
+
+    def reset(self) -> None:
+        """清除滤波器、基线和计数。"""
+        self.count = 0
+        self.frame = -1
+        self.filtered = None
+        self.baseline = None   # 原始坐标下的基线
+        self.deviation = 0.0   # 沿峰值方向偏离基线的距离
+        self.armed = False     # 是否处于峰值中
+        self._minima = deque() # (帧序号, 带符号的滤波值)，值单调递增
+
+    def update(self, value: float) -> bool:
+        """
+        加入一个样本。
+
+        Returns:
+            bool: 该样本是否完成了一次动作
+        """
+        self.frame += 1
+        value = float(value)
+        if self.filtered is None:
+            self.filtered = value
+        else:
+            self.filtered = self.smoothing * value + (1.0 - self.smoothing) * self.filtered
+
+        sign = direction_sign(self.direction)
+        signed = sign * self.filtered
+
+        # 单调队列维护滚动窗口最小值
+        minima = self._minima
+        while minima and minima[-1][1] >= signed:
+            minima.pop()
+        minima.append((self.frame, signed))
+        if minima[0][0] <= self.frame - self.baseline_window:
+            minima.popleft()
+        signed_baseline = minima[0][1]
+
+        self.baseline = sign * signed_baseline
+        self.deviation = signed - signed_baseline
+
+        if not self.armed:
+            if self.deviation > self.threshold:
+                self.armed = True
+        elif self.deviation < self.threshold * self.release_ratio:
+            self.armed = False
+            self.count += 1
+            return True
+        return False
+
+def exponential_smoothing(values: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    沿第0轴的指数移动平均，与PeakRepDetector的逐帧滤波相同（第一个样本为初值）。
+    分块使用闭式解向量化计算，块长度保证衰减因子不会下溢。
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.empty_like(values)
+    n = len(values)
+    if n == 0:
+        return out
+    decay = 1.0 - alpha
+    if decay == 0.0:
+        out[:] = values
+        return out
+
+    # 块内 y[j] = decay^(j+1) * y_prev + alpha * decay^j * Σ_{k<=j} x[k] / decay^k
+    block = int(min(1024, max(1, np.log(1e-6) / np.log(decay))))
+    powers = decay ** np.arange(block + 1, dtype=np.float64)
+    powers = powers.reshape((-1,) + (1,) * (values.ndim - 1))
+
+    out[0] = values[0]
+    previous = values[0]
+    start = 1
+    while start < n:
+        chunk = values[start:start + block]
+        m = len(chunk)
+        scaled = np.cumsum(chunk / powers[:m], axis=0)
+        out[start:start + m] = powers[1:m + 1] * previous + alpha * powers[:m] * scaled
+        previous = out[start + m - 1]
+        start += m
+    return out
+
+def rolling_min(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    沿第0轴的尾随窗口最小值（窗口包含当前帧及之前window-1帧）。
+    使用van Herk/Gil-Werman算法：每个元素O(1)，整体向量化。
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n == 0:
+        return values.copy()
+    tail = values.shape[1:]
+    total = -(-(n + window - 1) // window) * window
+    padded = np.full((total,) + tail, np.inf)
+    padded[window - 1:window - 1 + n] = values
+
+    blocks = padded.reshape((total // window, window) + tail)
+    prefix = np.minimum.accumulate(blocks, axis=1).reshape(padded.shape)
+    suffix = np.minimum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(padded.shape)
+    return np.minimum(suffix[:n], prefix[window - 1:window - 1 + n])
+
+def hysteresis(deviation: np.ndarray, threshold: float, release_ratio: float) -> np.ndarray:
+    """
+    沿第0轴的迟滞状态：偏离 > threshold 时进入峰值，< threshold * release_ratio 时退出。
+    通过前向填充最近一次触发的事件向量化计算，返回布尔数组（是否处于峰值中）。
+    """
+    deviation = np.asarray(deviation, dtype=np.float64)
+    events = np.where(deviation > threshold, 1, np.where(deviation < threshold * release_ratio, 0, -1))
+    index = np.arange(len(deviation)).reshape((-1,) + (1,) * (deviation.ndim - 1))
+    last_event = np.maximum.accumulate(np.where(events >= 0, index, -1), axis=0)
+    state = np.take_along_axis(events, np.maximum(last_event, 0), axis=0)
+    return (last_event >= 0) & (state == 1)
+
+def count_reps(signal, threshold: float, direction: str = 'down-first',
+               smoothing: float = DEFAULT_SMOOTHING,
+               baseline_window: int = DEFAULT_BASELINE_WINDOW,
+               release_ratio: float = DEFAULT_RELEASE_RATIO,
+               visibility=None, min_visibility: float = 0.0) -> Dict:
+    """
+    对整个信号离线计数（向量化），结果与对每个样本调用PeakRepDetector.update()一致。
+
+    Args:
+        signal: 形状为(N,)的信号，或(N, K)的K路独立信号
+        threshold, direction, smoothing, baseline_window, release_ratio: 同PeakRepDetector
+        visibility: 可选的(N,)可见度；低于min_visibility的帧被跳过（与实时计数器相同）
+        min_visibility: 最低可见度
+
+    Returns:
+        dict: {
+            'count': 动作总数（K路信号时为长度K的数组）,
+            'counts': 每帧的累计计数（被跳过的帧保持上一帧的计数）,
+            'rep_frames': 完成动作的帧序号（仅一维信号）,
+            'filtered', 'baseline', 'deviation': 参与计算的帧的中间信号
+        }
+    """
+    signal = np.asarray(signal, dtype=np.float64)
+    n = len(signal)
+    frames = np.arange(n)
+    if visibility is not None:
+        if signal.ndim != 1:
+            raise ValueError("visibility仅支持一维信号")
+        frames = np.flatnonzero(np.asarray(visibility) >= min_visibility)
+        signal = signal[frames]
+
+    sign = direction_sign(direction)
+    filtered = exponential_smoothing(signal, smoothing)
+    signed = sign * filtered
+    signed_baseline = rolling_min(signed, baseline_window)
+    deviation = signed - signed_baseline
+
+    armed = hysteresis(deviation, threshold, release_ratio)
+    previous = np.concatenate([np.zeros((1,) + armed.shape[1:], dtype=bool), armed[:-1]])
+    completed = previous & ~armed
+
+    counts = np.zeros((n,) + signal.shape[1:], dtype=np.int64)
+    counts[frames] = np.cumsum(completed, axis=0)
+    counts = np.maximum.accumulate(counts, axis=0) if n else counts
+
+    result = {
+        'count': counts[-1] if n else (0 if signal.ndim == 1 else np.zeros(signal.shape[1:], dtype=np.int64)),
+        'counts': counts,
+        'filtered': filtered,
+        'baseline': sign * signed_baseline,
+        'deviation': deviation,
+    }
+    if signal.ndim == 1:
+        result['count'] = int(result['count'])
+        result['rep_frames'] = frames[completed]
+    return result
+
+def count_reps_from_landmarks(landmarks, landmark: int, threshold: float,
+                              direction: str = 'down-first', axis: int = 1,
+                              min_visibility: float = 0.0, **kwargs) -> Dict:
+    """
+    对缓存的关键点数组离线计数。
+
+    Args:
+        landmarks: 形状为(N, 33, C)的数组，C >= 2 为(x, y[, z, visibility])
+        landmark: 关键点索引（例如 PoseLandmark.RIGHT_HIP.value）
+        threshold: 峰值阈值（归一化坐标）
+        direction: 'down-first' 或 'up-first'
+        axis: 使用的坐标分量（默认1，即y）
+        min_visibility: 最低可见度（C >= 4 时生效）
+        **kwargs: 传递给count_reps()的其他参数
+
+    Returns:
+        dict: 同count_reps()
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float64)
+    visibility = landmarks[:, landmark, 3] if landmarks.shape[-1] >= 4 else None
+    return count_reps(landmarks[:, landmark, axis], threshold, direction,
+                      visibility=visibility, min_visibility=min_visibility, **kwargs)
@@ -0,0 +1,296 @@
+"""
+单帧处理流水线。
+缩放 → 颜色转换 → 推理 → 计数器更新 → 覆盖层绘制 → （可选）录制覆盖层，
+支持MediaPipe人体计数器、多人模式和YOLO计数器。
+
+web_app.process_video_stream和离线基准测试（benchmark_pipeline.py）共用这条流水线，
+因此基准测试测量的就是网页应用实际执行的处理。
+
+客户端覆盖层模式（client_overlay）下，网页显示帧保持干净，覆盖层内容（关键点、边界框、
+阈值线、状态文本）作为紧凑的元数据返回，由浏览器在canvas上绘制；录制帧仍在服务器端绘制。
+"""
+
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from buffer_pool import FrameBufferPool
+from inference_backends import landmark_list
+from metrics import SessionMetrics
+
+DISPLAY_WIDTH = 640  # 网页显示帧的最大宽度
+
+class FrameResult:
+    """一帧的处理结果。"""
+    __slots__ = ('display_frame', 'recording_frame', 'count', 'events', 'people', 'overlay')
+
+    def __init__(self, display_frame, recording_frame, count: int, events: List[Dict], people=None,
+                 overlay: Optional[Dict] = None):
+        self.display_frame = display_frame      # 网页显示帧（客户端覆盖层模式下不含覆盖层）
+        self.recording_frame = recording_frame  # 带覆盖层的原始分辨率帧（未录制时为None）
+        self.count = count                      # 当前计数
+        self.events = events                    # 本帧新增的计数事件（写入session_data['counts']）
+        self.people = people                    # 多人模式的人员列表
+        self.overlay = overlay                  # 客户端覆盖层元数据（服务器端绘制时为None）
+
+class FramePipeline:
+    """
+    一个计数会话的逐帧处理。
+
+    Args:
+        counter: 计数器实例（人体计数器、MultiPersonCounter或YOLO计数器）
+        counter_type: 'mediapipe'、'multi_person' 或 'yolo'
+        counter_name: 覆盖层上显示的计数器名称
+        clock: 帧时钟（见frame_clock），调用process()前已对当前帧tick()
+        metrics: 会话指标，未提供时新建
+        pose, mp_pose, mp_drawing: MediaPipe姿态估计器和绘图工具（人体计数器需要）
+        visualizer: 人体计数器的调试可视化（可选）
+        landmark_smoother: 关键点平滑阶段（可选，见smoothing）
+        client_overlay: 是否由客户端绘制覆盖层（返回元数据而不是绘制到显示帧）
+        buffer_pool: 缩放、颜色转换和复制使用的帧缓冲池（默认为每个流水线新建一个）
+    """
+
+    def __init__(self, counter, counter_type: str, counter_name: str, clock,
+                 metrics: Optional[SessionMetrics] = None, pose=None, mp_pose=None,
+                 mp_drawing=None, visualizer=None, landmark_smoother=None,
+                 client_overlay: bool = False, buffer_pool: Optional[FrameBufferPool] = None):
+        self.counter = counter
+        self.counter_type = counter_type
+        self.counter_name = counter_name
+        self.clock = clock
+        self.metrics = metrics or SessionMetrics({'counter': counter_name, 'counter_type': counter_type})
+        self.pose = pose
+        self.mp_pose = mp_pose
+        self.mp_drawing = mp_drawing
+        self.visualizer = visualizer
+        self.landmark_smoother = landmark_smoother
+        self.client_overlay = client_overlay
+        self.buffers = buffer_pool if buffer_pool is not None else FrameBufferPool()
+
+    def process(self, frame: np.ndarray, timer=None, captured_at: Optional[float] = None,
+                recording: bool = False) -> FrameResult:
+        """
+        处理一帧。
+
+        Args:
+            frame: 解码后的原始BGR帧
+            timer: 本帧的FrameTimer（调用方已记录解码阶段），未提供时新建
+            captured_at: 帧被读取时的time.perf_counter()，用于计数延迟
+            recording: 是否生成原始分辨率的录制帧
+
+        Returns:
+            FrameResult
+        """
+        if timer is None:
+            timer = self.metrics.frame_timer()
+        if captured_at is None:
+            captured_at = timer.start
+
+        original = frame
+
+        # 仅为网页显示调整帧大小
+        resized = frame.shape[1] > DISPLAY_WIDTH
+        if resized:
+            scale = DISPLAY_WIDTH / frame.shape[1]
+            frame = self.buffers.resize('display', frame, (int(frame.shape[1] * scale), int(frame.shape[0] * scale)))
+        timer.mark('resize')
+
+        # 录制需要没有网页覆盖层的原始分辨率帧。显示帧是缩放后的新数组时原始帧不会被修改，
+        # 直接使用；只有显示帧就是原始帧（会在上面绘制）时才复制。多人模式的录制帧由显示帧放大得到，
+        # 这里只需要原始尺寸
+        recording_frame = None
+        if recording:
+            needs_copy = not resized and self.counter_type != 'multi_person'
+            recording_frame = self.buffers.copy('recording', original) if needs_copy else original
+
+        timestamp = self.clock.to_datetime().strftime('%Y-%m-%d %H:%M:%S')
+        if self.counter_type == 'mediapipe':
+            result = self._process_pose(frame, recording_frame, timer, captured_at, timestamp)
+        elif self.counter_type == 'multi_person':
+            result = self._process_multi_person(frame, recording_frame, timer, captured_at, timestamp)
+        else:
+            result = self._process_yolo(frame, recording_frame, timer, captured_at, timestamp)
+
+        if result.overlay is not None:
+            # 所有模式共有的字段：帧尺寸（归一化坐标的参照）、计数和时间戳
+            result.overlay.update({
+                'frame': self.clock.frame_index,
+                'width': frame.shape[1],
+                'height': frame.shape[0],
+                'counter_name': self.counter_name,
+                'count': result.count,
+                'timestamp': timestamp,
+            })
+        return result
+
+    def _process_pose(self, frame, recording_frame, timer, captured_at, timestamp) -> FrameResult:
+        """使用MediaPipe处理人体动作计数器"""
+        counter = self.counter
+        events = []
+        count = counter.count
+
+        frame_rgb = self.buffers.cvt_color('rgb', frame, cv2.COLOR_BGR2RGB)
+        timer.mark('color_convert')
+        results = self.pose.process(frame_rgb)
+        timer.mark('inference')
+
+        if not results.pose_landmarks:
+            overlay = {'kind': 'pose', 'landmarks': None, 'debug': None} if self.client_overlay else None
+            return FrameResult(frame, recording_frame, count, events, overlay=overlay)
+
+        # 平滑关键点（原地修改），计数器和绘制都使用平滑后的坐标
+        if self.landmark_smoother is not None:
+            self.landmark_smoother.apply(results.pose_landmarks, self.clock.timestamp)
+
+        # 更新计数器
+        old_count = count
+        count = counter.update(results.pose_landmarks)
+
+        # 记录计数变化
+        if count > old_count:
+            events.append({
+                'count': count,
+                **self.clock.event(),
+                'validation_score': getattr(counter, 'validation_score', 1.0)
+            })
+            self.metrics.observe_rep(captured_at, count - old_count)
+        timer.mark('counter_update')
+
+        overlay = None
+        if self.client_overlay:
+            # 由浏览器绘制：只收集关键点和调试信息
+            overlay = {
+                'kind': 'pose',
+                'landmarks': landmark_list(results.pose_landmarks),
+                'debug': self.visualizer.overlay_info(counter, results.pose_landmarks) if self.visualizer else None,
+            }
+        else:
+            # 在网页显示帧上绘制姿态关键点
+            self.mp_drawing.draw_landmarks(frame, results.pose_landmarks, self.mp_pose.POSE_CONNECTIONS)
+
+            # 在网页帧上显示计数器信息
+            cv2.putText(frame, f'{self.counter_name}: {count}',
+                       (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+
+            # 为网页显示添加时间戳（视频时间）
+            cv2.putText(frame, timestamp, (10, frame.shape[0] - 10),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+            # 在网页帧上绘制调试信息
+            if self.visualizer:
+                self.visualizer.draw_debug_info(frame, counter, results.pose_landmarks)
+        timer.mark('overlay_draw')
+
+        # 用于录制：在原始分辨率帧上绘制覆盖层
+        if recording_frame is not None:
+            # 将关键点缩放到原始帧大小
+            scale_x = recording_frame.shape[1] / frame.shape[1]
+            scale_y = recording_frame.shape[0] / frame.shape[0]
+
+            # 在录制帧上绘制姿态关键点
+            self.mp_drawing.draw_landmarks(recording_frame, results.pose_landmarks, self.mp_pose.POSE_CONNECTIONS)
+
+            # 将计数器信息添加到录制帧（缩放）
+            cv2.putText(recording_frame, f'{self.counter_name}: {count}',
+                       (int(10 * scale_x), int(30 * scale_y)), cv2.FONT_HERSHEY_SIMPLEX,
+                       1 * min(scale_x, scale_y), (0, 255, 0), 2)
+
+            # 将时间戳添加到录制帧
+            cv2.putText(recording_frame, timestamp,
+                       (int(10 * scale_x), recording_frame.shape[0] - int(10 * scale_y)),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5 * min(scale_x, scale_y), (255, 255, 255), 1)
+
+        return FrameResult(frame, recording_frame, count, events, overlay=overlay)
+
+    def _process_multi_person(self, frame, recording_frame, timer, captured_at, timestamp) -> FrameResult:
+        """多人模式：一次人体检测 + 每人裁剪区域的并行姿态估计"""
+        counter = self.counter
+
+        # 人体检测、并行姿态估计和每人的计数器更新在一次调用中完成，整体计为推理
+        count = counter.update(frame, self.clock.timestamp, self.buffers)
+        timer.mark('inference')
+
+        # 按人员记录计数变化
+        events = [{
+            'count': count,
+            'person_id': person_id,
+            'person_count': person_count,
+            **self.clock.event()
+        } for person_id, person_count in counter.last_increments]
+        if events:
+            self.metrics.observe_rep(captured_at, len(events))
+        people = counter.get_people()
+        timer.mark('counter_update')
+
+        overlay = None
+        if self.client_overlay:
+            overlay = counter.overlay_info((frame.shape[1], frame.shape[0]))
+            # 录制仍需要服务器端绘制的覆盖层：在副本上绘制，显示帧保持干净
+            drawn = self.buffers.copy('drawn', frame) if recording_frame is not None else None
+        else:
+            drawn = frame
+
+        # 在网页帧上绘制每个人的边界框和关键点
+        if drawn is not None:
+            counter.draw_debug_info(drawn, self.mp_drawing)
+            cv2.putText(drawn, f'{self.counter_name}: {count}',
+                       (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+
+            cv2.putText(drawn, timestamp, (10, drawn.shape[0] - 10),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        timer.mark('overlay_draw')
+
+        # 用于录制：将网页帧放大到原始分辨率（关键点位于网页帧坐标系）
+        if recording_frame is not None:
+            recording_frame = self.buffers.resize('recording', drawn,
+                                                  (recording_frame.shape[1], recording_frame.shape[0]))
+
+        return FrameResult(frame, recording_frame, count, events, people, overlay)
+
+    def _process_yolo(self, frame, recording_frame, timer, captured_at, timestamp) -> FrameResult:
+        """使用YOLO处理动物/物体计数器"""
+        counter = self.counter
+        events = []
+
+        # 在网页显示帧上检测（同一检测结果用于计数和绘制）
+        best_detection = counter.detect(frame)
+        timer.mark('inference')
+
+        old_count = counter.count
+        count = counter.update_detection(best_detection, self.clock.timestamp)
+
+        # 记录计数变化
+        if count > old_count:
+            events.append({
+                'count': count,
+                **self.clock.event(),
+                'confidence': getattr(counter.debug_info, 'confidence', 0.0)
+            })
+            self.metrics.observe_rep(captured_at, count - old_count)
+        timer.mark('counter_update')
+
+        overlay = None
+        if self.client_overlay:
+            overlay = counter.overlay_info(best_detection, (frame.shape[1], frame.shape[0]))
+        else:
+            # 在网页帧上用YOLO检测绘制调试信息
+            frame = counter.draw_debug_info(frame, best_detection, self.buffers)
+
+            # 为网页显示添加时间戳（视频时间）
+            cv2.putText(frame, timestamp, (10, frame.shape[0] - 10),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        timer.mark('overlay_draw')
+
+        # 用于录制：在原始分辨率帧上检测并绘制
+        if recording_frame is not None:
+            recording_detection = counter.detect(recording_frame)
+
+            # 在录制帧上绘制调试信息（全分辨率）
+            recording_frame = counter.draw_debug_info(recording_frame, recording_detection, self.buffers)
+
+            # 将时间戳添加到录制帧
+            cv2.putText(recording_frame, timestamp, (10, recording_frame.shape[0] - 10),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+        return FrameResult(frame, recording_frame, count, events, overlay=overlay)
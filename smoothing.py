@@ -0,0 +1,204 @@
+"""
+关键点和边界框中心的平滑滤波。
+位于推理和计数器之间：在计数器看到坐标之前去除MediaPipe关键点和YOLO边界框的抖动，
+从而可以减小stable_frames，降低从完成动作到计数的延迟而不增加误计数。
+
+提供两种滤波器，都对任意形状的数组逐元素向量化（例如一次处理全部33个关键点）：
+- OneEuroFilter: 自适应截止频率的低通滤波（静止时强平滑，快速运动时低延迟）
+- KalmanFilter: 每个坐标独立的匀速模型卡尔曼滤波
+
+时间间隔来自帧时钟（frame_clock）的视频时间，因此平滑结果与处理速度无关。
+"""
+
+import math
+from typing import Optional
+
+import numpy as np
+
+SMOOTHING_METHODS = ('none', 'one_euro', 'kalman')
+
+# 默认参数：关键点为归一化坐标（0-1），边界框中心为像素坐标
+PRESETS = {
+    'landmark': {
+        'one_euro': {'min_cutoff': 2.0, 'beta': 20.0, 'd_cutoff': 1.0},
+        'kalman': {'measurement_noise': 0.005, 'process_noise': 1.0},
+    },
+    'bbox': {
+        'one_euro': {'min_cutoff': 2.0, 'beta': 0.04, 'd_cutoff': 1.0},
+        'kalman': {'measurement_noise': 2.5, 'process_noise': 500.0},
+    },
+}
+
+DEFAULT_FPS = 30.0
+
+class _TimedFilter:
+    """按时间戳计算帧间隔的滤波器基类。"""
+
+    def __init__(self, fps: float = DEFAULT_FPS):
+        self.fps = fps
+        self._last_time = None
+
+    def _interval(self, timestamp: Optional[float]) -> float:
+        # 没有时间戳或时间戳不递增时按一帧间隔处理
+        dt = 1.0 / self.fps
+        if timestamp is not None:
+            if self._last_time is not None and timestamp > self._last_time:
+                dt = timestamp - self._last_time
+            self._last_time = timestamp
+        return dt
+
+    def reset(self) -> None:
+        self._last_time = None
+
+class OneEuroFilter(_TimedFilter):
+    """
+    One-Euro滤波器（Casiez等, 2012），对数组逐元素向量化。
+    截止频率 = min_cutoff + beta * |平滑后的速度|。
+    """
+
+    def __init__(self, min_cutoff: float = 1.0, beta: float = 0.0, d_cutoff: float = 1.0,
+                 fps: float = DEFAULT_FPS):
+        super().__init__(fps)
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self._value = None
+        self._derivative = None
+
+    @staticmethod
+    def _alpha(cutoff, dt: float):
+        tau = 1.0 / (2.0 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def reset(self) -> None:
+        super().reset()
+        self._value = None
+        self._derivative = None
+
+    def filter(self, value, timestamp: Optional[float] = None) -> np.ndarray:
+        """
+        滤波一个样本。
+
+        Args:
+            value: 任意形状的数组（形状需保持不变）
+            timestamp: 样本的视频时间（秒）
+
+        Returns:
+            np.ndarray: 滤波后的数组
+        """
+        value = np.asarray(value, dtype=np.float64)
+        dt = self._interval(timestamp)
+        if self._value is None or self._value.shape != value.shape:
+            self._value = value.copy()
+            self._derivative = np.zeros_like(value)
+            return self._value.copy()
+
+        derivative = (value - self._value) / dt
+        a_d = self._alpha(self.d_cutoff, dt)
+        self._derivative += a_d * (derivative - self._derivative)
+
+        cutoff = self.min_cutoff + self.beta * np.abs(self._derivative)
+        a = self._alpha(cutoff, dt)
+        self._value += a * (value - self._value)
+        return self._value.copy()
+
+class KalmanFilter(_TimedFilter):
+    """
+    匀速模型卡尔曼滤波，每个元素独立（状态为位置和速度），对数组逐元素向量化。
+    measurement_noise为测量噪声标准差，process_noise为加速度噪声的标准差。
+    """
+
+    def __init__(self, measurement_noise: float = 1.0, process_noise: float = 1.0,
+                 fps: float = DEFAULT_FPS):
+        super().__init__(fps)
+        self.measurement_noise = measurement_noise
+        self.process_noise = process_noise
+        self._position = None
+
+    def reset(self) -> None:
+        super().reset()
+        self._position = None
+
+    def filter(self, value, timestamp: Optional[float] = None) -> np.ndarray:
+        """滤波一个样本，参数和返回值同OneEuroFilter.filter()。"""
+        value = np.asarray(value, dtype=np.float64)
+        dt = self._interval(timestamp)
+        r = self.measurement_noise ** 2
+        if self._position is None or self._position.shape != value.shape:
+            self._position = value.copy()
+            self._velocity = np.zeros_like(value)
+            # 协方差矩阵[[p00, p01], [p01, p11]]按元素存储
+            self._p00 = np.full_like(value, r)
+            self._p01 = np.zeros_like(value)
+            self._p11 = np.full_like(value, (self.process_noise * dt) ** 2)
+            return self._position.copy()
+
+        # 预测：x = F x，P = F P F^T + Q（离散白噪声加速度模型）
+        q = self.process_noise ** 2
+        self._position += self._velocity * dt
+        p00 = self._p00 + dt * (2.0 * self._p01 + dt * self._p11) + q * dt ** 4 / 4.0
+        p01 = self._p01 + dt * self._p11 + q * dt ** 3 / 2.0
+        p11 = self._p11 + q * dt ** 2
+
+        # 更新：只观测位置
+        s = p00 + r
+        k0 = p00 / s
+        k1 = p01 / s
+        innovation = value - self._position
+        self._position += k0 * innovation
+        self._velocity += k1 * innovation
+        self._p00 = (1.0 - k0) * p00
+        self._p01 = (1.0 - k0) * p01
+        self._p11 = p11 - k1 * p01
+        return self._position.copy()
+
+def create_filter(method: str, target: str = 'landmark', fps: float = DEFAULT_FPS, **params):
+    """
+    创建平滑滤波器。
+
+    Args:
+        method: 'none'、'one_euro' 或 'kalman'
+        target: 'landmark'（归一化坐标）或 'bbox'（像素坐标），决定默认参数
+        fps: 没有时间戳时使用的帧率
+        **params: 覆盖默认参数
+
+    Returns:
+        滤波器实例，method为'none'时返回None
+    """
+    if not method or method == 'none':
+        return None
+    if method not in SMOOTHING_METHODS:
+        raise ValueError(f"未知的平滑方法: {method}（可选: {', '.join(SMOOTHING_METHODS)}）")
+    options = dict(PRESETS[target][method])
+    options.update(params)
+    if method == 'one_euro':
+        return OneEuroFilter(fps=fps, **options)
+    return KalmanFilter(fps=fps, **options)
+
+class LandmarkSmoother:
+    """
+    对MediaPipe姿态关键点的平滑阶段：一次滤波全部33个关键点的(x, y, z)，
+    并将结果原地写回关键点对象，计数器和可视化看到的都是平滑后的坐标。
+    可见度不参与滤波。
+    """
+
+    def __init__(self, method: str = 'one_euro', fps: float = DEFAULT_FPS, **params):
+        self.method = method
+        self.filter = create_filter(method, 'landmark', fps, **params)
+
+    def reset(self) -> None:
+        if self.filter is not None:
+            self.filter.reset()
+
+    def apply(self, pose_landmarks, timestamp: Optional[float] = None):
+        """平滑关键点（原地修改）并返回同一对象。"""
+        if self.filter is None or pose_landmarks is None:
+            return pose_landmarks
+        landmarks = pose_landmarks.landmark
+        coords = np.array([(lm.x, lm.y, lm.z) for lm in landmarks], dtype=np.float64)
+        smoothed = self.filter.filter(coords, timestamp)
+        for lm, (x, y, z) in zip(landmarks, smoothed.tolist()):
+            lm.x = x
+            lm.y = y
+            lm.z = z
+        return pose_landmarks
@@ -0,0 +1,217 @@
+"""
+按客户端自适应的MJPEG流质量。
+
+每个/video_feed连接测量自己的消费速度：生成器yield一帧后，服务器把它写入套接字，
+写入在套接字发送缓冲区满时阻塞，因此从yield到生成器恢复执行的时间就是该客户端
+“吃掉”这一帧所用的时间。每个测量窗口内阻塞于发送的时间占比（负载）偏高时降低该客户端的档位
+（分辨率、JPEG质量和帧率），偏低时再逐级升高；升级后很快又降级时延长下一次升级前的
+等待时间，避免在两个档位之间来回振荡。按窗口而不是按帧统计，是因为缓冲区满时的写入阻塞
+是突发的（一次长时间阻塞之后紧接着几次立即完成的写入）。
+
+同一档位的客户端共享编码结果：每个档位对每一帧只缩放和编码一次。
+编码的输入是处理线程发布的显示帧，它已被缩小到显示宽度（pipeline.DISPLAY_WIDTH，YOLO调试显示为800），
+因此最高档位就是显示帧本身，不存在分辨率更高的档位。
+慢客户端只会跳过帧，不会阻塞处理线程或其他客户端。
+
+内核的套接字发送缓冲区会自动增长到数MB，慢客户端的背压要很久才会表现为写入阻塞，
+期间排队的帧只会增加显示延迟，因此流式传输连接的发送缓冲区被限制为几帧的大小。
+"""
+
+import itertools
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import cv2
+
+class StreamTier:
+    """一个流质量档位。max_width为None时使用显示帧的宽度（不再缩放）。"""
+    __slots__ = ('name', 'max_width', 'quality', 'fps')
+
+    def __init__(self, name: str, max_width: Optional[int], quality: int, fps: float):
+        self.name = name
+        self.max_width = max_width
+        self.quality = quality
+        self.fps = fps
+
+    def describe(self) -> Dict:
+        return {'name': self.name, 'max_width': self.max_width, 'quality': self.quality, 'fps': self.fps}
+
+# 从高到低排列；'high'与之前所有客户端共用的设置相同（显示帧原尺寸、质量85、25FPS）
+STREAM_TIERS = (
+    StreamTier('high', None, 85, 25),
+    StreamTier('medium', 480, 70, 15),
+    StreamTier('low', 320, 55, 10),
+    StreamTier('minimal', 240, 45, 5),
+)
+DEFAULT_TIER = 'high'
+QUALITY_AUTO = 'auto'
+
+# 自适应参数
+LOAD_WINDOW = 2.0         # 负载测量窗口（秒），每个窗口结束时决定一次是否调整档位
+DOWNGRADE_LOAD = 0.5      # 窗口内超过一半时间阻塞于发送时降级（客户端跟不上当前档位）
+UPGRADE_LOAD = 0.15       # 阻塞时间占比低于该值时可以升级
+UPGRADE_HOLD = 4.0        # 升级前当前档位需要保持的时间（秒）
+MAX_UPGRADE_HOLD = 60.0   # 升级等待时间的上限（秒）
+FAILED_UPGRADE_WINDOW = 5.0  # 升级后在该时间内降级视为升级失败，下次升级等待时间加倍
+SEND_BUFFER_BYTES = 128 * 1024  # 流式传输连接的套接字发送缓冲区（Linux实际分配两倍）
+
+def tier_names() -> List[str]:
+    return [tier.name for tier in STREAM_TIERS]
+
+def limit_send_buffer(sock, size: int = SEND_BUFFER_BYTES) -> bool:
+    """限制连接的发送缓冲区，返回是否成功（服务器没有提供套接字时为False）。"""
+    if sock is None:
+        return False
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, size)
+        return True
+    except (OSError, AttributeError):
+        return False
+
+class TierEncoder:
+    """
+    按档位缓存最新一帧的JPEG编码：同一档位的所有客户端共享同一次缩放和编码。
+    每个档位有自己的锁，编码不持有帧锁，也不阻塞其他档位。
+    """
+
+    def __init__(self, tiers=STREAM_TIERS, observe: Optional[Callable[[float], None]] = None):
+        self._cache = {tier.name: (None, None) for tier in tiers}  # 档位 -> (帧序号, JPEG字节)
+        self._locks = {tier.name: threading.Lock() for tier in tiers}
+        self._resized = {tier.name: None for tier in tiers}  # 档位 -> 复用的缩放缓冲区（只在档位锁内使用）
+        self.observe = observe  # 记录实际编码耗时（秒）的回调
+        self.encodes = 0
+
+    def encode(self, tier: StreamTier, seq: int, frame) -> Optional[bytes]:
+        """返回帧（序号seq）在该档位的JPEG编码，已编码过时直接返回缓存。"""
+        with self._locks[tier.name]:
+            cached_seq, data = self._cache[tier.name]
+            if cached_seq == seq:
+                return data
+
+            encode_start = time.perf_counter()
+            if tier.max_width is not None and frame.shape[1] > tier.max_width:
+                scale = tier.max_width / frame.shape[1]
+                size = (tier.max_width, int(frame.shape[0] * scale))
+                dst = self._resized[tier.name]
+                if dst is None or dst.shape[:2] != (size[1], size[0]) or dst.shape[2:] != frame.shape[2:]:
+                    dst = None
+                frame = cv2.resize(frame, size, dst=dst, interpolation=cv2.INTER_AREA)
+                self._resized[tier.name] = frame
+            ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, tier.quality])
+            data = buffer.tobytes() if ret else None
+            self.encodes += 1
+            if self.observe is not None:
+                self.observe(time.perf_counter() - encode_start)
+
+            self._cache[tier.name] = (seq, data)
+            return data
+
+class ClientStream:
+    """
+    一个流式传输客户端的档位选择。
+
+    Args:
+        quality: 'auto'为自适应，否则为固定的档位名称
+        tiers: 从高到低排列的档位
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, quality: str = QUALITY_AUTO, tiers=STREAM_TIERS, start: Optional[float] = None):
+        self.tiers = tiers
+        names = [tier.name for tier in tiers]
+        self.adaptive = quality == QUALITY_AUTO
+        self.index = names.index(DEFAULT_TIER if self.adaptive else quality)
+        self.id = next(self._ids)
+        self.load = 0.0
+        self.upgrade_hold = UPGRADE_HOLD
+        now = time.monotonic() if start is None else start
+        self.connected_at = now
+        self._changed_at = now
+        self._upgraded_at = None
+        self._window_start = now
+        self._window_send = 0.0
+        self.frames = 0
+        self.bytes = 0
+        self.send_seconds = 0.0
+        self.changes = 0
+
+    @property
+    def tier(self) -> StreamTier:
+        return self.tiers[self.index]
+
+    @property
+    def interval(self) -> float:
+        return 1.0 / self.tier.fps
+
+    def observe(self, nbytes: int, send_seconds: float, now: Optional[float] = None) -> None:
+        """记录一帧的发送（字节数和从yield到恢复的阻塞时间），必要时调整档位。"""
+        now = time.monotonic() if now is None else now
+        self.frames += 1
+        self.bytes += nbytes
+        self.send_seconds += send_seconds
+        self._window_send += send_seconds
+
+        window = now - self._window_start
+        if window < LOAD_WINDOW:
+            return
+        self.load = min(1.0, self._window_send / window)
+        self._window_start = now
+        self._window_send = 0.0
+        if self.adaptive:
+            self._adapt(now)
+
+    def _adapt(self, now: float) -> None:
+        if self.load > DOWNGRADE_LOAD and self.index < len(self.tiers) - 1:
+            if self._upgraded_at is not None and now - self._upgraded_at < FAILED_UPGRADE_WINDOW:
+                # 刚升级就跟不上：这个客户端的带宽不够，下次多等一会再尝试
+                self.upgrade_hold = min(self.upgrade_hold * 2, MAX_UPGRADE_HOLD)
+            self._upgraded_at = None
+            self._change(self.index + 1, now)
+        elif self.load < UPGRADE_LOAD and now - self._changed_at >= self.upgrade_hold and self.index > 0:
+            self._upgraded_at = now
+            self._change(self.index - 1, now)
+
+    def _change(self, index: int, now: float) -> None:
+        self.index = index
+        self._changed_at = now
+        self.changes += 1
+
+    def describe(self, now: Optional[float] = None) -> Dict:
+        now = time.monotonic() if now is None else now
+        elapsed = max(now - self.connected_at, 1e-6)
+        return {
+            'id': self.id,
+            'adaptive': self.adaptive,
+            'tier': self.tier.name,
+            'load': round(self.load, 3),
+            'fps': round(self.frames / elapsed, 2),
+            'kbytes_per_second': round(self.bytes / elapsed / 1024, 1),
+            'send_share': round(self.send_seconds / elapsed, 3),
+            'tier_changes': self.changes,
+            'upgrade_hold': self.upgrade_hold,
+            'connected_seconds': round(elapsed, 1),
+        }
+
+class StreamClients:
+    """当前连接的流式传输客户端（用于/stream_stats）。"""
+
+    def __init__(self):
+        self._clients: Dict[int, ClientStream] = {}
+        self._lock = threading.Lock()
+
+    def add(self, client: ClientStream) -> None:
+        with self._lock:
+            self._clients[client.id] = client
+
+    def remove(self, client: ClientStream) -> None:
+        with self._lock:
+            self._clients.pop(client.id, None)
+
+    def describe(self) -> List[Dict]:
+        with self._lock:
+            clients = list(self._clients.values())
+        now = time.monotonic()
+        return [client.describe(now) for client in clients]
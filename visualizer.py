@@ -88,6 +88,63 @@ class Visualizer:
         if counter.start_val is not None:
             self._draw_vertical_bar(frame, counter.start_val, keypoint.y, counter.threshold, counter.direction)
 
+    def overlay_info(self, counter, landmarks):
+        """
+        draw_debug_info()的内容作为客户端绘制的元数据：
+        跟踪的关键点、状态文本行（文本和CSS颜色）以及运动条形图的数值。
+        """
+        state = counter.state
+        landmark_idx = counter.landmark
+        keypoint = landmarks.landmark[landmark_idx]
+        lines = []
+
+        if state == 'calibrating':
+            lines.append((f"校准中... ({counter.calibration_frames}/30)", (255, 165, 0)))
+        else:
+            lines.append((f"状态: {state.upper()}", (255, 255, 0)))
+        lines.append((f"验证: {counter.validation_score:.2f}",
+                      (0, 255, 0) if counter.validation_score >= 0.4 else (0, 0, 255)))
+        if hasattr(counter, 'enable_anti_cheat') and counter.enable_anti_cheat:
+            lines.append((f"反作弊: {'开启' if counter.enable_anti_cheat else '关闭'}", (255, 255, 0)))
+
+        if hasattr(counter, 'debug_info') and counter.debug_info:
+            debug = counter.debug_info
+            if 'movement_from_start' in debug:
+                lines.append((f"运动: {debug['movement_from_start']:.3f}", (255, 255, 255)))
+            if 'threshold' in debug:
+                lines.append((f"阈值: {debug['threshold']:.3f}", (255, 255, 255)))
+            for key, yes, no in (('is_down', "向下", "非向下"), ('is_up', "向上", "非向上"),
+                                 ('is_at_start', "在起始位置", "非起始位置"),
+                                 ('is_valid_form', "姿势良好", "姿势不佳")):
+                if key in debug:
+                    lines.append((yes if debug[key] else no, (0, 255, 0) if debug[key] else (0, 0, 255)))
+            if 'stable_counter' in debug:
+                lines.append((f"稳定: {debug['stable_counter']}/{counter.stable_frames}", (255, 255, 255)))
+
+        if counter.validation_score < 0.4 and state != 'calibrating':
+            lines.append(("姿势不佳 - 请调整您的位置", (0, 0, 255)))
+
+        bar = None
+        if counter.start_val is not None:
+            bar = {
+                'start': round(counter.start_val, 4),
+                'current': round(keypoint.y, 4),
+                'threshold': round(counter.threshold, 4),
+                'direction': counter.direction,
+            }
+
+        return {
+            'keypoint': landmark_idx if keypoint.visibility > counter.min_visibility else None,
+            'status': [[text, self._css_color(color)] for text, color in lines],
+            'bar': bar,
+        }
+
+    @staticmethod
+    def _css_color(bgr):
+        """OpenCV的BGR颜色转换为CSS颜色。"""
+        b, g, r = bgr
+        return f"rgb({r},{g},{b})"
+
     def _draw_vertical_bar(self, frame, start_y_norm, current_y_norm, threshold_norm, direction):
         """
         在屏幕右侧绘制垂直条形图以显示运动。
@@ -1,13 +1,25 @@
 from flask import Flask, render_template, request, jsonify, Response, send_file
 import cv2
-import mediapipe as mp
 import numpy as np
 import json
 import threading
 import time
+import uuid
 from datetime import datetime
 from counters import get_counter, list_counters
 from visualizer import Visualizer
+from multi_person import MultiPersonCounter
+from inference_backends import configure_backends, get_detector_backend, get_pose_backend
+from frame_clock import create_frame_clock
+from smoothing import SMOOTHING_METHODS, LandmarkSmoother, create_filter
+from metrics import SessionMetrics, render_prometheus
+from pipeline import FramePipeline
+from event_stream import EventBroker, StatsTracker
+from h264_stream import H264Broadcaster
+from frame_slot import FrameSlot
+from stream_tiers import (QUALITY_AUTO, STREAM_TIERS, ClientStream, StreamClients, TierEncoder,
+                          limit_send_buffer, tier_names)
+import argparse
 import base64
 import os
 from werkzeug.utils import secure_filename
@@ -47,8 +59,30 @@ pose = None
 mp_drawing = None
 processing_thread = None
 is_processing = False
-current_frame = None
-frame_lock = threading.Lock()
+# 最新的网页显示帧、序号和客户端覆盖层元数据（已编码的JSON字节）；
+# 流式传输据序号判断是否有新帧以及共享编码，读取时不持有锁也不复制帧
+frame_slot = FrameSlot()
+OVERLAY_MODES = ('server', 'client')  # 覆盖层由服务器绘制到帧中，或由浏览器在canvas上绘制
+STREAM_TARGET_FPS = 25  # 覆盖层元数据的推送帧率（MJPEG帧率按客户端档位决定，见stream_tiers）
+frame_clock = None  # 视频帧时钟（计数和事件时间戳使用视频时间而不是挂钟时间）
+landmark_smoother = None  # 单人模式的关键点平滑阶段（未启用时为None）
+session_metrics = None  # 当前会话的分阶段耗时和计数延迟指标
+event_broker = EventBroker()  # /events 推送的会话事件（计数和统计增量）
+STATS_INTERVAL = 1.0  # 统计增量的发布间隔（秒）
+RECENT_COUNTS = 10  # 会话快照中包含的最近计数事件数
+stream_clients = StreamClients()  # 当前连接的MJPEG客户端及其档位
+
+def _observe_encode(seconds):
+    if session_metrics is not None:
+        session_metrics.observe('encode', seconds)
+
+tier_encoder = TierEncoder(observe=_observe_encode)  # 每个档位每帧只编码一次，同档位客户端共享
+
+def _latest_frame():
+    seq, frame, _ = frame_slot.latest()
+    return seq, frame
+
+h264_broadcaster = H264Broadcaster(_latest_frame)  # /video_mp4：所有观看者共享的H.264 fMP4编码
 
 # 视频录制变量
 video_writer = None
@@ -67,199 +101,250 @@ session_data = {
     'video_source': '',
     'parameters': {}
 }
+# 会话版本（/get_session_data的ETag）：每个会话有唯一的ID，
+# 返回的任何字段变化时版本号递增；在进程重启或多个工作进程之间不会与旧会话的ETag冲突
+session_id = uuid.uuid4().hex
+session_version = 0
+
+# 模型预热状态
+warmup_state = {
+    'status': 'not_started',  # not_started, warming_up, ready, failed
+    'started_at': None,
+    'finished_at': None,
+    'duration': None,
+    'models': {},
+    'backends': {},
+    'error': None
+}
+warmup_done = threading.Event()
+WARMUP_INFERENCES = 3  # 每个模型的预热推理次数
 
 def initialize_mediapipe():
-    """初始化MediaPipe姿态检测"""
+    """初始化姿态检测（默认MediaPipe，也可以是回放后端，见inference_backends）"""
     global mp_pose, pose, mp_drawing
-    mp_pose = mp.solutions.pose
-    pose = mp_pose.Pose(
-        static_image_mode=False,
-        min_detection_confidence=0.5,
-        min_tracking_confidence=0.5
-    )
-    mp_drawing = mp.solutions.drawing_utils
+    backend = get_pose_backend()
+    mp_pose = backend  # 提供POSE_CONNECTIONS
+    pose = backend.create_estimator()
+    mp_drawing = backend  # 提供draw_landmarks
+
+def warmup_models():
+    """加载姿态和检测模型，并用几次虚拟推理完成首次推理的图/内核初始化"""
+    warmup_state['status'] = 'warming_up'
+    warmup_state['started_at'] = datetime.now().isoformat()
+    start = time.time()
+    dummy_frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    
+    try:
+        # 姿态模型
+        model_start = time.time()
+        if mp_pose is None:
+            initialize_mediapipe()
+        for _ in range(WARMUP_INFERENCES):
+            pose.process(dummy_frame)
+        warmup_state['models']['pose'] = round(time.time() - model_start, 3)
+        warmup_state['backends']['pose'] = mp_pose.name
+        
+        # 检测模型（YOLO权重加载后缓存，供所有跟踪器共享）
+        model_start = time.time()
+        detector_backend = get_detector_backend()
+        warmup_state['backends']['detector'] = detector_backend.name
+        if detector_backend.available:
+            detector_backend.warmup(dummy_frame, WARMUP_INFERENCES)
+            warmup_state['models']['yolo'] = round(time.time() - model_start, 3)
+        else:
+            warmup_state['models']['yolo'] = None
+        
+        warmup_state['status'] = 'ready'
+        print(f"🔥 模型预热完成，用时 {time.time() - start:.2f}s")
+    except Exception as e:
+        warmup_state['status'] = 'failed'
+        warmup_state['error'] = str(e)
+        print(f"❌ 模型预热失败: {e}")
+    finally:
+        warmup_state['finished_at'] = datetime.now().isoformat()
+        warmup_state['duration'] = round(time.time() - start, 3)
+        warmup_done.set()
+
+def start_warmup():
+    """在后台线程中启动模型预热"""
+    if warmup_state['status'] != 'not_started':
+        return
+    warmup_state['status'] = 'warming_up'
+    warmup_thread = threading.Thread(target=warmup_models, name='model-warmup')
+    warmup_thread.daemon = True
+    warmup_thread.start()
+
+def bump_session_version():
+    """会话数据的任何字段变化后调用（先修改数据，再递增版本号）。"""
+    global session_version
+    session_version += 1
+
+def session_snapshot():
+    """会话快照：标量字段和最近的计数事件（不包含完整的计数列表）"""
+    counts = session_data.get('counts', [])
+    snapshot = {key: value for key, value in session_data.items() if key != 'counts'}
+    snapshot['total_reps'] = len(counts)
+    snapshot['recent_counts'] = counts[-RECENT_COUNTS:]
+    snapshot['is_processing'] = is_processing
+    return snapshot
 
 def process_video_stream():
     """在后台线程中处理视频流 - 支持MediaPipe和YOLO"""
-    global current_frame, is_processing, current_counter, current_visualizer
+    global is_processing, current_counter, current_visualizer
     global video_capture, session_data, video_writer, is_recording, recorded_frames
+    global frame_clock
     
-    counter_type = session_data.get('counter_type', 'mediapipe')
+    is_camera = session_data.get('video_source', '0').isdigit()
     
-    # 获取视频FPS以获得适当的时序
-    video_fps = 30  # 默认FPS
-    if video_capture:
-        video_fps = video_capture.get(cv2.CAP_PROP_FPS)
-        if video_fps <= 0 or video_fps > 60:
-            video_fps = 30  # 回退到30 FPS
+    # 相机读取本身按捕获速率阻塞；文件仅在实时播放模式下按视频FPS节流显示，
+    # 计数和时间戳只依赖帧时钟，因此关闭节流（快于实时处理）不会改变结果
+    pace_playback = not is_camera and session_data.get('realtime', True)
+    frame_delay = 1.0 / frame_clock.fps  # 每帧秒数
     
-    # 计算适当的帧延迟
-    frame_delay = 1.0 / video_fps  # 每帧秒数
+    metrics = session_metrics
+    stats_frames = metrics.frames
+    stats_time = time.monotonic()
+    stats = StatsTracker(STATS_INTERVAL, stats_time)
+    pipeline = FramePipeline(
+        current_counter, session_data.get('counter_type', 'mediapipe'), session_data['counter_name'],
+        frame_clock, metrics, pose=pose, mp_pose=mp_pose, mp_drawing=mp_drawing,
+        visualizer=current_visualizer, landmark_smoother=landmark_smoother,
+        client_overlay=session_data.get('overlay') == 'client'
+    )
     
+    last_shape = None  # 上一帧的形状，解码到缓冲池中形状相同的复用数组
     while is_processing and video_capture and video_capture.isOpened():
-        frame_start_time = time.time()
+        frame_start_time = time.monotonic()
+        timer = metrics.frame_timer()
         
-        ret, frame = video_capture.read()
+        ret, frame = pipeline.buffers.read(video_capture, last_shape)
+        captured_at = time.perf_counter()  # 用于测量“动作完成 → 计数增加”的延迟
+        timer.mark('decode')
         if not ret:
-            if session_data.get('video_source', '0').isdigit():
+            if is_camera:
                 # 相机断开连接
                 break
             else:
                 # 视频结束，重新开始
                 video_capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
                 continue
-            
-        # 保持原始帧用于录制（全分辨率）
-        recording_frame = frame.copy()
         
-        # 仅为网页显示调整帧大小
-        if frame.shape[1] > 640:
-            scale = 640 / frame.shape[1]
-            frame = cv2.resize(frame, (int(frame.shape[1] * scale), int(frame.shape[0] * scale)))
+        last_shape = frame.shape
         
-        if counter_type == 'mediapipe':
-            # 使用MediaPipe处理人体动作计数器
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = pose.process(frame_rgb)
-            
-            if results.pose_landmarks and current_counter:
-                # 在网页显示帧上绘制姿态关键点
-                mp_drawing.draw_landmarks(frame, results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
-                
-                # 更新计数器
-                old_count = current_counter.count
-                count = current_counter.update(results.pose_landmarks)
-                
-                # 记录计数变化
-                if count > old_count:
-                    session_data['counts'].append({
-                        'count': count,
-                        'timestamp': datetime.now().isoformat(),
-                        'validation_score': getattr(current_counter, 'validation_score', 1.0)
-                    })
-                
-                session_data['current_count'] = count
-                
-                # 在网页帧上显示计数器信息
-                cv2.putText(frame, f'{session_data["counter_name"]}: {count}', 
-                           (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                
-                # 为网页显示添加时间戳
-                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                cv2.putText(frame, timestamp, (10, frame.shape[0] - 10), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-                
-                # 在网页帧上绘制调试信息
-                if current_visualizer:
-                    current_visualizer.draw_debug_info(frame, current_counter, results.pose_landmarks)
-                
-                # 用于录制：在原始分辨率帧上绘制覆盖层
-                if is_recording and video_writer is not None:
-                    # 将关键点缩放到原始帧大小
-                    scale_x = recording_frame.shape[1] / frame.shape[1]
-                    scale_y = recording_frame.shape[0] / frame.shape[0]
-                    
-                    # 在录制帧上绘制姿态关键点
-                    mp_drawing.draw_landmarks(recording_frame, results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
-                    
-                    # 将计数器信息添加到录制帧（缩放）
-                    cv2.putText(recording_frame, f'{session_data["counter_name"]}: {count}', 
-                               (int(10 * scale_x), int(30 * scale_y)), cv2.FONT_HERSHEY_SIMPLEX, 
-                               1 * min(scale_x, scale_y), (0, 255, 0), 2)
-                    
-                    # 将时间戳添加到录制帧
-                    cv2.putText(recording_frame, timestamp, 
-                               (int(10 * scale_x), recording_frame.shape[0] - int(10 * scale_y)), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.5 * min(scale_x, scale_y), (255, 255, 255), 1)
+        # 该帧的视频时间（相机捕获时间戳或帧序号/FPS）
+        frame_clock.tick(video_capture)
         
-        elif counter_type == 'yolo':
-            # 使用YOLO处理动物/物体计数器
-            if current_counter:
-                # 用网页显示帧更新计数器
-                old_count = current_counter.count
-                count = current_counter.update(frame)
-                
-                # 记录计数变化
-                if count > old_count:
-                    session_data['counts'].append({
-                        'count': count,
-                        'timestamp': datetime.now().isoformat(),
-                        'confidence': getattr(current_counter.debug_info, 'confidence', 0.0)
-                    })
-                
-                session_data['current_count'] = count
-                
-                # 获取用于显示的检测
-                detections = current_counter.tracker.detect_objects(frame)
-                best_detection = current_counter.tracker.get_best_detection(detections)
-                
-                # 在网页帧上用YOLO检测绘制调试信息
-                frame = current_counter.draw_debug_info(frame, best_detection)
-                
-                # 为网页显示添加时间戳
-                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                cv2.putText(frame, timestamp, (10, frame.shape[0] - 10), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-                
-                # 用于录制：处理并在原始分辨率帧上绘制
-                if is_recording and video_writer is not None:
-                    # 用原始帧更新计数器以获得适当的检测
-                    recording_detections = current_counter.tracker.detect_objects(recording_frame)
-                    recording_detection = current_counter.tracker.get_best_detection(recording_detections)
-                    
-                    # 在录制帧上绘制调试信息（全分辨率）
-                    recording_frame = current_counter.draw_debug_info(recording_frame, recording_detection)
-                    
-                    # 将时间戳添加到录制帧
-                    cv2.putText(recording_frame, timestamp, (10, recording_frame.shape[0] - 10), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        recording = is_recording and video_writer is not None
+        result = pipeline.process(frame, timer, captured_at, recording)
+        
+        changed = bool(result.events) or result.count != session_data['current_count']
+        session_data['counts'].extend(result.events)
+        session_data['current_count'] = result.count
+        if result.people is not None and result.people != session_data.get('people'):
+            session_data['people'] = result.people
+            changed = True
+        if changed:
+            bump_session_version()
+        
+        # 推送计数事件（每个事件只序列化一次，与连接数无关）
+        if result.events:
+            first_rep = len(session_data['counts']) - len(result.events) + 1
+            for rep_number, event in enumerate(result.events, first_rep):
+                event_broker.publish('count', dict(event, total_reps=rep_number))
         
         # 如果录制处于活动状态，则录制视频（使用带覆盖层的原始帧）
-        if is_recording and video_writer is not None:
+        if recording and result.recording_frame is not None:
             try:
-                video_writer.write(recording_frame)
+                video_writer.write(result.recording_frame)
                 recorded_frames += 1
             except Exception:
                 # 静默处理录制错误
                 pass
-        
-        # 存储网页显示帧用于流式传输
-        with frame_lock:
-            current_frame = frame.copy()
-        
-        # 保持适当的帧率时序
-        frame_process_time = time.time() - frame_start_time
-        sleep_time = max(0, frame_delay - frame_process_time)
-        time.sleep(sleep_time)
+            timer.mark('record')
+        
+        # 覆盖层元数据在这里编码一次，所有客户端共享
+        overlay = None
+        if result.overlay is not None:
+            overlay = json.dumps(result.overlay, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        
+        # 发布网页显示帧用于流式传输（交接引用，不复制；每帧都是新数组）
+        frame_slot.publish(result.display_frame, overlay)
+        metrics.end_frame(timer)
+        
+        # 定期推送只包含变化字段的统计增量
+        now = time.monotonic()
+        if stats.due(now):
+            values = {
+                'current_count': result.count,
+                'total_reps': len(session_data['counts']),
+                'fps': round((metrics.frames - stats_frames) / max(now - stats_time, 1e-6), 1)
+            }
+            if result.people is not None:
+                values['people'] = result.people
+            delta = stats.delta(values, now)
+            if delta:
+                event_broker.publish('stats', delta)
+            stats_frames = metrics.frames
+            stats_time = now
+        
+        # 实时播放时保持适当的帧率时序（仅影响显示，不影响计数）
+        if pace_playback:
+            frame_process_time = time.monotonic() - frame_start_time
+            sleep_time = max(0, frame_delay - frame_process_time)
+            time.sleep(sleep_time)
 
-def generate_frames():
-    """为视频流生成帧"""
-    global current_frame
+def generate_frames(client):
+    """
+    为一个客户端生成视频流帧。
+    分辨率、JPEG质量和帧率由客户端的档位决定；自适应客户端根据每帧的发送阻塞时间调整档位。
+    """
+    last_seq = None
+    stream_clients.add(client)
     
-    # 网页流式传输的目标帧率
-    target_fps = 25  # 略低于源以获得稳定的网页流式传输
-    frame_delay = 1.0 / target_fps
+    try:
+        while True:
+            frame_start_time = time.monotonic()
+            
+            # 取得已发布帧的不可变引用：编码和发送不持有锁，慢客户端不会阻塞处理线程
+            seq, frame, _ = frame_slot.latest()
+            
+            if frame is not None and seq != last_seq:
+                frame_bytes = tier_encoder.encode(client.tier, seq, frame)
+                if frame_bytes is not None:
+                    last_seq = seq
+                    chunk = (b'--frame\r\n'
+                             b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+                    # 生成器在服务器把这一块写入套接字后才恢复执行：这段时间就是客户端的消费时间
+                    send_start = time.monotonic()
+                    yield chunk
+                    client.observe(len(chunk), time.monotonic() - send_start)
+            
+            # 按客户端档位的帧率节流
+            frame_process_time = time.monotonic() - frame_start_time
+            time.sleep(max(0, client.interval - frame_process_time))
+    finally:
+        stream_clients.remove(client)
+
+def generate_overlay():
+    """以Server-Sent Events流式传输覆盖层元数据（与MJPEG帧相同的节奏，只发送新的元数据）"""
+    frame_delay = 1.0 / STREAM_TARGET_FPS
+    last_seq = None
     
+    yield b'retry: 2000\n\n'
     while True:
         frame_start_time = time.time()
         
-        with frame_lock:
-            if current_frame is not None:
-                # 将帧编码为JPEG
-                ret, buffer = cv2.imencode('.jpg', current_frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-                if ret:
-                    frame_bytes = buffer.tobytes()
-                    yield (b'--frame\r\n'
-                           b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+        seq, _, payload = frame_slot.latest()
+        if payload is not None and seq != last_seq:
+            last_seq = seq
+            yield b'data: ' + payload + b'\n\n'
         
-        # 为网页流式传输保持一致的帧率
         frame_process_time = time.time() - frame_start_time
-        sleep_time = max(0, frame_delay - frame_process_time)
-        time.sleep(sleep_time)
+        time.sleep(max(0, frame_delay - frame_process_time))
 
 def list_counters_by_category():
-    """返回按类别组织的计数器。"""
-    from counters import list_counters, get_counter
+    """返回按类别组织的计数器（基于清单元数据，无需导入或实例化计数器）。"""
+    from counters import list_counters, get_counter_metadata
     
     categorized = {
         'Human': [],
@@ -269,32 +354,23 @@ def list_counters_by_category():
     
     all_counters = list_counters()
     for counter_name in all_counters:
-        try:
-            CounterClass = get_counter(counter_name)
-            if CounterClass:
-                temp_counter = CounterClass()
-                counter_type = get_counter_type(temp_counter)
-                
-                counter_info = {
-                    'name': counter_name,
-                    'type': counter_type,
-                    'object_class': getattr(temp_counter, 'object_class', 'human'),
-                    'logic_type': getattr(temp_counter, 'logic_type', 'exercise'),
-                    'confidence_threshold': getattr(temp_counter, 'confidence_threshold', 0.5),
-                    'description': getattr(temp_counter, 'description', ''),
-                    'has_center_line': hasattr(temp_counter, 'adjust_center_line') or hasattr(temp_counter, 'start_position') or hasattr(temp_counter, 'center_reference')
-                }
-                
-                if counter_type == 'yolo':
-                    if counter_info['object_class'] in ['cat', 'dog', 'bird', 'horse', 'sheep', 'cow', 'elephant', 'bear', 'zebra', 'giraffe']:
-                        categorized['Animal'].append(counter_info)
-                    else:
-                        categorized['Object'].append(counter_info)
-                else:
-                    categorized['Human'].append(counter_info)
-        except Exception:
-            # 静默跳过有问题的计数器
-            pass
+        entry = get_counter_metadata(counter_name)
+        if not entry:
+            continue
+        
+        metadata = entry['metadata']
+        counter_type = metadata.get('detection_type', 'mediapipe')
+        counter_info = {
+            'name': counter_name,
+            'type': counter_type,
+            'object_class': metadata.get('object_class', 'human'),
+            'logic_type': metadata.get('logic_type', 'exercise'),
+            'confidence_threshold': metadata.get('confidence_threshold', 0.5),
+            'description': metadata.get('description', ''),
+            'has_center_line': metadata.get('has_center_line', False)
+        }
+        
+        categorized.setdefault(entry['category'], []).append(counter_info)
     
     return categorized
 
@@ -304,27 +380,71 @@ def index():
     categorized_counters = list_counters_by_category()
     return render_template('index.html', counters=categorized_counters)
 
+@app.route('/ready')
+def ready():
+    """报告模型预热状态"""
+    status_code = 200 if warmup_state['status'] == 'ready' else 503
+    return jsonify(warmup_state), status_code
+
 @app.route('/video_feed')
 def video_feed():
-    """视频流路由"""
-    return Response(generate_frames(),
+    """视频流路由（quality: auto为按客户端自适应，或固定的档位名称）"""
+    quality = request.args.get('quality', QUALITY_AUTO) or QUALITY_AUTO
+    if quality != QUALITY_AUTO and quality not in tier_names():
+        return jsonify({'error': f'未知的流质量: {quality}'}), 400
+    # 开发服务器提供底层套接字：限制发送缓冲区，让慢客户端的背压尽快表现为写入阻塞
+    limit_send_buffer(request.environ.get('werkzeug.socket'))
+    return Response(generate_frames(ClientStream(quality)),
                    mimetype='multipart/x-mixed-replace; boundary=frame')
 
+@app.route('/video_mp4')
+def video_mp4():
+    """H.264分片MP4视频流路由（供MediaSource播放，编解码器字符串在X-Video-Codec响应头中）"""
+    if not h264_broadcaster.available:
+        return jsonify({'error': '未找到ffmpeg，H.264流不可用'}), 503
+    h264_broadcaster.ensure_running()
+    codec = h264_broadcaster.wait_ready()
+    if codec is None:
+        return jsonify({'error': 'H.264编码器未就绪（没有正在处理的视频？）'}), 503
+    limit_send_buffer(request.environ.get('werkzeug.socket'))
+    return Response(h264_broadcaster.stream(), mimetype='video/mp4',
+                   headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no',
+                            'X-Video-Codec': codec})
+
+@app.route('/overlay_feed')
+def overlay_feed():
+    """客户端覆盖层元数据流路由"""
+    return Response(generate_overlay(), mimetype='text/event-stream',
+                   headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/start_counter', methods=['POST'])
 def start_counter():
     """使用所选参数启动计数器 - 支持所有计数器类型"""
     global current_counter, current_visualizer, video_capture, is_processing
-    global processing_thread, session_data
+    global processing_thread, session_data, frame_clock, landmark_smoother, session_metrics
+    global session_id, session_version
     
     try:
         data = request.get_json()
         counter_name = data['counter']
         video_source = data.get('video_source', '0')
         parameters = data.get('parameters', {})
+        multi_person = bool(data.get('multi_person', False))
+        realtime = bool(data.get('realtime', True))
+        smoothing = data.get('smoothing', 'none') or 'none'
+        if smoothing not in SMOOTHING_METHODS:
+            return jsonify({'error': f'未知的平滑方法: {smoothing}'}), 400
+        overlay = data.get('overlay', 'server') or 'server'
+        if overlay not in OVERLAY_MODES:
+            return jsonify({'error': f'未知的覆盖层模式: {overlay}'}), 400
         
         # 停止现有处理
         stop_counter()
         
+        # 如果预热仍在进行，等待其完成，避免与预热线程争用模型
+        if warmup_state['status'] == 'warming_up':
+            warmup_done.wait(timeout=60)
+        
         # 获取计数器类并创建实例
         CounterClass = get_counter(counter_name)
         if not CounterClass:
@@ -333,8 +453,20 @@ def start_counter():
         current_counter = CounterClass()
         counter_type = get_counter_type(current_counter)
         
+        if multi_person:
+            # 多人模式仅支持人体动作计数器
+            if counter_type != 'mediapipe':
+                return jsonify({'error': '多人模式仅支持人体动作计数器'}), 400
+            current_counter = MultiPersonCounter(CounterClass, smoothing=smoothing)
+            counter_type = 'multi_person'
+        
         # 初始化适当的检测系统
-        if counter_type == 'mediapipe':
+        if counter_type == 'multi_person':
+            # 多人模式为每个人创建独立的姿态估计器，这里只需要绘图工具
+            if mp_pose is None:
+                initialize_mediapipe()
+            current_visualizer = None
+        elif counter_type == 'mediapipe':
             # 为人体动作计数器初始化MediaPipe
             if mp_pose is None:
                 initialize_mediapipe()
@@ -345,7 +477,12 @@ def start_counter():
         
         # 应用自定义参数
         for param, value in parameters.items():
-            if hasattr(current_counter, param):
+            if counter_type == 'multi_person':
+                supported = current_counter.has_counter_param(param)
+            else:
+                supported = hasattr(current_counter, param)
+            
+            if supported:
                 # 将字符串值转换为适当类型
                 if param in ['threshold', 'validation_threshold', 'min_visibility', 'confidence_threshold']:
                     value = float(value)
@@ -354,7 +491,10 @@ def start_counter():
                 elif param in ['enable_anti_cheat']:
                     value = bool(value)
                 
-                setattr(current_counter, param, value)
+                if counter_type == 'multi_person':
+                    current_counter.set_counter_param(param, value)
+                else:
+                    setattr(current_counter, param, value)
         
         # 初始化视频捕获
         if video_source.isdigit():
@@ -365,16 +505,38 @@ def start_counter():
         if not video_capture.isOpened():
             return jsonify({'error': f'无法打开视频源: {video_source}'}), 400
         
+        # 帧时钟：事件时间 = 会话开始时间 + 视频时间
+        start_time = datetime.now()
+        frame_clock = create_frame_clock(video_capture, video_source, start_time)
+        
+        # 推理和计数器之间的平滑阶段（多人模式在每个人的轨迹中平滑）
+        landmark_smoother = None
+        if counter_type == 'mediapipe' and smoothing != 'none':
+            landmark_smoother = LandmarkSmoother(smoothing, frame_clock.fps)
+        elif counter_type == 'yolo':
+            current_counter.smoother = create_filter(smoothing, 'bbox', frame_clock.fps)
+        
         # 重置会话数据
         session_data = {
             'counts': [],
-            'start_time': datetime.now().isoformat(),
+            'start_time': start_time.isoformat(),
             'current_count': 0,
             'counter_name': counter_name,
             'counter_type': counter_type,
             'video_source': video_source,
-            'parameters': parameters
+            'parameters': parameters,
+            'multi_person': multi_person,
+            'realtime': realtime,
+            'smoothing': smoothing,
+            'overlay': overlay,
+            'fps': frame_clock.fps
         }
+        # 先重置版本再更换ID：读取方先读ID后读版本，不会把新ID和旧会话的版本号组合在一起
+        session_version = 0
+        session_id = uuid.uuid4().hex
+        
+        # 新会话的性能指标（/metrics 导出）
+        session_metrics = SessionMetrics({'counter': counter_name, 'counter_type': counter_type})
         
         # 启动处理线程
         is_processing = True
@@ -382,6 +544,9 @@ def start_counter():
         processing_thread.daemon = True
         processing_thread.start()
         
+        # 通知已连接的客户端新会话开始
+        event_broker.publish('session', session_snapshot())
+        
         return jsonify({
             'success': True, 
             'message': f'已启动 {counter_name} ({counter_type})',
@@ -394,8 +559,8 @@ def start_counter():
 @app.route('/stop_counter', methods=['POST'])
 def stop_counter():
     """停止计数器处理"""
-    global is_processing, video_capture, processing_thread, current_frame
-    global video_writer, is_recording, recording_filename
+    global is_processing, video_capture, processing_thread
+    global video_writer, is_recording, recording_filename, current_counter
     
     is_processing = False
     
@@ -408,12 +573,20 @@ def stop_counter():
     if processing_thread and processing_thread.is_alive():
         processing_thread.join(timeout=2)
     
+    # 释放多人模式的工作线程池和姿态估计器
+    if isinstance(current_counter, MultiPersonCounter):
+        current_counter.close()
+    
     if video_capture:
         video_capture.release()
         video_capture = None
     
-    with frame_lock:
-        current_frame = None
+    frame_slot.clear()
+    
+    event_broker.publish('stopped', {
+        'current_count': session_data.get('current_count', 0),
+        'total_reps': len(session_data.get('counts', []))
+    })
     
     return jsonify({'success': True})
 
@@ -468,10 +641,61 @@ def get_counter_info(counter_name):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/metrics')
+def metrics_endpoint():
+    """以Prometheus文本格式导出当前会话的分阶段耗时和计数延迟"""
+    return Response(render_prometheus(session_metrics),
+                   mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/stream_stats')
+def stream_stats():
+    """当前MJPEG客户端的档位、负载、帧率和字节率，以及可用的档位"""
+    return jsonify({
+        'tiers': [tier.describe() for tier in STREAM_TIERS],
+        'clients': stream_clients.describe(),
+        'encodes': tier_encoder.encodes,
+        'h264': h264_broadcaster.describe(),
+    })
+
+@app.route('/events')
+def events():
+    """以Server-Sent Events推送计数事件和统计增量（替代轮询/get_session_data）"""
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    last_event_id = int(last_event_id) if last_event_id.isdigit() else None
+    return Response(event_broker.stream(session_snapshot, last_event_id),
+                   mimetype='text/event-stream',
+                   headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/get_session_data')
 def get_session_data():
-    """获取当前会话数据"""
-    return jsonify(session_data)
+    """
+    获取当前会话数据。
+    提供since参数（已收到的计数事件数）时只返回之后的计数事件和当前的标量字段，
+    next为下一次轮询使用的游标；状态未变化时返回304（If-None-Match）。
+    """
+    since = request.args.get('since', type=int)
+    # 先读取版本再读取数据：数据总是在版本递增之前修改，因此响应内容不会比ETag旧
+    etag = f'{session_id}-{session_version}-{since if since is not None else "all"}'
+    data = session_data
+    counts = data.get('counts', [])
+    total_reps = len(counts)
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    elif since is None:
+        response = jsonify(data)
+    else:
+        # 游标超出计数事件数说明会话已重新开始，从头返回
+        reset = since < 0 or since > total_reps
+        payload = {key: value for key, value in data.items() if key != 'counts'}
+        payload['counts'] = counts[0 if reset else since:]
+        payload['total_reps'] = total_reps
+        payload['next'] = total_reps
+        payload['reset'] = reset
+        response = jsonify(payload)
+    
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @app.route('/save_session', methods=['POST'])
 def save_session():
@@ -600,7 +824,7 @@ def reset_calibration():
             elif hasattr(current_counter, 'calibrated'):
                 # 重置校准标志以触发重新校准
                 current_counter.calibrated = False
-                current_counter.position_history = []
+                current_counter.position_history.clear()
                 if hasattr(current_counter, 'start_position'):
                     current_counter.start_position = None
                 if hasattr(current_counter, 'center_reference'):
@@ -753,6 +977,19 @@ def adjust_parameter():
         else:
             param_value = float(param_value)
         
+        # 多人模式：参数应用到每个人的计数器
+        if isinstance(current_counter, MultiPersonCounter):
+            if not current_counter.has_counter_param(param_name):
+                return jsonify({'error': f'此计数器不支持参数 {param_name}'}), 400
+            old_value = current_counter.get_counter_param(param_name)
+            current_counter.set_counter_param(param_name, param_value)
+            return jsonify({
+                'success': True, 
+                'message': f'{param_name.replace("_", " ").title()}从 {old_value} 调整到 {param_value}',
+                'old_value': old_value,
+                'new_value': param_value
+            })
+        
         # 检查计数器上是否存在参数
         if not hasattr(current_counter, param_name):
             return jsonify({'error': f'此计数器不支持参数 {param_name}'}), 400
@@ -831,7 +1068,7 @@ def start_recording():
         
         # 开始录制
         is_recording = True
-        recording_start_time = time.time()
+        recording_start_time = frame_clock.timestamp  # 视频时间
         recorded_frames = 0
         
         return jsonify({
@@ -862,10 +1099,10 @@ def stop_recording():
             video_writer.release()
             video_writer = None
         
-        # 计算持续时间
+        # 计算持续时间（视频时间，与处理速度无关）
         duration = None
-        if recording_start_time:
-            duration = round(time.time() - recording_start_time, 2)
+        if recording_start_time is not None and frame_clock is not None:
+            duration = round(frame_clock.timestamp - recording_start_time, 2)
         
         # 获取文件信息
         file_info = {
@@ -897,18 +1134,37 @@ def download_latest_recording():
         return jsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="多计数器Web界面")
+    parser.add_argument('--port', type=int, default=5000, help="监听端口")
+    parser.add_argument('--pose-backend', help="姿态后端: mediapipe（默认）或 replay:<关键点.npy>")
+    parser.add_argument('--detector-backend', help="检测后端: yolo（默认）、yolo:<权重> 或 replay:<检测.json>")
+    parser.add_argument('--inference-latency-ms', type=float, help="回放后端每次推理的人工延迟（毫秒）")
+    parser.add_argument('--inference-jitter-ms', type=float, help="人工延迟的标准差（毫秒）")
+    args = parser.parse_args()
+    
+    # 推理后端（回放后端不需要模型，用于负载测试），未指定的选项使用环境变量
+    configure_backends(
+        pose=args.pose_backend,
+        detector=args.detector_backend,
+        latency=args.inference_latency_ms / 1000.0 if args.inference_latency_ms is not None else None,
+        jitter=args.inference_jitter_ms / 1000.0 if args.inference_jitter_ms is not None else None
+    )
+    
     # 创建必要的目录
     os.makedirs('sessions', exist_ok=True)
     os.makedirs('uploads', exist_ok=True)
     os.makedirs('recordings', exist_ok=True)
     
     print("🏋️ 多计数器Web界面启动中...")
-    print("📱 访问地址: http://localhost:5000")
+    print(f"📱 访问地址: http://localhost:{args.port}")
+    
+    # 在后台预热模型，首个用户无需承担模型加载和首次推理的开销
+    start_warmup()
     
     try:
         # 设置Flask优雅处理错误
         app.config['PROPAGATE_EXCEPTIONS'] = False
-        app.run(debug=False, host='0.0.0.0', port=5000, threaded=True, use_reloader=False)
+        app.run(debug=False, host='0.0.0.0', port=args.port, threaded=True, use_reloader=False)
     except KeyboardInterrupt:
         print("\n⏹️ 用户停止了Web界面。")
     except Exception as e:
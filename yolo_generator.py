@@ -8,6 +8,7 @@ import json
 from jinja2 import Environment, FileSystemLoader
 from yolo_tracker import YOLO_CLASSES
 from yolo_param_generator import generate_yolo_parameters
+from llm_cache import run_concurrent
 
 def generate_yolo_counter(object_class, use_llm=True, **manual_params):
     """
@@ -126,18 +127,14 @@ def create_sample_counters():
         "horse"
     ]
     
-    configs = []
-    for object_class in sample_objects:
-        try:
-            generated_config = generate_yolo_counter(object_class, use_llm=True)
-            configs.append(generated_config)
-        except Exception as e:
-            print(f"❌ 生成 {object_class} 计数器时出错: {e}")
-            # 回退到手动参数
-            generated_config = generate_yolo_counter(object_class, use_llm=False)
-            configs.append(generated_config)
+    def fallback(object_class, error):
+        print(f"❌ 生成 {object_class} 计数器时出错: {error}")
+        # 回退到手动参数
+        return generate_yolo_counter(object_class, use_llm=False)
     
-    return configs
+    # 并发生成（每个对象写入各自的文件），结果顺序与输入一致
+    return run_concurrent(lambda object_class: generate_yolo_counter(object_class, use_llm=True),
+                          sample_objects, on_error=fallback)
 
 def regenerate_existing_counters():
     """使用LLM参数和适当的组织重新生成现有计数器。"""
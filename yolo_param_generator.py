@@ -7,6 +7,9 @@ import json
 import subprocess
 import sys
 from yolo_tracker import YOLO_CLASSES
+from llm_cache import cached_completion
+
+LLM_MODEL = 'llama3'
 
 def generate_yolo_parameters(object_class, counter_type="general"):
     """
@@ -35,17 +38,20 @@ def generate_yolo_parameters(object_class, counter_type="general"):
     try:
         print(f"🤖 使用LLM为{object_class}（{category}）生成参数...")
         
-        # 调用Ollama
-        result = subprocess.run([
-            'ollama', 'run', 'llama3', prompt
-        ], capture_output=True, text=True, timeout=30)
+        def call_llm():
+            # 调用Ollama（OLLAMA_HOST环境变量决定服务地址）
+            result = subprocess.run([
+                'ollama', 'run', LLM_MODEL, prompt
+            ], capture_output=True, text=True, timeout=30)
+            if result.returncode != 0:
+                raise RuntimeError(result.stderr)
+            return result.stdout.strip()
         
-        if result.returncode != 0:
-            print(f"❌ LLM错误: {result.stderr}")
-            return get_default_parameters(object_class, category)
+        # 相同的提示和模型直接使用磁盘缓存，失败的调用和无法解析的响应不会被缓存
+        response = cached_completion(prompt, LLM_MODEL, call_llm,
+                                     validate=lambda text: extract_parameters(text, object_class, category))
         
         # 解析LLM响应
-        response = result.stdout.strip()
         parameters = parse_llm_response(response, object_class, category)
         
         print(f"✅ 为{object_class}生成了参数")
@@ -54,6 +60,9 @@ def generate_yolo_parameters(object_class, counter_type="general"):
     except subprocess.TimeoutExpired:
         print("⏰ LLM超时，使用默认参数")
         return get_default_parameters(object_class, category)
+    except RuntimeError as e:
+        print(f"❌ LLM错误: {e}")
+        return get_default_parameters(object_class, category)
     except Exception as e:
         print(f"❌ 生成参数时出错: {e}")
         return get_default_parameters(object_class, category)
@@ -138,24 +147,27 @@ JSON:"""
 
     return base_prompt + specific_prompt + format_prompt
 
+def extract_parameters(response, object_class, category):
+    """从LLM响应中提取并验证参数，响应无法解析时抛出异常。"""
+    # 在响应中找到JSON
+    json_start = response.find('{')
+    json_end = response.rfind('}') + 1
+    
+    if json_start == -1 or json_end == 0:
+        raise ValueError("响应中未找到JSON")
+    
+    json_str = response[json_start:json_end]
+    params = json.loads(json_str)
+    if not isinstance(params, dict):
+        raise ValueError("响应中的JSON不是对象")
+    
+    # 验证参数
+    return validate_parameters(params, object_class, category)
+
 def parse_llm_response(response, object_class, category):
-    """解析LLM响应并提取参数。"""
+    """解析LLM响应并提取参数，无法解析时使用默认参数。"""
     try:
-        # 在响应中找到JSON
-        json_start = response.find('{')
-        json_end = response.rfind('}') + 1
-        
-        if json_start == -1 or json_end == 0:
-            raise ValueError("响应中未找到JSON")
-        
-        json_str = response[json_start:json_end]
-        params = json.loads(json_str)
-        
-        # 验证参数
-        params = validate_parameters(params, object_class, category)
-        
-        return params
-        
+        return extract_parameters(response, object_class, category)
     except Exception as e:
         print(f"⚠️  解析LLM响应时出错: {e}")
         print(f"原始响应: {response}")
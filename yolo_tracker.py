@@ -6,7 +6,11 @@
 import cv2
 import numpy as np
 from typing import Optional, Tuple, List, Dict
-import time
+import threading
+from collections import deque
+from itertools import islice
+
+from inference_backends import get_detector_backend
 
 try:
     from ultralytics import YOLO
@@ -15,6 +19,50 @@ except ImportError:
     YOLO_AVAILABLE = False
     print("⚠️  YOLO not installed. Run: pip install ultralytics torch torchvision")
 
+# 运动历史长度和各模式检测使用的窗口（运动次数）
+MOVEMENT_HISTORY_SIZE = 30
+BOUNCE_WINDOW = 5
+JUMP_WINDOW = 4
+OSCILLATION_WINDOW = 6
+
+def _bounce_strength(before: float, current: float, after: float) -> float:
+    """
+    弹跳三元组的强度：向下趋势(before > 0)后显著向下(current > t)，
+    紧接着向上(after < -t/2)。强度 > t 等价于满足这些条件。
+    """
+    return min(current, -2.0 * after) if before > 0 else float('-inf')
+
+def _jump_strength(before: float, current: float, after: float) -> float:
+    """
+    跳跃三元组的强度：向上趋势(before < 0)后显著向上(current < -t)，
+    紧接着向下返回(after > 0.3t)。强度 > t 等价于满足这些条件。
+    """
+    return min(-current, after / 0.3) if before < 0 else float('-inf')
+
+# 已加载的YOLO模型缓存（按权重文件），所有跟踪器共享，避免每个会话重复加载权重
+_model_cache = {}
+_model_cache_lock = threading.Lock()
+
+def load_yolo_model(weights: str = 'yolov8n.pt'):
+    """
+    加载（或从缓存获取）YOLO模型。
+    
+    Args:
+        weights: 模型权重文件
+        
+    Returns:
+        YOLO模型，不可用时返回None
+    """
+    if not YOLO_AVAILABLE:
+        return None
+    
+    with _model_cache_lock:
+        if weights not in _model_cache:
+            print(f"🔄 正在加载YOLO模型 {weights}...")
+            _model_cache[weights] = YOLO(weights)
+            print("✅ YOLO模型加载成功!")
+        return _model_cache[weights]
+
 class YOLOTracker:
     """
     基于YOLO的对象跟踪器，用于计数重复性运动。
@@ -30,62 +78,47 @@ class YOLOTracker:
         """
         self.object_class = object_class.lower()
         self.confidence_threshold = confidence_threshold
-        self.model = None
         self.previous_center = None
         self.previous_bbox = None
-        self.movement_history = []
-        self.last_detection_time = 0
+        self.movement_history = deque(maxlen=MOVEMENT_HISTORY_SIZE)
+        self.last_detection_time = 0  # 最近一次检测的视频时间（秒，见frame_clock）
+        self.frame_index = 0
+        self._reset_pattern_state()
         
-        # 初始化YOLO模型
-        if YOLO_AVAILABLE:
-            try:
-                print(f"🔄 正在为'{object_class}'检测加载YOLO模型...")
-                self.model = YOLO('yolov8n.pt')  # Nano模型（最快）
-                print("✅ YOLO模型加载成功!")
-            except Exception as e:
-                print(f"❌ 加载YOLO模型时出错: {e}")
-                self.model = None
-        else:
-            print("❌ YOLO不可用。请安装依赖项。")
+        # 检测后端（默认YOLO，也可以是回放后端，见inference_backends）
+        self.backend = get_detector_backend()
+        self.detector = self.backend.create_detector() if self.backend.available else None
     
     def detect_objects(self, frame: np.ndarray) -> List[Dict]:
         """
-        使用YOLO在帧中检测对象。
+        使用检测后端在帧中检测对象。
         
         Returns:
             检测到的对象列表，包含边界框和置信度
         """
-        if not self.model:
+        if not self.detector:
             return []
         
         try:
-            # 运行YOLO检测
-            results = self.model(frame, verbose=False)
             detections = []
-            
-            for result in results:
-                boxes = result.boxes
-                if boxes is not None:
-                    for box in boxes:
-                        # 获取类别名称
-                        class_id = int(box.cls[0])
-                        class_name = self.model.names[class_id].lower()
-                        confidence = float(box.conf[0])
-                        
-                        # 按对象类别和置信度过滤
-                        if (self.object_class in class_name or class_name in self.object_class) and confidence >= self.confidence_threshold:
-                            # 获取边界框坐标
-                            x1, y1, x2, y2 = box.xyxy[0].tolist()
-                            
-                            detection = {
-                                'class': class_name,
-                                'confidence': confidence,
-                                'bbox': (int(x1), int(y1), int(x2), int(y2)),
-                                'center': (int((x1 + x2) / 2), int((y1 + y2) / 2)),
-                                'width': int(x2 - x1),
-                                'height': int(y2 - y1)
-                            }
-                            detections.append(detection)
+            for raw in self.detector.detect(frame):
+                class_name = raw['class']
+                confidence = raw['confidence']
+                
+                # 按对象类别和置信度过滤
+                if (self.object_class in class_name or class_name in self.object_class) and confidence >= self.confidence_threshold:
+                    # 获取边界框坐标
+                    x1, y1, x2, y2 = raw['bbox']
+                    
+                    detection = {
+                        'class': class_name,
+                        'confidence': confidence,
+                        'bbox': (int(x1), int(y1), int(x2), int(y2)),
+                        'center': (int((x1 + x2) / 2), int((y1 + y2) / 2)),
+                        'width': int(x2 - x1),
+                        'height': int(y2 - y1)
+                    }
+                    detections.append(detection)
             
             return detections
             
@@ -121,18 +154,71 @@ class YOLOTracker:
         # 否则，返回最高置信度的
         return max(detections, key=lambda x: x['confidence'])
     
-    def calculate_movement(self, current_center: Tuple[int, int]) -> Dict:
+    def reset(self) -> None:
+        """清除运动历史和所有模式检测状态。"""
+        self.movement_history.clear()
+        self.previous_center = None
+        self.frame_index = 0
+        self.last_detection_time = 0
+        self._reset_pattern_state()
+    
+    def _reset_pattern_state(self) -> None:
+        # 流式模式检测状态：每个新中心点只做O(1)更新，不再重新扫描窗口
+        self._last_dy = deque(maxlen=2)  # 最近两次垂直变化
+        self._last_dx = None
+        self._bounce_strengths = deque(maxlen=BOUNCE_WINDOW - 2)
+        self._jump_strengths = deque(maxlen=JUMP_WINDOW - 2)
+        self._h_flips = deque(maxlen=OSCILLATION_WINDOW - 1)
+        self._v_flips = deque(maxlen=OSCILLATION_WINDOW - 1)
+        self._h_flip_count = 0
+        self._v_flip_count = 0
+    
+    @staticmethod
+    def _push_flip(flips: deque, flip: int, total: int) -> int:
+        # 向定长窗口加入一个方向变化标记，并返回窗口内的变化总数
+        if len(flips) == flips.maxlen:
+            total -= flips[0]
+        flips.append(flip)
+        return total + flip
+    
+    def _update_patterns(self, dx: float, dy: float) -> None:
+        """用新的运动增量更新弹跳/跳跃/振荡检测状态。"""
+        if len(self._last_dy) == 2:
+            before, current = self._last_dy
+            # 三元组(before, current, dy)的模式强度：强度 > 阈值 即满足模式条件
+            self._bounce_strengths.append(_bounce_strength(before, current, dy))
+            self._jump_strengths.append(_jump_strength(before, current, dy))
+        
+        if self._last_dx is not None:
+            previous_dy = self._last_dy[-1]
+            self._h_flip_count = self._push_flip(self._h_flips, int((dx > 0) != (self._last_dx > 0)), self._h_flip_count)
+            self._v_flip_count = self._push_flip(self._v_flips, int((dy > 0) != (previous_dy > 0)), self._v_flip_count)
+        
+        self._last_dy.append(dy)
+        self._last_dx = dx
+    
+    def calculate_movement(self, current_center: Tuple[int, int], timestamp: Optional[float] = None) -> Dict:
         """
         计算当前位置和前一位置之间的运动指标。
+        
+        Args:
+            current_center: 当前中心点
+            timestamp: 可选的帧视频时间（秒，由frame_clock提供，不使用挂钟时间），
+                       未提供时历史记录中只保存帧序号
         """
+        self.frame_index += 1
         if not self.previous_center:
             self.previous_center = current_center
             return {'distance': 0, 'vertical_change': 0, 'horizontal_change': 0}
         
+        # 历史记录被外部清空（例如计数器reset）时，模式状态随之重置
+        if not self.movement_history:
+            self._reset_pattern_state()
+        
         # 计算运动
         dx = current_center[0] - self.previous_center[0]
         dy = current_center[1] - self.previous_center[1]
-        distance = np.sqrt(dx**2 + dy**2)
+        distance = (dx * dx + dy * dy) ** 0.5
         
         movement = {
             'distance': distance,
@@ -142,16 +228,14 @@ class YOLOTracker:
             'current_center': current_center
         }
         
-        # 更新历史记录
+        # 更新历史记录（定长deque，自动丢弃最旧的记录）
         self.movement_history.append({
-            'timestamp': time.time(),
+            'frame': self.frame_index,
+            'timestamp': timestamp,
             'center': current_center,
             'movement': movement
         })
-        
-        # 仅保留最近的历史记录（最后30帧）
-        if len(self.movement_history) > 30:
-            self.movement_history.pop(0)
+        self._update_patterns(dx, dy)
         
         # 更新前一个中心点
         self.previous_center = current_center
@@ -161,60 +245,20 @@ class YOLOTracker:
     def detect_bounce(self, movement: Dict, threshold: float = 30) -> bool:
         """
         检测对象是否在弹跳（上下运动）。
-        改进的算法以获得更好的弹跳检测。
+        在最近5次运动中寻找：向下趋势后显著向下运动，紧接着向上运动。
         """
-        if len(self.movement_history) < 5:  # 需要更多历史记录以进行可靠检测
+        if len(self.movement_history) < BOUNCE_WINDOW:  # 需要更多历史记录以进行可靠检测
             return False
-        
-        # 获取最近的垂直运动
-        recent_movements = self.movement_history[-5:]
-        vertical_changes = [m['movement']['vertical_change'] for m in recent_movements]
-        
-        # 寻找弹跳模式：向下运动后跟向上运动
-        # 弹跳应该显示：下降（正y）然后上升（负y）
-        for i in range(len(vertical_changes) - 1):
-            current_change = vertical_changes[i]
-            next_change = vertical_changes[i + 1]
-            
-            # 检测弹跳：显著的向下运动后跟向上运动
-            if (current_change > threshold and next_change < -threshold * 0.5):
-                # 额外验证：检查对象是否确实先向下后向上移动
-                if i >= 1:
-                    prev_change = vertical_changes[i - 1]
-                    # 确认弹跳前的向下趋势
-                    if prev_change > 0:
-                        return True
-        
-        return False
+        return max(self._bounce_strengths) > threshold
     
     def detect_jump(self, movement: Dict, threshold: float = 50) -> bool:
         """
         检测跳跃动作（显著的向上运动并返回）。
-        改进的算法以获得更好的跳跃检测。
+        在最近4次运动中寻找：向上趋势后显著向上运动，紧接着向下返回。
         """
-        if len(self.movement_history) < 4:
+        if len(self.movement_history) < JUMP_WINDOW:
             return False
-        
-        # 获取最近的运动
-        recent_movements = self.movement_history[-4:]
-        vertical_changes = [m['movement']['vertical_change'] for m in recent_movements]
-        
-        # 寻找跳跃模式：快速向上运动后向下返回
-        # 跳跃应该显示：向上（负y）然后向下（正y）
-        for i in range(len(vertical_changes) - 1):
-            current_change = vertical_changes[i]
-            next_change = vertical_changes[i + 1]
-            
-            # 检测跳跃：显著的向上运动后跟向下运动
-            if (current_change < -threshold and next_change > threshold * 0.3):
-                # 额外验证：检查持续的向上运动
-                if i >= 1:
-                    prev_change = vertical_changes[i - 1]
-                    # 确认跳跃期间的向上趋势
-                    if prev_change < 0:
-                        return True
-        
-        return False
+        return max(self._jump_strengths) > threshold
     
     def detect_movement_pattern(self, movement: Dict, pattern_type: str, threshold: float = 30) -> bool:
         """
@@ -231,28 +275,73 @@ class YOLOTracker:
     
     def detect_oscillation(self, movement: Dict, threshold: float = 30) -> bool:
         """
-        检测振荡运动（来回移动）。
+        检测振荡运动（来回移动）：最近6次运动中水平或垂直方向变化至少3次。
         """
-        if len(self.movement_history) < 6:
+        if len(self.movement_history) < OSCILLATION_WINDOW:
             return False
         
-        # 检查水平或垂直运动的振荡模式
-        recent_movements = self.movement_history[-6:]
-        horizontal_changes = [m['movement']['horizontal_change'] for m in recent_movements]
-        vertical_changes = [m['movement']['vertical_change'] for m in recent_movements]
+        # 如果多次方向变化则检测到振荡
+        return (self._h_flip_count >= 3 or self._v_flip_count >= 3)
+    
+    @staticmethod
+    def evaluate_trajectory(centers, pattern_type: str, threshold: float = 30) -> np.ndarray:
+        """
+        向量化地评估整条轨迹，用于离线回放。
+        
+        结果与对每个中心点依次调用calculate_movement()和
+        detect_movement_pattern()得到的结果逐帧一致。
+        
+        Args:
+            centers: 形状为(N, 2)的中心点序列
+            pattern_type: "bounce"、"jump"、"oscillation"或其他（按距离判断）
+            threshold: 检测阈值
+            
+        Returns:
+            np.ndarray: 长度为N的布尔数组，第i项为处理第i个中心点后的检测结果
+        """
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+        result = np.zeros(len(centers), dtype=bool)
+        if len(centers) < 2:
+            return result
         
-        # 计数方向变化
-        h_direction_changes = 0
-        v_direction_changes = 0
+        deltas = np.diff(centers, axis=0)
+        dx, dy = deltas[:, 0], deltas[:, 1]
+        # history_len[k] = 处理第k+1个中心点后历史记录的长度
+        history_len = np.minimum(np.arange(1, len(deltas) + 1), MOVEMENT_HISTORY_SIZE)
         
-        for i in range(1, len(horizontal_changes)):
-            if (horizontal_changes[i] > 0) != (horizontal_changes[i-1] > 0):
-                h_direction_changes += 1
-            if (vertical_changes[i] > 0) != (vertical_changes[i-1] > 0):
-                v_direction_changes += 1
+        if pattern_type in ("bounce", "jump"):
+            window = BOUNCE_WINDOW if pattern_type == "bounce" else JUMP_WINDOW
+            if len(dy) < 3:
+                return result
+            before, current, after = dy[:-2], dy[1:-1], dy[2:]
+            # 与_bounce_strength/_jump_strength相同的三元组强度
+            if pattern_type == "bounce":
+                strengths = np.where(before > 0, np.minimum(current, -2.0 * after), -np.inf)
+            else:
+                strengths = np.where(before < 0, np.minimum(-current, after / 0.3), -np.inf)
+            span = window - 2
+            if len(strengths) < span:
+                return result
+            # 以第k次运动结尾的窗口内最大强度
+            window_max = np.lib.stride_tricks.sliding_window_view(strengths, span).max(axis=1)
+            detected = np.zeros(len(dy), dtype=bool)
+            detected[span + 1:] = window_max > threshold
+            detected &= history_len >= window
+        elif pattern_type == "oscillation":
+            if len(dy) < OSCILLATION_WINDOW:
+                return result
+            span = OSCILLATION_WINDOW - 1
+            h_flips = ((dx[1:] > 0) != (dx[:-1] > 0)).astype(np.int64)
+            v_flips = ((dy[1:] > 0) != (dy[:-1] > 0)).astype(np.int64)
+            h_count = np.lib.stride_tricks.sliding_window_view(h_flips, span).sum(axis=1)
+            v_count = np.lib.stride_tricks.sliding_window_view(v_flips, span).sum(axis=1)
+            detected = np.zeros(len(dy), dtype=bool)
+            detected[span:] = (h_count >= 3) | (v_count >= 3)
+        else:
+            detected = np.hypot(dx, dy) > threshold
         
-        # 如果多次方向变化则检测到振荡
-        return (h_direction_changes >= 3 or v_direction_changes >= 3)
+        result[1:] = detected
+        return result
     
     def draw_detection(self, frame: np.ndarray, detection: Dict) -> np.ndarray:
         """
@@ -279,7 +368,8 @@ class YOLOTracker:
         
         # 绘制运动轨迹
         if len(self.movement_history) > 1:
-            points = [m['center'] for m in self.movement_history[-10:]]  # 最后10个位置
+            start = max(0, len(self.movement_history) - 10)
+            points = [m['center'] for m in islice(self.movement_history, start, None)]  # 最后10个位置
             for i in range(1, len(points)):
                 cv2.line(frame, points[i-1], points[i], (255, 0, 0), 2)
         
@@ -307,4 +397,4 @@ if __name__ == "__main__":
     
     # 使用示例
     tracker = YOLOTracker("dog")
-    print(f"\n🐕 狗跟踪器已初始化: {tracker.model is not None}") 
\ No newline at end of file
+    print(f"\n🐕 狗跟踪器已初始化: {tracker.detector is not None}") 
\ No newline at end of file